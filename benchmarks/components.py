@@ -0,0 +1,244 @@
+import os
+import sys
+import math
+import time
+import resource
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# project root for the scrapers and stores, text_cleaner_cpp for the Cython wrapper
+root = Path(__file__).resolve().parent.parent
+sys.path.append(str(root))
+sys.path.append(str(root / 'text_cleaner_cpp'))
+
+from benchmarks.fixtures import make_documents, fed_page, ecb_page, write_pdf
+
+# A setup function gets the run configuration and returns the work items and a
+# function doing the work for one item, which returns the units it processed
+Setup = Callable[[Dict[str, Any]], Tuple[List[Any], Callable[[Any], float]]]
+
+
+class SkipComponent(Exception):
+    """A component cannot run here, e.g. an extension is not built or a model is missing"""
+
+
+def load_texts(config: Dict[str, Any]) -> List[str]:
+    """Speech texts of the corpus store, or fixture documents without one"""
+    corpus_dir = config.get('corpus_dir')
+    if corpus_dir and os.path.isdir(corpus_dir):
+        from data_collection.corpus_store import CorpusStore
+        texts = []
+        for batch in CorpusStore(corpus_dir).iter_batches(columns=['text'], source_type='speech'):
+            texts.extend(text for text in batch.column('text').to_pylist() if text)
+            if len(texts) >= config['docs']:
+                return texts[:config['docs']]
+        if texts:
+            return texts
+    return make_documents(config['docs'])
+
+
+def _megabytes(text: str) -> float:
+    return len(text.encode('utf-8')) / 1e6
+
+
+def _cleaner_setup(engine: str, unicode: str) -> Setup:
+    def setup(config):
+        try:
+            from speech_clean_wrapper import PyBatchCleaner
+        except ImportError as e:
+            raise SkipComponent(f"speech_clean_wrapper is not built: {e}")
+        cleaner = PyBatchCleaner(30, 1, engine, unicode)
+
+        def work(text: str) -> float:
+            cleaner.count([text])
+            return _megabytes(text)
+        return load_texts(config), work
+    return setup
+
+
+def _stream_setup(config):
+    try:
+        from speech_clean_wrapper import PyStreamCleaner
+    except ImportError as e:
+        raise SkipComponent(f"speech_clean_wrapper is not built: {e}")
+
+    def work(text: str) -> float:
+        cleaner = PyStreamCleaner(30, 'tokenizer', unicode='fold')
+        # page sized chunks, as PDF extraction would feed them
+        for start in range(0, len(text), 4096):
+            cleaner.feed(text[start:start + 4096])
+            for _ in cleaner:
+                pass
+        cleaner.close()
+        for _ in cleaner:
+            pass
+        return _megabytes(text)
+    return load_texts(config), work
+
+
+def _pdf_paths(config: Dict[str, Any]) -> List[str]:
+    """PDFs of --pdf-dir, or fixture speeches written as PDFs"""
+    pdf_dir = config.get('pdf_dir')
+    if pdf_dir and os.path.isdir(pdf_dir):
+        paths = sorted(os.path.join(pdf_dir, file) for file in os.listdir(pdf_dir)
+                       if file.endswith('.pdf'))[:config['docs']]
+    else:
+        # kept for the lifetime of the benchmark process
+        fixture_dir = tempfile.mkdtemp(prefix='bench_pdf_')
+        paths = []
+        for i, text in enumerate(load_texts(config)):
+            paths.append(os.path.join(fixture_dir, f'speech_{i:04d}.pdf'))
+            write_pdf(paths[-1], text)
+    return paths
+
+
+def _pdf_setup(split: str) -> Setup:
+    def setup(config):
+        try:
+            from pdf_parser_cpp.cython_parser import PDF_Text
+        except ImportError as e:
+            raise SkipComponent(f"pdf_parser_cpp is not built: {e}")
+
+        def work(path: str) -> float:
+            return PDF_Text(path, split=split).get_num_pages()
+        return _pdf_paths(config), work
+    return setup
+
+
+def _load_pages(directory: str, source: str, limit: int) -> List[str]:
+    """Saved pages named {source}_*.html, as written by scraper_py/extract_performance.py --save"""
+    pages = []
+    for file in sorted(os.listdir(directory)):
+        if file.startswith(source + '_') and file.endswith('.html'):
+            with open(os.path.join(directory, file), 'r', encoding='utf-8') as handle:
+                pages.append(handle.read())
+    return pages[:limit]
+
+
+def _html_setup(source: str) -> Setup:
+    def setup(config):
+        from scraper_py.extract import parse_fed_speech, parse_ecb_section
+        parse = parse_fed_speech if source == 'fed' else parse_ecb_section
+        pages_dir = config.get('pages_dir')
+        pages = _load_pages(pages_dir, source, config['docs']) if pages_dir and os.path.isdir(pages_dir) else []
+        if not pages:
+            build = fed_page if source == 'fed' else ecb_page
+            pages = [build(text) for text in load_texts(config)]
+
+        def work(page: str) -> float:
+            parse(page)
+            return 1
+        return pages, work
+    return setup
+
+
+def _import_vectorize():
+    try:
+        from data_analysis import vectorize
+    except ImportError as e:
+        raise SkipComponent(f"data_analysis/vectorize.py cannot be imported: {e}")
+    return vectorize
+
+
+def _chunking_setup(config):
+    vectorize = _import_vectorize()
+    max_tokens = config['max_tokens']
+    texts = load_texts(config)
+    try:
+        vectorize.chunk_text(texts[0], max_tokens)
+    except LookupError as e:
+        raise SkipComponent(f"nltk tokenizer data is missing: {e}")
+
+    def work(text: str) -> float:
+        vectorize.chunk_text(text, max_tokens)
+        return _megabytes(text)
+    return texts, work
+
+
+def _embedding_setup(config):
+    vectorize = _import_vectorize()
+    try:
+        vectorizer = vectorize.Vectorize(model=config['embedding_model'], max_tokens=config['max_tokens'])
+        chunks = [vectorize.chunk_text(text, config['max_tokens']) for text in load_texts(config)]
+    except (OSError, LookupError) as e:
+        raise SkipComponent(f"embedding model or tokenizer data is not available: {e}")
+    chunks = [doc_chunks for doc_chunks in chunks if doc_chunks]
+
+    def work(doc_chunks: List[str]) -> float:
+        vectorizer.model.encode(doc_chunks, batch_size=32)
+        return len(doc_chunks)
+    return chunks, work
+
+
+# name -> (unit of the throughput, what is measured, setup)
+COMPONENTS: Dict[str, Tuple[str, str, Setup]] = {
+    'clean_legacy': ('MB', 'PyBatchCleaner, legacy splitter, one thread', _cleaner_setup('legacy', 'drop')),
+    'clean_tokenizer': ('MB', 'PyBatchCleaner, tokenizer engine with unicode folding', _cleaner_setup('tokenizer', 'fold')),
+    'clean_stream': ('MB', 'PyStreamCleaner fed 4 KiB chunks', _stream_setup),
+    'pdf_extract': ('pages', 'PDF_Text on fixture or --pdf-dir PDFs', _pdf_setup('scanner')),
+    'pdf_extract_regex': ('pages', 'PDF_Text with the original std::regex sentence split', _pdf_setup('regex')),
+    'html_fed': ('pages', 'parse_fed_speech on saved or fixture pages', _html_setup('fed')),
+    'html_ecb': ('pages', 'parse_ecb_section on saved or fixture pages', _html_setup('ecb')),
+    'chunking': ('MB', 'Vectorize chunking of documents into token-limited chunks', _chunking_setup),
+    'embedding': ('chunks', 'SentenceTransformer encoding of the chunks with a small model', _embedding_setup),
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_component(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one component, meant to be called in a fresh process so the peak RSS
+    belongs to that component alone.
+
+    Args:
+        name (str): Key of COMPONENTS
+        config (dict): docs, runs, corpus_dir, pages_dir, pdf_dir, embedding_model, max_tokens
+
+    Returns:
+        dict: Throughput in units per second, p50/p95 latency per item in
+        milliseconds and peak RSS in MB, or the reason the component was skipped
+    """
+    unit, description, setup = COMPONENTS[name]
+    try:
+        items, work = setup(config)
+    except SkipComponent as e:
+        return {'skipped': str(e)}
+    if not items:
+        return {'skipped': 'no work items'}
+
+    # warm up caches, lazy imports and thread pools before timing
+    work(items[0])
+    latencies = []
+    units = 0.0
+    start = time.perf_counter()
+    for _ in range(config['runs']):
+        for item in items:
+            item_start = time.perf_counter()
+            units += work(item)
+            latencies.append(time.perf_counter() - item_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'description': description,
+        'unit': unit,
+        'items': len(items),
+        'runs': config['runs'],
+        'elapsed_s': round(elapsed, 4),
+        'throughput': round(units / elapsed, 3) if elapsed else None,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    }
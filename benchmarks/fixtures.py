@@ -0,0 +1,170 @@
+import os
+import random
+import datetime
+from typing import List
+
+# Paragraphs in the register of Fed and ECB speeches: abbreviations, decimals,
+# percentages, quotes and the odd euro sign, so the cleaner, the sentence
+# engines and the PDF filters see what they see on real documents.
+PARAGRAPHS = [
+    "Thank you for the opportunity to speak with you today. I will discuss the outlook for the U.S. economy "
+    "and the implications for monetary policy. As always, the views I express are my own and not necessarily "
+    "those of my colleagues on the Federal Open Market Committee.",
+
+    "Economic activity has continued to expand at a solid pace. Real GDP rose at an annual rate of 2.8 percent "
+    "in the third quarter, supported by resilient consumer spending and a pickup in business investment in "
+    "equipment. Housing activity, by contrast, remains subdued, reflecting the high level of mortgage rates.",
+
+    "Labor market conditions have eased from their very tight levels of two years ago. Payroll gains have "
+    "averaged about 150,000 per month since the spring, the unemployment rate has edged up to 4.1 percent, "
+    "and job openings have declined substantially. Nominal wage growth has moderated to a pace of around "
+    "4 percent, which is closer to a rate consistent with our 2 percent inflation objective over time.",
+
+    "Inflation has come down considerably but remains somewhat elevated. Over the 12 months ending in "
+    "September, total PCE prices rose 2.1 percent and core PCE prices, which exclude the volatile food and "
+    "energy categories, rose 2.7 percent. Goods prices have been roughly flat, while services inflation "
+    "excluding housing has come down more slowly.",
+
+    "In light of the progress on inflation and the balance of risks, the Committee lowered the target range "
+    "for the federal funds rate by 1/4 percentage point, to 4-1/2 to 4-3/4 percent. Mr. Chairman, as you "
+    "noted at the press conference, policy is not on a preset course. We will continue to make our decisions "
+    "meeting by meeting.",
+
+    "Let me now turn to the euro area. Growth was weaker than expected in the first half of the year, as "
+    "manufacturing output contracted and households kept saving a large share of their income. Survey "
+    "indicators such as the PMI point to a modest recovery, driven by services and by rising real incomes.",
+
+    "Headline inflation in the euro area fell to 1.7 % in September, mainly owing to lower energy prices. "
+    "Domestic inflation, however, remains high. Wages are still rising at an elevated pace, and services "
+    "inflation stood at 4.0 %. The Governing Council is determined to ensure that inflation returns to its "
+    "2 % medium-term target in a timely manner.",
+
+    "The Governing Council today decided to lower the three key ECB interest rates by 25 basis points. In "
+    "particular, the decision to lower the deposit facility rate, through which we steer the monetary policy "
+    "stance, is based on our updated assessment of the inflation outlook, the dynamics of underlying "
+    "inflation and the strength of monetary policy transmission.",
+
+    "Financial conditions have eased somewhat since the summer. Market interest rates have declined, bank "
+    "lending rates for firms and households have come down from their peaks, and credit growth remains weak "
+    "but is gradually picking up. The Eurosystem balance sheet continues to shrink at a measured and "
+    "predictable pace, as the APP and PEPP portfolios run off.",
+
+    "What are the risks to this outlook? On the downside, greater friction in global trade could weigh on "
+    "euro area growth by dampening exports. Geopolitical tensions, e.g. the conflicts in Ukraine and the "
+    "Middle East, could disrupt energy supplies and shipping. On the upside, growth could be stronger if "
+    "easier financing conditions and falling inflation allow domestic consumption to rebound faster.",
+
+    "Dr. Lagarde has emphasised that “we are not pre-committing to a particular rate path” – "
+    "and I fully share that view. Our interest rate decisions will continue to be based on our assessment "
+    "of the incoming economic and financial data, for instance the staff projections of €-area growth.",
+
+    "A banking system that is well capitalised and liquid is the first line of defence against shocks. "
+    "Supervisors have asked banks to strengthen their management of interest rate risk and of uninsured "
+    "deposits. Stress tests show that the largest institutions would remain above their minimum capital "
+    "requirements even under a severely adverse scenario.",
+
+    "Finally, a word on communication. Clear communication about our reaction function helps the public and "
+    "markets anticipate how policy will respond to the data, and that makes policy more effective. Is there "
+    "a risk of saying too much? Certainly! But the greater risk is leaving people uncertain about our "
+    "commitment to price stability.",
+
+    "To conclude, the economy is in a good place, and our policy stance is well positioned to respond to the "
+    "risks we face. We remain fully committed to returning inflation to our goal while keeping the labor "
+    "market strong. Thank you, and I look forward to your questions.",
+]
+
+
+def make_documents(count: int, paragraphs_per_doc: int = 40, seed: int = 1) -> List[str]:
+    """count speech-length documents of shuffled fixture paragraphs, the same for every run"""
+    rng = random.Random(seed)
+    return ['\n'.join(rng.choice(PARAGRAPHS) for _ in range(paragraphs_per_doc)) for _ in range(count)]
+
+
+def _html_escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _page_shell(title: str, body: str) -> str:
+    """Navigation, header and footer around the article, as on the live sites"""
+    nav = ''.join(f'<li><a href="/section{i}.htm">Section {i}</a></li>' for i in range(40))
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{_html_escape(title)}</title>'
+            f'<link rel="stylesheet" href="/css/site.css"><script src="/js/site.js"></script></head>'
+            f'<body><header><nav><ul>{nav}</ul></nav></header><main>{body}</main>'
+            f'<footer><ul>{nav}</ul><p>Last update: {datetime.date(2024, 10, 1):%B %d, %Y}</p></footer></body></html>')
+
+
+def fed_page(document: str, date: str = 'October 01, 2024') -> str:
+    """Federal Reserve speech page with the containers parse_fed_speech reads"""
+    paras = ''.join(f'<p>{_html_escape(para)}</p>' for para in document.split('\n'))
+    body = (f'<div class="row"><div class="col-xs-12"><h3 class="title">Speech</h3>'
+            f'<p class="article__time">{date}</p></div></div>'
+            f'<div class="row"><div class="col-xs-12 col-sm-8 col-md-8">{paras}</div>'
+            f'<div class="col-xs-12 col-sm-4 col-md-4"><p>Related speeches</p></div></div>')
+    return _page_shell('Speech', body)
+
+
+def ecb_page(document: str) -> str:
+    """ECB speech page with the div.section paragraphs parse_ecb_section reads"""
+    paras = ''.join(f'<p>{_html_escape(para)}</p>' for para in document.split('\n'))
+    body = (f'<div class="title"><h1>Speech</h1></div><div class="section">{paras}</div>'
+            f'<div class="section footnotes"><ol><li>See the Economic Bulletin, Issue 6/2024.</li></ol></div>')
+    return _page_shell('Speech', body)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines = []
+    for para in text.split('\n'):
+        line = ''
+        for word in para.split():
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f'{line} {word}' if line else word
+        lines.append(line)
+        lines.append('')
+    return lines
+
+
+def write_pdf(path: str, document: str, lines_per_page: int = 60, width: int = 95):
+    """
+    Write document as a plain text PDF: US letter pages of Helvetica lines, no
+    images or compression, which poppler extracts like a BIS speech.
+    """
+    lines = _wrap(document, width)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = {1: b'<< /Type /Catalog /Pages 2 0 R >>',
+               3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'}
+    kids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f'{page_id} 0 R')
+        text = ''.join(f'({_pdf_escape(line)}) Tj T* ' for line in page_lines)
+        # WinAnsiEncoding is cp1252, which has the curly quotes, dashes and euro sign
+        stream = f'BT /F1 10 Tf 12 TL 56 740 Td {text}ET'.encode('cp1252', 'replace')
+        objects[page_id] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>').encode('ascii')
+        objects[content_id] = b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(pages)} >>'.encode('ascii')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for number in sorted(objects):
+        out += b'%010d 00000 n \n' % offsets[number]
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(out)
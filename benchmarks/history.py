@@ -0,0 +1,105 @@
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+# metric -> True if higher is better
+METRICS = {
+    'throughput': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'peak_rss_mb': False,
+}
+
+
+def append_run(path: str, run: Dict[str, Any]):
+    """Append one run to the JSONL history, creating the file if needed"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(run) + '\n')
+
+
+def load_runs(path: str) -> List[Dict[str, Any]]:
+    """All runs of the history, oldest first"""
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                # a torn last line from an interrupted run
+                continue
+    return runs
+
+
+def find_run(runs: List[Dict[str, Any]], ref: str) -> Optional[Dict[str, Any]]:
+    """
+    A run by reference: 'latest', 'previous', a run id, a label or a negative
+    index such as '-3'. Labels and ids match the most recent run carrying them.
+    """
+    if not runs:
+        return None
+    if ref == 'latest':
+        return runs[-1]
+    if ref == 'previous':
+        return runs[-2] if len(runs) > 1 else None
+    if ref.lstrip('-').isdigit():
+        index = int(ref)
+        return runs[index] if -len(runs) <= index < len(runs) else None
+    for run in reversed(runs):
+        if ref in (run.get('id'), run.get('label')):
+            return run
+    return None
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Compare every metric of the components measured in both runs.
+
+    Args:
+        baseline (dict): Earlier run
+        current (dict): Run to check
+        threshold (float): Relative change in the bad direction that counts as a regression
+
+    Returns:
+        list: One row per component and metric with both values, the relative
+        change and whether it is a regression
+    """
+    rows = []
+    for name, result in current['components'].items():
+        before = baseline['components'].get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                'component': name,
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'change': change,
+                'regression': worse > threshold,
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    lines = [f"Comparing {current['id']} against {baseline['id']}"]
+    if baseline.get('host') != current.get('host'):
+        lines.append("  note: the runs are from different hosts, differences may not be regressions")
+    lines.append(f"{'Component':<18} {'Metric':<12} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    lines.append("-" * 68)
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        lines.append(f"{row['component']:<18} {row['metric']:<12} {row['baseline']:>12.3f} "
+                     f"{row['current']:>12.3f} {row['change']:>+8.1%}{flag}")
+    regressions = sum(row['regression'] for row in rows)
+    lines.append(f"\n{regressions} regression(s)" if regressions else "\nNo regressions")
+    return '\n'.join(lines)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite across the text pipeline: the C++ sentence cleaner, PDF_Text
+extraction, lxml extraction of Fed and ECB pages, Vectorize chunking and
+embedding with a small model. Every component runs in its own process and
+reports throughput, p50/p95 latency per document and peak RSS. Runs are
+appended to a JSON lines history, and compare flags metrics that got worse
+by more than a threshold.
+
+    python benchmarks/run_benchmarks.py run
+    python benchmarks/run_benchmarks.py run --components clean_tokenizer pdf_extract --label regex-free
+    python benchmarks/run_benchmarks.py run --components pdf_extract pdf_extract_regex --pdf-dir data/bis_data
+    python benchmarks/run_benchmarks.py compare --baseline previous --threshold 0.1
+    python benchmarks/run_benchmarks.py list
+
+Without --corpus-dir, --pages or --pdf-dir the components run on fixture
+speeches in benchmarks/fixtures.py, rendered as Fed/ECB pages and text PDFs.
+"""
+
+import os
+import sys
+import time
+import socket
+import platform
+import argparse
+import subprocess
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from benchmarks.components import COMPONENTS, run_component
+from benchmarks.history import append_run, load_runs, find_run, compare_runs, format_comparison
+
+default_history = str(Path(__file__).resolve().parent / 'history.jsonl')
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).resolve().parent,
+                                       stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_suite(names: List[str], config: Dict[str, Any], label: str = None) -> Dict[str, Any]:
+    """
+    Run components one after the other, each in a fresh process.
+
+    Returns:
+        dict: The run as stored in the history
+    """
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name in names:
+        print(f"Running {name}...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                results[name] = pool.submit(run_component, name, config).result()
+            except Exception as e:
+                results[name] = {'skipped': f'failed: {e}'}
+    return {
+        'id': time.strftime('%Y%m%d-%H%M%S'),
+        'label': label,
+        'time': time.time(),
+        'commit': _git_commit(),
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': config,
+        'components': results,
+    }
+
+
+def format_run(run: Dict[str, Any]) -> str:
+    lines = [f"Run {run['id']}" + (f" ({run['label']})" if run.get('label') else '') + f" at {run['commit'] or 'unknown commit'}",
+             f"{'Component':<18} {'Throughput':>16} {'p50 ms':>10} {'p95 ms':>10} {'Peak RSS MB':>12}",
+             "-" * 70]
+    for name, result in run['components'].items():
+        if 'skipped' in result:
+            lines.append(f"{name:<18} skipped: {result['skipped']}")
+            continue
+        throughput = f"{result['throughput']:.2f} {result['unit']}/s"
+        lines.append(f"{name:<18} {throughput:>16} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+                     f"{result['peak_rss_mb']:>12.1f}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default=default_history, help='JSON lines file of the runs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run components and append the results to the history')
+    run_parser.add_argument('--components', nargs='+', default=list(COMPONENTS), choices=list(COMPONENTS))
+    run_parser.add_argument('--docs', type=int, default=50, help='documents, pages or PDFs per component')
+    run_parser.add_argument('--runs', type=int, default=3, help='timed passes over the documents')
+    run_parser.add_argument('--corpus-dir', help='corpus store with speeches to use instead of the fixtures')
+    run_parser.add_argument('--pages', help='directory of saved fed_*.html/ecb_*.html pages')
+    run_parser.add_argument('--pdf-dir', help='directory of PDFs, e.g. data/bis_data')
+    run_parser.add_argument('--embedding-model', default='sentence-transformers/paraphrase-MiniLM-L3-v2')
+    run_parser.add_argument('--max-tokens', type=int, default=384, help='chunk size of Vectorize')
+    run_parser.add_argument('--label', help='name of the run, usable as a compare reference')
+    run_parser.add_argument('--threshold', type=float, default=0.10, help='regression threshold against the previous run')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two runs of the history')
+    compare_parser.add_argument('--baseline', default='previous', help="'previous', a run id, a label or an index")
+    compare_parser.add_argument('--run', default='latest', help="'latest', a run id, a label or an index")
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+
+    commands.add_parser('list', help='list the runs of the history')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        config = {
+            'docs': args.docs,
+            'runs': args.runs,
+            'corpus_dir': args.corpus_dir,
+            'pages_dir': args.pages,
+            'pdf_dir': args.pdf_dir,
+            'embedding_model': args.embedding_model,
+            'max_tokens': args.max_tokens,
+        }
+        previous = find_run(load_runs(args.history), 'latest')
+        run = run_suite(args.components, config, args.label)
+        append_run(args.history, run)
+        print()
+        print(format_run(run))
+        if previous is not None:
+            print()
+            print(format_comparison(compare_runs(previous, run, args.threshold), previous, run))
+
+    elif args.command == 'compare':
+        runs = load_runs(args.history)
+        baseline, current = find_run(runs, args.baseline), find_run(runs, args.run)
+        if baseline is None or current is None:
+            print(f"Need two runs in {args.history} to compare, found {len(runs)}")
+            sys.exit(2)
+        rows = compare_runs(baseline, current, args.threshold)
+        print(format_comparison(rows, baseline, current))
+        sys.exit(1 if any(row['regression'] for row in rows) else 0)
+
+    elif args.command == 'list':
+        for run in load_runs(args.history):
+            measured = [name for name, result in run['components'].items() if 'skipped' not in result]
+            print(f"{run['id']}  {run.get('label') or '-':<16} {run.get('commit') or '-':<10} {', '.join(measured)}")
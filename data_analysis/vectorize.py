@@ -10,11 +10,15 @@ from sklearn.decomposition import PCA
 import numpy as np 
 from typing import Dict, List, Any 
 import re 
+import json
+import tempfile
 
 from pathlib import Path
 sys.path.append(os.path.join(Path(__file__).parent, '..'))  # Go up to project root
 from pdf_parser_cpp.cython_parser import PDF_Text
-import pickle 
+from data_collection.corpus_store import CorpusStore
+from pipeline.dedup import Deduplicator
+from data_collection.raw_archive import RawArchive
 from tqdm import tqdm
 # Check what's available
 print("Current directory:", os.getcwd())
@@ -23,7 +27,7 @@ print("Available directories:", os.listdir('.'))
 # Fix the path - go up one level to find data/
 data_dir = '../data/bis_data'
 pdf_files = [os.path.join(data_dir, file) for file in os.listdir(data_dir)
-              if file.endswith('.pdf')]
+              if file.endswith('.pdf')] if os.path.isdir(data_dir) else []
 
 print(f"Found {len(pdf_files)} PDF files")
 
@@ -51,32 +55,127 @@ def show_file_text(file: str = None):
 # print(f"Total time: {total_time:.4f}s")
 # print(doc_text)
 
-def process_all_files(directory: str): 
-    exists = True if os.path.isdir('../data/'+directory) else False 
+def _load_download_manifest(directory: str) -> Dict[str, Dict[str, Any]]:
+    """ScrapeBIS's manifest.jsonl of a download directory, keyed by file name"""
+    manifest = {}
+    path = os.path.join(directory, 'manifest.jsonl')
+    if not os.path.exists(path):
+        return manifest
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            manifest[record['file_name']] = record
+    return manifest
+
+
+def iter_pdf_sources(directory: str, archive_dir: str = None):
+    """
+    Yield (document id, title, date, bank, pdf path) of the BIS PDFs, either from the
+    loose files in ../data/<directory> or replayed from the raw archive, in
+    which case every PDF is written to one reused temporary file. The document
+    id is the PDF's URL in both cases, as ScrapeBIS links duplicates by URL;
+    only files missing from the download manifest fall back to their path.
+    """
+    if archive_dir is None:
+        pdf_dir = os.path.join('../data', directory)
+        manifest = _load_download_manifest(pdf_dir)
+        for file in os.listdir(pdf_dir):
+            if not file.endswith('.pdf'):
+                continue
+            path = os.path.join(pdf_dir, file)
+            record = manifest.get(file)
+            if record is not None and record.get('title') is not None:
+                yield record['url'], record['title'], record['date'], record.get('bank'), path
+                continue
+            # BIS files are named {title}-{date}.pdf
+            name_match = re.fullmatch(r'(.*)-(\d{4}-\d{2}-\d{2}[^-]*)\.pdf', file)
+            yield (record['url'] if record is not None else path,
+                   name_match.group(1) if name_match else file,
+                   name_match.group(2) if name_match else None, None, path)
+        return
+
+    archive = RawArchive(archive_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'document.pdf')
+        # the archive is read front to back, one segment after the other
+        for record, payload in archive.scan('application/pdf'):
+            with open(path, 'wb') as file:
+                file.write(payload)
+            meta = record.get('meta') or {}
+            yield record['url'], meta.get('title'), meta.get('date'), meta.get('bank'), path
+
+
+def process_all_files(directory: str, corpus_dir: str = '../data/corpus',
+                      dedup_index: str = '../data/dedup_index.json', archive_dir: str = None): 
+    exists = True if archive_dir is not None or os.path.isdir('../data/'+directory) else False 
     if not exists : 
         raise ValueError("Directory does not exist")
     
     elif exists : 
-        file_list = [os.path.join(data_dir,file) for file in os.listdir('../data/'+directory)
-                     if file.endswith('.pdf')]
         page_count = 0 
-        text_values = {}
-        for i in tqdm(range(len(file_list))):
-            try:
-                object = PDF_Text(file_list[i])
-                text = object.get_text()
-                pages = object.get_num_pages()
-                file_name = object.get_filename()
-                page_count += pages 
-                print(f'Processed {page_count} pages')
-                text_values[file_name] = text 
-            except Exception as e:
-                print(f"Error processing {file_list[i]}: {e}")
-                continue
+        num_duplicates = 0
+        store = CorpusStore(corpus_dir)
+        # duplicates of documents already in the corpus are linked to them and
+        # never stored, so they are not embedded twice
+        dedup = Deduplicator.load(dedup_index) if os.path.exists(dedup_index) else Deduplicator()
+        # documents are appended to the columnar store one at a time 
+        with store.writer(prefix='bis-pdf') as writer:
+            for doc_id, title, date, bank, path in tqdm(iter_pdf_sources(directory, archive_dir)):
+                try:
+                    if dedup.canonical(doc_id) is not None:
+                        continue
+                    # a same-day document of the same bank with the same title is not worth parsing
+                    canonical = dedup.match_metadata(date, title, bank)
+                    if canonical is not None:
+                        dedup.link(doc_id, canonical, date, title, bank)
+                        num_duplicates += 1
+                        continue
+
+                    object = PDF_Text(path)
+                    text = object.get_text()
+                    pages = object.get_num_pages()
+                    page_count += pages 
+                    print(f'Processed {page_count} pages')
+                    if dedup.add(doc_id, text, date, title, bank).kind != 'unique':
+                        num_duplicates += 1
+                        continue
+                    writer.write({
+                        'bank': 'bis',
+                        'date': date,
+                        'title': title,
+                        'url': doc_id,
+                        'source_type': 'speech_pdf',
+                        'text': text,
+                    })
+                except Exception as e:
+                    print(f"Error processing {doc_id}: {e}")
+                    continue
         
-        print('transferring to pickle')
-        with open('../data/processed.pkl', 'wb')as file :
-            pickle.dump(text_values, file=file)
+        dedup.save(dedup_index)
+        print(f'Wrote {writer.num_rows} documents to {corpus_dir}, skipped {num_duplicates} duplicates')
+
+def chunk_text(text: str, max_tokens: int = 384) -> List[str]:
+    """
+    Split a text into the chunks Vectorize embeds: whole sentences joined
+    until the next one would take the chunk past max_tokens words.
+    """
+    interm_list = []
+    curr_sentence = ''
+    counter = 0
+    for sentence in sent_tokenize(text):
+        word_count = len(word_tokenize(sentence))
+        counter += word_count
+        if counter <= max_tokens:
+            curr_sentence += sentence 
+
+        elif counter > max_tokens : 
+            interm_list.append(curr_sentence)
+            curr_sentence = sentence
+            counter = word_count
+    return interm_list
 
 class Vectorize : 
 
@@ -89,20 +188,7 @@ class Vectorize :
     def __prepare_tokens(self, text: Dict[str,str]):
         max_len = self.token_limit
         for key, entry in text.items():
-            interm_list = []
-            sentence_list = sent_tokenize(entry)
-            curr_sentence = ''
-            counter = 0
-            for sentence in sentence_list:
-                word_count = len(word_tokenize(sentence))
-                counter += word_count
-                if counter <= max_len:
-                    curr_sentence += sentence 
-
-                elif counter > max_len : 
-                    interm_list.append(curr_sentence)
-                    curr_sentence = sentence
-                    counter = word_count
+            interm_list = chunk_text(entry, max_len)
             curr_date = self.__date_matcher(key)
             text[curr_date] = interm_list
         return text 
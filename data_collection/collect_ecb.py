@@ -0,0 +1,80 @@
+import os
+import sys
+import pandas as pd
+from pathlib import Path
+from typing import List
+
+# current file
+current = Path(__file__).resolve()
+#parent directory
+root = current.parent.parent
+# creating import path
+sys.path.append(str(root))
+
+from scraper_py.ecb_scraper import ECB_Scraper
+from scraper_py.fetch import FetchEngine
+from data_collection.corpus_store import CorpusStore
+from data_collection.raw_archive import RawArchive
+from pipeline.dedup import Deduplicator
+
+# TODO: Specify years for collecting speeches
+collection_years = [int(i) for i in range(1997, 2026)]
+# on-disk HTTP cache shared by every scraper run, so re-runs only revalidate
+cache_dir = "data/http_cache"
+# columnar corpus store written by every collection, see corpus_store.py
+corpus_dir = "data/corpus"
+# content hashes and MinHash signatures of every stored document, see pipeline/dedup.py
+dedup_index = "data/dedup_index.json"
+# zstd segments holding the raw HTML of every fetched page, see raw_archive.py
+archive_dir = "data/raw_archive"
+
+
+def _collect(years: List[int], source_type: str, write_to_file: bool, workers: int,
+            engine: FetchEngine) -> pd.DataFrame:
+    scraper = ECB_Scraper(years, engine=engine, cache_dir=cache_dir, archive=RawArchive(archive_dir))
+    if source_type == 'speech':
+        links = scraper.get_speech_links() or {}
+    else:
+        links = scraper.get_econ_bulletin_links(years)
+    records = ({'bank': 'ecb', 'date': date, 'title': title, 'url': url,
+                'source_type': source_type, 'text': text}
+               for title, url, date, text in scraper.iter_speech_texts(links, num_workers=workers))
+
+    if write_to_file == False:
+        return pd.DataFrame(list(records), columns=['date', 'title', 'url', 'text'])
+
+    # documents are written to the store as they arrive instead of being held in memory
+    store = CorpusStore(corpus_dir)
+    dedup = Deduplicator.load(dedup_index) if os.path.exists(dedup_index) else Deduplicator()
+    with store.writer(prefix=f'ecb-{source_type}') as writer:
+        for record in records:
+            # pages already stored by an earlier run or republished under another url are skipped
+            if dedup.canonical(record['url']) is None and \
+                    dedup.add(record['url'], record['text'], record['date'], record['title'],
+                              record['bank']).kind == 'unique':
+                writer.write(record)
+    dedup.save(dedup_index)
+    return store.read_pandas(columns=['date', 'title', 'url', 'text'], bank='ecb', source_type=source_type)
+
+
+def collect_speech_text(years: List[int], write_to_file: bool = False, workers: int = 4,
+                        engine: FetchEngine = None) -> pd.DataFrame:
+    return _collect(years, 'speech', write_to_file, workers, engine)
+
+
+def collect_bulletins(years: List[int], write_to_file: bool = False, workers: int = 4,
+                      engine: FetchEngine = None) -> pd.DataFrame:
+    return _collect(years, 'bulletin', write_to_file, workers, engine)
+
+
+if __name__ == '__main__':
+    # one engine for the whole run so connections, limits and metrics are shared
+    engine = ECB_Scraper(collection_years, cache_dir=cache_dir).engine
+    speeches = collect_speech_text(collection_years, True, 8, engine=engine)
+    bulletins = collect_bulletins(collection_years, True, 8, engine=engine)
+
+    print("Speeches shape:", speeches.shape)
+    print("Bulletins shape:", bulletins.shape)
+
+    engine.metrics.to_json("data/ecb_metrics.json")
+    engine.metrics.to_prometheus("data/ecb_metrics.prom")
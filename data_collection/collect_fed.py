@@ -1,9 +1,10 @@
 import os
 import sys 
+import argparse
+import datetime
 import numpy as np 
 import pandas as pd 
 from pathlib import Path 
-import pickle 
 from typing import List, Dict, Any
 
 # current file 
@@ -15,79 +16,121 @@ print(root)
 sys.path.append(str(root))
 
 from scraper_py.fed_scraper import FedScraper
+from scraper_py.fetch import FetchEngine
+from scraper_py.http_cache import HTTPCache
+from data_collection.corpus_store import CorpusStore, normalize_date
+from data_collection.raw_archive import RawArchive
+from data_collection.run_manifest import RunManifest, CheckpointedWriter
+from pipeline.dedup import Deduplicator
 
-# TODO: Specify years for collecting speeches
-collection_years = [int(i) for i in range(2025)]
-
-def collect_speech_text(years:List[int], write_to_file:bool =False, workers: int = 4) -> dict:
-    scraper = FedScraper(years)
-    speech_dict = scraper.get_speech_texts(workers= workers)
-    data = []
-    for year, speech in speech_dict.items():
-          for text in speech: 
-                data.append((year, text))
-    speech_df = pd.DataFrame(data=data)
-    
-    if write_to_file == True:
-            file_name = f"data/{years[0]}-{years[-1]}_speeches.pkl"
-            with open(file_name, 'wb') as file:
-                  pickle.dump(speech_df, file)
-            return speech_df
-    elif write_to_file == False:
-          return speech_dict
-
-
-def collect_policy_reports(years: List[int], write_to_file: bool = False) -> dict:
-      scraper = FedScraper(years)
-      testimony, reports = scraper.get_policy_texts()
+# the Fed's speech listings start in 1996
+collection_years = [int(i) for i in range(1996, datetime.date.today().year + 1)]
+# on-disk HTTP cache shared by every scraper run, so re-runs only revalidate
+cache_dir = "data/http_cache"
+# columnar corpus store written by every collection, see corpus_store.py
+corpus_dir = "data/corpus"
+# content hashes and MinHash signatures of every stored document, see pipeline/dedup.py
+dedup_index = "data/dedup_index.json"
+# zstd segments holding the raw HTML of every fetched page, see raw_archive.py
+archive_dir = "data/raw_archive"
+# completed years, speeches and reports of the current run, see run_manifest.py
+manifest_path = "data/fed_manifest.jsonl"
+# year -> speech links, only the current and unseen years are fetched again, see link_index.py
+link_index = "data/fed_link_index.json"
+
+def collect_speech_text(years:List[int], write_to_file:bool =False, workers: int = 4,
+                        engine: FetchEngine = None, manifest: RunManifest = None) -> dict:
+    if write_to_file == False:
+          scraper = FedScraper(years, engine=engine, cache_dir=cache_dir, link_index=link_index,
+                         archive=RawArchive(archive_dir))
+          return scraper.get_speech_texts(workers= workers)
+
+    # speeches are written in durable batches and recorded in the manifest, so
+    # a resumed run only fetches what is not stored yet
+    manifest = manifest or RunManifest(manifest_path)
+    years = [year for year in years if not manifest.is_done('year', year)]
+    scraper = FedScraper(years, engine=engine, cache_dir=cache_dir, link_index=link_index,
+                         archive=RawArchive(archive_dir))
+    store = CorpusStore(corpus_dir)
+    dedup = Deduplicator.load(dedup_index) if os.path.exists(dedup_index) else Deduplicator()
+    failed_years = set()
+    with CheckpointedWriter(store, manifest, 'fed-speech', kind='url',
+                            on_flush=lambda: dedup.save(dedup_index)) as writer:
+          for year, url, date, title, text in scraper.iter_speech_texts(workers= workers, skip_urls=manifest.done('url')):
+                if not date:
+                      # not marked done, so the page is fetched again on resume
+                      failed_years.add(year)
+                      continue
+                record = None
+                # pages republished under another url are linked, not stored. The
+                # title lets match_metadata find BIS copies before they are downloaded
+                if dedup.canonical(url) is None and dedup.add(url, text, date, title, 'fed').kind == 'unique':
+                      record = {'bank': 'fed', 'date': date, 'title': title, 'url': url,
+                                'source_type': 'speech', 'text': text}
+                writer.write(url, record)
+
+    # past years get no new speeches, the current one is revisited on every run
+    current_year = datetime.date.today().year
+    manifest.mark_done('year', [year for year in years if year < current_year and year not in failed_years])
+    return store.read_pandas(columns=['date', 'url', 'text'], bank='fed', source_type='speech')
 
-      # Initialize empty lists for both types of data
-      report_data = []
-      testimony_data = []
 
-      # Handle testimony data - checking if it's a list of tuples
-      if testimony:  # Check if testimony is not empty
-            for year, words in testimony:
-                  for report in words:
-                        testimony_data.append((year, report))
+def collect_policy_reports(years: List[int], write_to_file: bool = False,
+                           engine: FetchEngine = None, manifest: RunManifest = None) -> dict:
+      store = CorpusStore(corpus_dir)
+      manifest = manifest or RunManifest(manifest_path)
+      if write_to_file and manifest.is_done('job', 'policy'):
+            print('Policy reports were collected by the resumed run, reading them from the store')
+            testimony_df = store.read_pandas(columns=['date', 'text'], bank='fed', source_type='testimony')
+            report_df = store.read_pandas(columns=['date', 'text'], bank='fed', source_type='mpr')
+            return testimony_df.rename(columns={'date': 'year'}), report_df.rename(columns={'date': 'year'})
 
-      # Handle reports data
-      if reports:  # Check if reports is not empty
-            for year, report_list in reports.items():
-                  for report in report_list:
-                        report_data.append((year, report))
+      scraper = FedScraper(years, engine=engine, cache_dir=cache_dir, link_index=link_index,
+                         archive=RawArchive(archive_dir))
+      testimony, reports = scraper.get_policy_texts()
 
-      # Create DataFrames with column names
-      report_df = pd.DataFrame(data=report_data, columns=['year', 'text'])
-      testimony_df = pd.DataFrame(data=testimony_data, columns=['year', 'text'])
+      # one row per testimony and per report, keyed by date
+      testimony_df = pd.DataFrame(data=list(testimony.items()), columns=['year', 'text'])
+      report_df = pd.DataFrame(data=list(reports.items()), columns=['year', 'text'])
 
       if write_to_file:
-            # Create data directory if it doesn't exist
-            data_dir = Path("data")
-            data_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save reports
-            report_file = data_dir / f"{years[0]}-{years[-1]}_reports.pkl"
-            with open(report_file, 'wb') as file:
-                  pickle.dump(report_df, file)
-            
-            # Save testimony
-            testimony_file = data_dir / f"{years[0]}-{years[-1]}_testimony.pkl"
-            with open(testimony_file, 'wb') as file:
-                  pickle.dump(testimony_df, file)
-            
-            return testimony_df, report_df
-      else:
-            return testimony_df, report_df
+            # reports stored before an interrupted run crashed are already done
+            # in the manifest and skipped by the writer. The store only appends and a
+            # fresh run starts a new manifest, so reports any earlier run stored are
+            # skipped by their key in the store
+            stored = store.read(columns=['source_type', 'date'], bank='fed').to_pylist()
+            stored = {(row['source_type'], row['date']) for row in stored}
+            with CheckpointedWriter(store, manifest, 'fed-policy', kind='document') as writer:
+                  for source_type, documents in (('testimony', testimony), ('mpr', reports)):
+                        for date, text in documents.items():
+                              day = normalize_date(date)
+                              if day is not None and (source_type, day) in stored:
+                                    continue
+                              writer.write(f'{source_type}:{date}', {'bank': 'fed', 'date': date,
+                                                                     'source_type': source_type, 'text': text})
+            manifest.mark_done('job', ['policy'])
+
+      return testimony_df, report_df
 
 
 if __name__ == '__main__':
-      testimony_df, report_df = collect_policy_reports(collection_years, True)
-      speeches = collect_speech_text(collection_years, True, 8)
+      parser = argparse.ArgumentParser(description='Collect Federal Reserve speeches and policy reports')
+      parser.add_argument('--resume', action='store_true',
+                          help=f'Skip the units {manifest_path} records as done by an interrupted run')
+      args = parser.parse_args()
+
+      # one engine for the whole run so connections, limits and metrics are shared
+      engine = FetchEngine(cache=HTTPCache(cache_dir))
+      manifest = RunManifest(manifest_path, resume=args.resume)
+      testimony_df, report_df = collect_policy_reports(collection_years, True, engine=engine, manifest=manifest)
+      speeches = collect_speech_text(collection_years, True, 8, engine=engine, manifest=manifest)
       
       print("Speeches shape:", speeches.shape)
       print("Testimony shape:", testimony_df.shape)
       print("Reports shape:", report_df.shape)
+
+      engine.metrics.to_json("data/fed_metrics.json")
+      engine.metrics.to_prometheus("data/fed_metrics.prom")
       
 
 
@@ -0,0 +1,231 @@
+import os
+import re
+import uuid
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Stable schema of every document in the corpus
+SCHEMA = pa.schema([
+    ('bank', pa.string()),          # 'fed', 'ecb', 'bis'
+    ('date', pa.date32()),          # publication date, first of the period if only month/year is known
+    ('title', pa.string()),
+    ('url', pa.string()),
+    ('source_type', pa.string()),   # 'speech', 'testimony', 'mpr', 'bulletin', 'speech_pdf'
+    ('text', pa.string()),          # raw text as scraped or extracted
+    # sentences of the C++ cleaner, one per item, null for documents that were not cleaned;
+    # part files written before the column existed read it as null
+    ('sentences', pa.list_(pa.string())),
+])
+
+_DATE_FORMATS = ('%Y-%m-%d', '%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%Y-%m', '%Y')
+
+
+def normalize_date(value: Union[str, int, datetime.date, None]) -> Optional[datetime.date]:
+    """
+    Normalize the date formats used by the scrapers to a date.
+
+    Args:
+        value: '2024-01-10', '2024-01-10T00:00:00', 'January 10, 2024', '2024-01', 2024, ...
+
+    Returns:
+        datetime.date: The date, None if it could not be parsed
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    value = str(value).strip()
+    # drop a time part from ISO timestamps
+    value = re.sub(r'^(\d{4}-\d{2}-\d{2})[T ].*$', r'\1', value)
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class CorpusWriter:
+    """
+    Buffered writer of one Parquet part file of a CorpusStore. Records are
+    collected into row groups of row_group_size rows, sorted by date, so the
+    per-row-group date statistics let readers skip everything outside a
+    requested date range. The file is written under a temporary name and only
+    appears in the store once closed, so a crash never leaves a truncated part.
+    A staged writer closes to a .staged file that reads ignore until
+    CorpusStore.publish renames it.
+    """
+
+    def __init__(self, file_path: str, row_group_size: int = 1024, staged: bool = False):
+        self.file_path = file_path
+        self.tmp_path = file_path + '.tmp'
+        self.final_path = file_path + '.staged' if staged else file_path
+        self.row_group_size = row_group_size
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = None
+        self.num_rows = 0
+
+    def write(self, record: Dict[str, Any]):
+        """
+        Add one document.
+
+        Args:
+            record (dict): Fields of SCHEMA, missing fields are stored as null
+        """
+        row = {field: record.get(field) for field in SCHEMA.names}
+        row['date'] = normalize_date(row['date'])
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add many documents, returns the number added"""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def flush(self):
+        """Write the buffered documents as one row group"""
+        if not self._rows:
+            return
+        rows = sorted(self._rows, key=lambda row: (row['date'] is None, row['date'] or datetime.date.min))
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.tmp_path, SCHEMA, compression='zstd')
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.num_rows += len(rows)
+        self._rows = []
+
+    def close(self):
+        """Flush and finalize the part file"""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            with open(self.tmp_path, 'rb') as file:
+                os.fsync(file.fileno())
+            os.replace(self.tmp_path, self.final_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CorpusStore:
+    """
+    Columnar on-disk corpus of central bank documents. A store is a directory
+    of Parquet part files sharing SCHEMA; every writer adds a new part file, so
+    collection runs append without rewriting earlier data. Reads support column
+    projection, row-group pruning by date range and memory-mapped I/O, so
+    loading one year of text does not deserialize the whole corpus.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 1024):
+        """
+        Args:
+            path (str): Directory of the store, created if missing
+            row_group_size (int): Rows per row group of newly written part files
+        """
+        self.path = path
+        self.row_group_size = row_group_size
+        os.makedirs(self.path, exist_ok=True)
+
+    def writer(self, prefix: str = 'part', staged: bool = False) -> CorpusWriter:
+        """
+        Open a writer for a new part file.
+
+        Args:
+            prefix (str): File name prefix, e.g. the source of the documents
+            staged (bool): Keep the closed part out of reads until publish is called
+        """
+        stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        file_name = f'{prefix}-{stamp}-{uuid.uuid4().hex[:8]}.parquet'
+        return CorpusWriter(os.path.join(self.path, file_name), self.row_group_size, staged)
+
+    def staged_parts(self, prefix: str = '') -> List[str]:
+        """File names of the staged parts with a prefix, as they are named once published"""
+        return sorted(file[:-len('.staged')] for file in os.listdir(self.path)
+                      if file.startswith(prefix) and file.endswith('.parquet.staged'))
+
+    def publish(self, file_name: str):
+        """Make a staged part visible to reads"""
+        path = os.path.join(self.path, file_name)
+        os.replace(path + '.staged', path)
+
+    def discard(self, file_name: str):
+        """Delete a staged part that will never be published"""
+        os.remove(os.path.join(self.path, file_name) + '.staged')
+
+    def write_records(self, records: Iterable[Dict[str, Any]], prefix: str = 'part') -> int:
+        """Write documents to a new part file, returns the number written"""
+        with self.writer(prefix) as writer:
+            return writer.write_many(records)
+
+    def _filter(self, start=None, end=None, bank: str = None, source_type: str = None):
+        expression = None
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field('date') >= normalize_date(start))
+        if end is not None:
+            conditions.append(ds.field('date') <= normalize_date(end))
+        if bank is not None:
+            conditions.append(ds.field('bank') == bank)
+        if source_type is not None:
+            conditions.append(ds.field('source_type') == source_type)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _part_files(self) -> List[str]:
+        return sorted(os.path.join(self.path, file) for file in os.listdir(self.path)
+                      if file.endswith('.parquet'))
+
+    def read(self, columns: List[str] = None, start=None, end=None, bank: str = None,
+             source_type: str = None) -> pa.Table:
+        """
+        Read documents from the store.
+
+        Args:
+            columns (List[str]): Columns to load, all if None
+            start: First date to include, anything normalize_date accepts
+            end: Last date to include
+            bank (str): Only documents of this bank
+            source_type (str): Only documents of this source type
+
+        Returns:
+            pyarrow.Table: The matching documents
+        """
+        files = self._part_files()
+        if not files:
+            return SCHEMA.empty_table().select(columns or SCHEMA.names)
+        return pq.read_table(files, columns=columns, schema=SCHEMA, memory_map=True,
+                             filters=self._filter(start, end, bank, source_type))
+
+    def read_pandas(self, columns: List[str] = None, start=None, end=None, bank: str = None,
+                    source_type: str = None):
+        """Same as read, converted to a pandas DataFrame"""
+        return self.read(columns, start, end, bank, source_type).to_pandas()
+
+    def read_year(self, year: int, columns: List[str] = None, **kwargs) -> pa.Table:
+        """Read the documents of one calendar year"""
+        return self.read(columns, start=f'{year}-01-01', end=f'{year}-12-31', **kwargs)
+
+    def iter_batches(self, columns: List[str] = None, start=None, end=None, bank: str = None,
+                     source_type: str = None, batch_size: int = 1024) -> Iterator[pa.RecordBatch]:
+        """Stream matching documents in record batches without loading them all"""
+        files = self._part_files()
+        if not files:
+            return
+        dataset = ds.dataset(files, schema=SCHEMA, format='parquet')
+        yield from dataset.to_batches(columns=columns, batch_size=batch_size,
+                                      filter=self._filter(start, end, bank, source_type))
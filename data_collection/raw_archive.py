@@ -0,0 +1,429 @@
+import os
+import json
+import time
+import shutil
+import struct
+import tempfile
+import weakref
+import hashlib
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Every record in a segment is MAGIC, the length of its JSON header, the
+# header, the length of the payload frame and the zstd frame of the payload.
+# The headers make segments self-describing, so the index can be rebuilt from them.
+MAGIC = b'RAW1'
+_META_LEN = struct.Struct('<I')
+_FRAME_LEN = struct.Struct('<Q')
+# bytes read from a file at a time while it is hashed or compressed
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _sync_and_close(files: Dict[str, object]):
+    """fsync and close the open append handles of an archive"""
+    for file in files.values():
+        if not file.closed:
+            file.flush()
+            os.fsync(file.fileno())
+            file.close()
+    files.clear()
+
+
+class RawArchive:
+    """
+    Append-only archive of raw fetched documents (Fed/ECB HTML, BIS PDFs).
+    Payloads are compressed one zstd frame per document and appended to
+    segment files of at most max_segment_bytes, so tens of thousands of
+    documents live in a handful of files. An index keyed by URL and by content
+    hash gives the segment and offset of every payload, so get() is one seek
+    and one read, and scan() replays the archive sequentially at disk speed.
+    A payload already archived under another URL is stored only once.
+
+    put() is called from every fetch thread, so payloads are compressed before
+    the archive's lock is taken and only the append holds it. put_file()
+    streams a file through the compressor into a spool file and copies that
+    into the segment, so a large PDF is never held in memory. Appends are
+    fsynced every sync_every records and on sync() or close(); after a crash
+    the records of the last unsynced group may be missing, which only means
+    they are fetched again.
+    """
+
+    def __init__(self, path: str, max_segment_bytes: int = 256 * 1024 * 1024, level: int = 10,
+                 sync_every: int = 64):
+        """
+        Args:
+            path (str): Directory of the archive, created if missing
+            max_segment_bytes (int): Size from which a new segment file is started
+            level (int): zstd compression level
+            sync_every (int): Records appended between two fsyncs, 1 syncs every record
+        """
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is not installed, install it with: pip install zstandard")
+        self.path = path
+        self.max_segment_bytes = max_segment_bytes
+        self.index_path = os.path.join(path, 'index.jsonl')
+        self.level = level
+        self.sync_every = max(1, sync_every)
+        self._unsynced = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._by_url: Dict[str, Dict] = {}
+        self._by_hash: Dict[str, Dict] = {}
+        os.makedirs(path, exist_ok=True)
+        self.__load_index()
+        self.__recover()
+        segments = self._segments()
+        self._active = segments[-1] if segments else 0
+        self._active_size = os.path.getsize(self._segment_path(self._active)) if segments else 0
+        # append handles of the active segment and the index, kept open between puts
+        self._files: Dict[str, object] = {}
+        self._finalizer = weakref.finalize(self, _sync_and_close, self._files)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'segment-{segment:05d}.raw')
+
+    def _segments(self) -> List[int]:
+        return sorted(int(name[8:13]) for name in os.listdir(self.path)
+                      if name.startswith('segment-') and name.endswith('.raw'))
+
+    def _compressor(self):
+        # compression contexts are not thread-safe either
+        if not hasattr(self._local, 'compressor'):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor
+
+    def _decompressor(self):
+        # decompression contexts are not thread-safe, keep one per thread
+        if not hasattr(self._local, 'decompressor'):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor
+
+    def __add_to_index(self, record: Dict):
+        self._by_url[record['url']] = record
+        self._by_hash.setdefault(record['sha256'], record)
+
+    def __load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a torn last line from an interrupted run
+                    continue
+                self.__add_to_index(record)
+
+    def __append_index(self, records: List[Dict]):
+        with open(self.index_path, 'a', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def __read_records(self, segment: int, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+        """Parse the record headers of a segment from offset, yields (record, end offset)"""
+        size = os.path.getsize(self._segment_path(segment))
+        with open(self._segment_path(segment), 'rb') as file:
+            file.seek(offset)
+            while True:
+                head = file.read(len(MAGIC) + _META_LEN.size)
+                if len(head) < len(MAGIC) + _META_LEN.size or head[:len(MAGIC)] != MAGIC:
+                    return
+                meta = file.read(_META_LEN.unpack(head[len(MAGIC):])[0])
+                frame_len = file.read(_FRAME_LEN.size)
+                if len(frame_len) < _FRAME_LEN.size:
+                    return
+                try:
+                    record = json.loads(meta)
+                except ValueError:
+                    return
+                length = _FRAME_LEN.unpack(frame_len)[0]
+                if file.tell() + length > size:
+                    # the payload of the last record was not written completely
+                    return
+                record.update(segment=segment, offset=file.tell(), length=length)
+                file.seek(length, os.SEEK_CUR)
+                yield record, file.tell()
+
+    def __recover(self):
+        """
+        Drop index records whose payload never reached the disk, index records
+        appended after the last index write and drop a torn tail
+        """
+        segments = self._segments()
+        sizes = {segment: os.path.getsize(self._segment_path(segment)) for segment in segments}
+        lost = [url for url, record in self._by_url.items()
+                if record['offset'] + record['length'] > sizes.get(record['segment'], 0)]
+        if lost:
+            for url in lost:
+                del self._by_url[url]
+            self._by_hash = {}
+            for record in self._by_url.values():
+                self._by_hash.setdefault(record['sha256'], record)
+        if not segments:
+            return
+        last = segments[-1]
+        indexed_end = max((record['offset'] + record['length'] for record in self._by_url.values()
+                           if record['segment'] == last), default=0)
+        recovered = []
+        end = indexed_end
+        for record, record_end in self.__read_records(last, indexed_end):
+            recovered.append(record)
+            end = record_end
+        if recovered:
+            for record in recovered:
+                self.__add_to_index(record)
+            self.__append_index(recovered)
+        if os.path.getsize(self._segment_path(last)) > end:
+            with open(self._segment_path(last), 'r+b') as file:
+                file.truncate(end)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._by_url
+
+    def __len__(self) -> int:
+        return len(self._by_url)
+
+    def record(self, url: str) -> Optional[Dict]:
+        """Index record of a URL: sha256, size, content_type, meta, segment, offset, length, stored_at"""
+        return self._by_url.get(url)
+
+    def has_hash(self, sha256: str) -> bool:
+        return sha256 in self._by_hash
+
+    def put(self, url: str, payload: bytes, content_type: str = None, meta: Dict = None) -> Dict:
+        """
+        Archive a raw document.
+
+        Args:
+            url (str): URL the document was fetched from
+            payload (bytes): Raw body of the document
+            content_type (str): e.g. 'text/html' or 'application/pdf'
+            meta (dict): Extra JSON fields kept with the record, e.g. title and date
+
+        Returns:
+            dict: Index record of the document
+        """
+        sha256 = hashlib.sha256(payload).hexdigest()
+        existing = self._by_url.get(url)
+        if existing is not None and existing['sha256'] == sha256:
+            return existing
+        # compressed outside the lock so fetch threads only queue for the append
+        frame = None if sha256 in self._by_hash else self._compressor().compress(payload)
+        meta = {'url': url, 'sha256': sha256, 'size': len(payload),
+                'content_type': content_type, 'stored_at': time.time(), 'meta': meta or {}}
+        return self.__append(meta, frame, lambda: self._compressor().compress(payload))
+
+    def put_file(self, url: str, file_path: str, content_type: str = None, meta: Dict = None,
+                 sha256: str = None) -> Dict:
+        """
+        Archive a downloaded file without reading it into memory, see put.
+
+        Args:
+            sha256 (str): Hex digest of the file if known, e.g. from the download, saves a pass over it
+        """
+        if sha256 is None:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            sha256 = digest.hexdigest()
+        existing = self._by_url.get(url)
+        if existing is not None and existing['sha256'] == sha256:
+            return existing
+        size = os.path.getsize(file_path)
+        frame = None if sha256 in self._by_hash else self.__compress_file(file_path, size)
+        meta = {'url': url, 'sha256': sha256, 'size': size,
+                'content_type': content_type, 'stored_at': time.time(), 'meta': meta or {}}
+        try:
+            return self.__append(meta, frame, lambda: self.__compress_file(file_path, size))
+        finally:
+            if frame is not None:
+                frame.close()
+
+    def __compress_file(self, file_path: str, size: int):
+        """zstd frame of a file in a temporary spool file next to the segments"""
+        spool = tempfile.TemporaryFile(dir=self.path)
+        with open(file_path, 'rb') as file:
+            # the size goes into the frame header, which decompress() needs
+            with self._compressor().stream_writer(spool, size=size, closefd=False) as writer:
+                shutil.copyfileobj(file, writer, _CHUNK_SIZE)
+        return spool
+
+    def __append(self, meta: Dict, frame, compress: Callable) -> Dict:
+        """
+        Index a record under the lock and append its frame to the active segment,
+        unless the URL or the payload is already archived.
+
+        Args:
+            meta (dict): Header of the record
+            frame: Compressed payload as bytes or a spool file, None if the payload was archived
+            compress (Callable): Makes the frame if the payload is not archived anymore
+        """
+        url, sha256 = meta['url'], meta['sha256']
+        with self._lock:
+            existing = self._by_url.get(url)
+            if existing is not None and existing['sha256'] == sha256:
+                return existing
+            same_payload = self._by_hash.get(sha256)
+            if same_payload is not None:
+                # identical bytes under a new URL only get an index entry
+                record = {**meta, 'segment': same_payload['segment'],
+                          'offset': same_payload['offset'], 'length': same_payload['length']}
+            else:
+                spooled = frame is None
+                if spooled:
+                    # the payload was indexed when checked but is not anymore, e.g. after rebuild_index
+                    frame = compress()
+                try:
+                    if isinstance(frame, bytes):
+                        length = len(frame)
+                    else:
+                        length = frame.seek(0, os.SEEK_END)
+                        frame.seek(0)
+                    header = json.dumps(meta).encode('utf-8')
+                    if self._active_size >= self.max_segment_bytes:
+                        self.__sync_locked()
+                        self._active += 1
+                        self._active_size = 0
+                    segment = self._active
+                    file = self.__open('segment', self._segment_path(segment))
+                    file.write(MAGIC + _META_LEN.pack(len(header)) + header + _FRAME_LEN.pack(length))
+                    offset = file.tell()
+                    if isinstance(frame, bytes):
+                        file.write(frame)
+                    else:
+                        shutil.copyfileobj(frame, file, _CHUNK_SIZE)
+                    file.flush()
+                    self._active_size = file.tell()
+                finally:
+                    if spooled and not isinstance(frame, bytes):
+                        frame.close()
+                record = {**meta, 'segment': segment, 'offset': offset, 'length': length}
+
+            self.__add_to_index(record)
+            index = self.__open('index', self.index_path)
+            index.write(json.dumps(record) + '\n')
+            index.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self.__sync_locked()
+            return record
+
+    def __open(self, name: str, path: str):
+        """Append handle kept open between puts, reopened when the segment changes"""
+        file = self._files.get(name)
+        if file is None or file.name != path:
+            if file is not None:
+                file.flush()
+                os.fsync(file.fileno())
+                file.close()
+            file = open(path, 'ab') if name == 'segment' else open(path, 'a', encoding='utf-8')
+            self._files[name] = file
+        return file
+
+    def __sync_locked(self):
+        # the segment first, so a synced index entry never points at lost bytes
+        for name in ('segment', 'index'):
+            file = self._files.get(name)
+            if file is not None:
+                file.flush()
+                os.fsync(file.fileno())
+        self._unsynced = 0
+
+    def sync(self):
+        """Make every put so far durable"""
+        with self._lock:
+            self.__sync_locked()
+
+    def close(self):
+        """Sync and close the append handles, the archive can still be used afterwards"""
+        with self._lock:
+            _sync_and_close(self._files)
+            self._unsynced = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, record: Dict) -> bytes:
+        with open(self._segment_path(record['segment']), 'rb') as file:
+            file.seek(record['offset'])
+            frame = file.read(record['length'])
+        return self._decompressor().decompress(frame)
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Raw payload of a URL, None if it is not archived"""
+        record = self._by_url.get(url)
+        return self._read(record) if record is not None else None
+
+    def get_by_hash(self, sha256: str) -> Optional[bytes]:
+        """Raw payload with a content hash, None if it is not archived"""
+        record = self._by_hash.get(sha256)
+        return self._read(record) if record is not None else None
+
+    def scan(self, content_type: str = None) -> Iterator[Tuple[Dict, bytes]]:
+        """
+        Replay the archive in storage order, reading every segment front to back.
+
+        Args:
+            content_type (str): Only documents of this content type
+
+        Yields:
+            tuple: (index record, raw payload), once per URL
+        """
+        by_location: Dict[Tuple[int, int], List[Dict]] = {}
+        for record in self._by_url.values():
+            if content_type is None or record['content_type'] == content_type:
+                by_location.setdefault((record['segment'], record['offset']), []).append(record)
+
+        decompressor = self._decompressor()
+        current = None
+        file = None
+        try:
+            for segment, offset in sorted(by_location):
+                if segment != current:
+                    if file is not None:
+                        file.close()
+                    file = open(self._segment_path(segment), 'rb')
+                    current = segment
+                records = by_location[(segment, offset)]
+                file.seek(offset)
+                payload = decompressor.decompress(file.read(records[0]['length']))
+                for record in records:
+                    yield record, payload
+        finally:
+            if file is not None:
+                file.close()
+
+    def rebuild_index(self):
+        """
+        Rewrite the index from the segment headers, e.g. after the index file
+        was lost. URLs that only pointed at the identical payload of another
+        URL have no header of their own and are not restored.
+        """
+        with self._lock:
+            # the index file is replaced, so its append handle must not outlive it
+            _sync_and_close(self._files)
+            self._unsynced = 0
+            self._by_url = {}
+            self._by_hash = {}
+            records = []
+            for segment in self._segments():
+                for record, _ in self.__read_records(segment):
+                    records.append(record)
+                    self.__add_to_index(record)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                for record in records:
+                    file.write(json.dumps(record) + '\n')
+            os.replace(tmp_path, self.index_path)
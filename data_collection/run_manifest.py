@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from data_collection.corpus_store import CorpusStore
+
+
+class RunManifest:
+    """
+    Append-only record of the units a collection job has completed, such as
+    ('year', 2019), ('url', <speech url>) or ('document', <report date>). Each
+    mark_done call is one JSON line, fsynced before it returns, so a batch of
+    units and the part file holding them are recorded together or not at all
+    and a torn last line is ignored. After a crash the manifest lists exactly
+    the units whose results were made durable and a resumed run skips only those.
+    """
+
+    def __init__(self, path: str, resume: bool = True):
+        """
+        Args:
+            path (str): JSONL file of the manifest
+            resume (bool): Keep the units of an earlier run, a fresh run discards them
+        """
+        self.path = path
+        self._done: Dict[str, Set[str]] = {}
+        self._parts: Set[str] = set()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume:
+            self.__load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def __load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as file:
+            data = file.read()
+            if data and not data.endswith(b'\n'):
+                # cut a torn last line from an interrupted run, so the next line is not appended to it
+                file.truncate(data.rfind(b'\n') + 1)
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # manifests written before batches were one line hold one unit per line
+            keys = record['keys'] if 'keys' in record else [record['key']]
+            self._done.setdefault(record['kind'], set()).update(str(key) for key in keys)
+            if record.get('part'):
+                self._parts.add(record['part'])
+
+    def is_done(self, kind: str, key: Any) -> bool:
+        return str(key) in self._done.get(kind, ())
+
+    def done(self, kind: str) -> Set[str]:
+        """Keys of all completed units of a kind"""
+        return set(self._done.get(kind, ()))
+
+    def parts(self) -> Set[str]:
+        """File names of the part files recorded with completed units"""
+        return set(self._parts)
+
+    def mark_done(self, kind: str, keys: List[Any], **info):
+        """
+        Durably record completed units.
+
+        Args:
+            kind (str): Kind of the units, e.g. 'year', 'url' or 'document'
+            keys (List): Keys of the completed units
+            info: Extra fields stored with every unit, e.g. the part file holding them
+        """
+        if not keys:
+            return
+        line = json.dumps({'kind': kind, 'keys': list(keys), 'time': time.time(), **info}) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+            self._done.setdefault(kind, set()).update(str(key) for key in keys)
+            if info.get('part'):
+                self._parts.add(info['part'])
+
+
+class CheckpointedWriter:
+    """
+    Writes documents to a CorpusStore in durable batches. Every batch_size
+    documents become one staged part file, the manifest records the part with
+    their units in one line, and only then is the part published to reads, so
+    a crash loses at most the batch being filled. A staged part the manifest
+    knows is published when the next writer of the prefix opens, one it does
+    not know is discarded and its units are fetched again. Units the manifest
+    already has as done are skipped, so a resumed run that produces them again
+    does not store their documents twice. on_flush runs after the manifest
+    line, so after a crash there an index it saves can miss the last batch.
+    """
+
+    def __init__(self, store: CorpusStore, manifest: RunManifest, prefix: str, kind: str = 'url',
+                 batch_size: int = 100, on_flush: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            store (CorpusStore): Store the documents are written to
+            manifest (RunManifest): Manifest recording the written units
+            prefix (str): File name prefix of the part files
+            kind (str): Kind of the units in the manifest
+            batch_size (int): Documents per part file
+            on_flush (Callable): Called after each batch is durable, e.g. to save a dedup index
+        """
+        self.store = store
+        self.manifest = manifest
+        self.prefix = prefix
+        self.kind = kind
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self._records: List[Dict[str, Any]] = []
+        self._keys: List[Any] = []
+        self._pending: Set[str] = set()
+        self.num_rows = 0
+        self.num_skipped = 0
+        self.__recover()
+
+    def __recover(self):
+        """Finish the parts a crashed run staged, publishing those the manifest records"""
+        recorded = self.manifest.parts()
+        for file_name in self.store.staged_parts(self.prefix + '-'):
+            if file_name in recorded:
+                self.store.publish(file_name)
+            else:
+                print(f"Discarding {file_name}, its documents were never marked done")
+                self.store.discard(file_name)
+
+    def write(self, key: Any, record: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Add the result of one unit.
+
+        Args:
+            key: Key of the unit in the manifest
+            record (dict): Document to store, None marks the unit done without storing anything
+
+        Returns:
+            bool: False if the unit is already done or buffered and was skipped
+        """
+        if self.manifest.is_done(self.kind, key) or str(key) in self._pending:
+            self.num_skipped += 1
+            return False
+        self._pending.add(str(key))
+        if record is not None:
+            self._records.append(record)
+        self._keys.append(key)
+        if len(self._keys) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write the buffered documents as one part file and mark their units done"""
+        if not self._keys:
+            return
+        file_name = None
+        if self._records:
+            with self.store.writer(self.prefix, staged=True) as writer:
+                writer.write_many(self._records)
+            file_name = os.path.basename(writer.file_path)
+        self.manifest.mark_done(self.kind, self._keys, part=file_name)
+        if file_name is not None:
+            self.store.publish(file_name)
+            self.num_rows += writer.num_rows
+        if self.on_flush is not None:
+            self.on_flush()
+        self._records = []
+        self._keys = []
+        self._pending = set()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
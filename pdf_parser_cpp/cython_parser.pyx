@@ -6,9 +6,19 @@ from libcpp.vector cimport vector
 from libcpp cimport bool
 
 
+cdef extern from "text_normalize.hpp":
+    enum class Unicode_Mode:
+        Drop
+        Fold
+        Keep
+
 cdef extern from "text_extract.hpp": 
+    enum class Sentence_Split:
+        Scanner
+        Regex
+
     cdef cppclass Doc: 
-        Doc(const string& file_path)
+        Doc(const string& file_path, Unicode_Mode unicode, Sentence_Split split)
         int write_to_file() const 
         void show_text()
         void show_file()
@@ -19,15 +29,27 @@ cdef extern from "text_extract.hpp":
         int get_num_pages() const
         vector[string] get_sentences() const
 
+# Treatment of sentences with non-ASCII characters: 'drop' them, 'fold' them to
+# ASCII or drop them, or fold what has an ASCII form and 'keep' the rest
+UNICODE_MODES = {'drop': Unicode_Mode.Drop, 'fold': Unicode_Mode.Fold, 'keep': Unicode_Mode.Keep}
+
+# How pages are split into sentences: the single pass 'scanner', or the original
+# std::regex matching, which gives the same sentences and is kept to compare against
+SPLITS = {'scanner': Sentence_Split.Scanner, 'regex': Sentence_Split.Regex}
+
 # Wrapper class for pdf parser
 
 cdef class PDF_Text: 
     cdef Doc* _pdf 
     
-    def __cinit__(self, str file_name):
+    def __cinit__(self, str file_name, str unicode='drop', str split='scanner'):
        
+        if unicode not in UNICODE_MODES:
+            raise ValueError(f"unknown unicode mode {unicode!r}, expected one of {tuple(UNICODE_MODES)}")
+        if split not in SPLITS:
+            raise ValueError(f"unknown split {split!r}, expected one of {tuple(SPLITS)}")
         cdef string cpp_file = file_name.encode('utf-8')
-        self._pdf = new Doc(cpp_file)
+        self._pdf = new Doc(cpp_file, UNICODE_MODES[unicode], SPLITS[split])
 
     
     def __dealloc__(self):
@@ -40,7 +40,8 @@ extensions = [
         "cython_parser",
         sources=["cython_parser.pyx", "text_extract.cpp"],
         language="c++",
-        include_dirs=[numpy.get_include()] + include_dirs,
+        # text_normalize.hpp is shared with the sentence cleaner
+        include_dirs=[numpy.get_include(), "../text_cleaner_cpp"] + include_dirs,
         libraries=libs + ["pqxx", "pq"],
         extra_compile_args=["-std=c++17"],
         extra_link_args=["-std=c++17"]
@@ -7,22 +7,92 @@
 #include<regex>
 #include<stdexcept>
 #include<fstream> 
-#include <cctype>  // for isascii
 #include <pqxx/pqxx>
 
-bool is_ascii_only(const std::string& sentence) {
-    for (char c : sentence) {
-        if (!::isascii(static_cast<unsigned char>(c)))
-            return false;
-    }
-    return true;
-}
-
 using namespace std ; 
 string new_line = "\n";
 
+// characters ending a sentence 
+static inline bool is_terminal(char c){ 
+    return c == '.' || c == '!' || c == '?'; 
+} 
+
+// the characters \s matches in std::regex 
+static inline bool is_space(char c){ 
+    return c == ' ' || c == '\t' || c == '\n' || c == '\v' || c == '\f' || c == '\r'; 
+} 
+
+// Filters one trimmed sentence and appends it to text and sentences 
+static void add_sentence(std::string_view sentence, Unicode_Mode unicode, string& text, vector<string>& sentences){ 
+    std::string folded; 
+    if (!is_ascii(sentence)){ 
+        if (unicode == Unicode_Mode::Drop || !normalize_utf8(sentence, unicode, folded)){ 
+            return; 
+        } 
+        sentence = folded; 
+    } 
+    if (sentence.length() < 30){ 
+        return; 
+    } 
+    // skip sentences with parentheses 
+    if (sentence.find_first_of("()") != std::string_view::npos){ 
+        return; 
+    } 
+    string kept(sentence); 
+    size_t pos = kept.find(new_line); 
+    if (pos != std::string::npos){ 
+        kept.erase(pos, new_line.length()); 
+    } 
+    text += kept; 
+    text += " "; 
+    sentences.push_back(std::move(kept)); 
+} 
+
+void page_sentences(const std::string& raw, Unicode_Mode unicode, string& text, vector<string>& sentences){ 
+    const char* data = raw.data(); 
+    size_t n = raw.size(); 
+    size_t start = 0; 
+    while (start < n){ 
+        // a terminator without text in front of it is not a sentence 
+        while (start < n && is_terminal(data[start])){ 
+            start++; 
+        } 
+        size_t end = start; 
+        while (end < n && !is_terminal(data[end])){ 
+            end++; 
+        } 
+        // text after the last terminator is not a sentence either 
+        if (end == n){ 
+            break; 
+        } 
+        // the sentence ends in its terminator, so only the front needs trimming 
+        size_t first = start; 
+        while (is_space(data[first])){ 
+            first++; 
+        } 
+        add_sentence(std::string_view(data + first, end + 1 - first), unicode, text, sentences); 
+        start = end + 1; 
+    } 
+} 
+
+void page_sentences_regex(const std::string& raw, const std::regex& sentence_regex, Unicode_Mode unicode, 
+                          string& text, vector<string>& sentences){ 
+    sregex_iterator it(raw.begin(), raw.end(), sentence_regex); 
+    std::sregex_iterator end ; 
+
+    for (; it!= end; it++){ 
+        string curr = it->str(); 
+        // cleanup extra spaces 
+        string sentence = std::regex_replace(curr, std::regex("^\\s+|\\s+$"), ""); 
+        add_sentence(sentence, unicode, text, sentences); 
+    } 
+} 
+
 void Doc::extract_text(const std::string& file){
-    std::regex sentence_regex(R"(([^.!?]+[.!?]))"); // Match full sentences
+    std::regex sentence_regex; 
+    if (this->split == Sentence_Split::Regex){ 
+        sentence_regex.assign(R"(([^.!?]+[.!?]))"); // Match full sentences
+    } 
     
     std::unique_ptr<poppler::document> curr_doc(poppler::document::load_from_file(file)); 
 
@@ -40,40 +110,28 @@ void Doc::extract_text(const std::string& file){
         if(!page) {
             continue ; 
         }
-        auto bytes = page->text().to_utf8(); 
-        if (bytes.empty()){
+        // text() lays out the whole page, so it is called once and converted 
+        poppler::ustring page_text = page->text(); 
+        if (page_text.empty()){
             continue; 
         }
-        auto latin_bytes = page->text().to_latin1();  // store the result
-        std::string raw(latin_bytes.begin(), latin_bytes.end());  // now safe
-
-        sregex_iterator it(raw.begin(), raw.end(), sentence_regex); 
-        std::sregex_iterator end ; 
-
-        for (; it!= end; it++){
-            string curr = it->str(); 
-            // cleanup extra spaces 
-            string sentence = std::regex_replace(curr, std::regex("^\\s+|\\s+$"), "");
-
-            if (!is_ascii_only(sentence)){
-                continue ; 
-            }
-            if (sentence.length() < 30){
-                continue; 
-            }
-            if (sentence.find('(') != std::string::npos || sentence.find(')') != std::string::npos) {
-    continue;  // skip sentences with parentheses
-}
-            if(sentence.empty() == false){
-                size_t pos  = sentence.find(new_line);
-                if (pos != std::string::npos){
-                    sentence.erase(pos, new_line.length());
-                }
-                text += sentence; 
-                text += " "; 
-                this->sentences.push_back(sentence); 
-            }
+        // to_latin1 cuts every character to its low byte, so curly quotes and 
+        // dashes would turn into control characters, normalization needs the UTF-8 
+        std::string raw; 
+        if (this->unicode == Unicode_Mode::Drop){
+            raw = page_text.to_latin1(); 
+        }
+        else {
+            auto bytes = page_text.to_utf8(); 
+            raw.assign(bytes.begin(), bytes.end()); 
         }
+
+        if (this->split == Sentence_Split::Regex){ 
+            page_sentences_regex(raw, sentence_regex, this->unicode, text, this->sentences); 
+        } 
+        else { 
+            page_sentences(raw, this->unicode, text, this->sentences); 
+        } 
     }
     // filling out the fields of the class
     this->file_name = file; 
@@ -81,7 +139,7 @@ void Doc::extract_text(const std::string& file){
     this->num_pages = curr_doc->pages(); 
 }
 
-Doc::Doc(const string& file_name){
+Doc::Doc(const string& file_name, Unicode_Mode unicode, Sentence_Split split) : unicode(unicode), split(split){
     try {
         extract_text(file_name);
     }
@@ -6,6 +6,22 @@
 #include <vector>
 #include <map>
 #include<regex>
+#include "text_normalize.hpp"
+
+// How extract_text splits a page into sentences. Scanner is a single pass over 
+// the page, Regex is the original std::regex matching, kept to check and 
+// benchmark the scanner against. Both give the same sentences 
+enum class Sentence_Split { 
+    Scanner = 0, 
+    Regex = 1 
+}; 
+
+// Appends the sentences of one page to text, each followed by a space, and to 
+// sentences: runs of characters ending in '.', '!' or '?', trimmed, with at 
+// least 30 characters and no parentheses 
+void page_sentences(const std::string& raw, Unicode_Mode unicode, std::string& text, std::vector<std::string>& sentences); 
+void page_sentences_regex(const std::string& raw, const std::regex& sentence_regex, Unicode_Mode unicode, 
+                          std::string& text, std::vector<std::string>& sentences); 
 
 class Doc {
 
@@ -14,10 +30,14 @@ private:
     std::string file_text; 
     int num_pages ; 
     std::vector<std::string> sentences; 
+    Unicode_Mode unicode; 
+    Sentence_Split split; 
     
 
 public:
-    Doc(const std::string& file_name); // constructor 
+    // unicode decides what happens to sentences with non-ASCII characters, see text_normalize.hpp 
+    Doc(const std::string& file_name, Unicode_Mode unicode = Unicode_Mode::Drop, 
+        Sentence_Split split = Sentence_Split::Scanner); // constructor 
     int write_to_file () const; 
     void show_text() ; 
     void show_file () ; 
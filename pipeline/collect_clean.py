@@ -0,0 +1,289 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# project root for the scraper and store imports, text_cleaner_cpp for the Cython wrapper
+root = Path(__file__).resolve().parent.parent
+sys.path.append(str(root))
+sys.path.append(str(root / 'text_cleaner_cpp'))
+# the data directory the scrapers and vectorize share, whatever the working directory
+data_dir = root / 'data'
+
+from scraper_py.fetch import FetchEngine
+from scraper_py.http_cache import HTTPCache
+from scraper_py.fed_scraper import FedScraper
+from scraper_py.ecb_scraper import ECB_Scraper
+from data_collection.corpus_store import CorpusStore
+from pipeline.dedup import Deduplicator
+
+try:
+    from speech_clean_wrapper import PyBatchCleaner
+    CYTHON_AVAILABLE = True
+except ImportError:
+    CYTHON_AVAILABLE = False
+
+# marks the end of the stream on a stage's input queue, one per worker
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline: `workers` threads take documents from a bounded
+    input queue, apply func and pass the result on. func returns the document
+    for the next stage, or None to drop it.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                 workers: int = 1, queue_size: int = 64):
+        """
+        Args:
+            name (str): Name of the stage in the statistics
+            func (Callable): Applied to every document, must be thread-safe if workers > 1
+            workers (int): Number of threads running func
+            queue_size (int): Documents buffered in front of the stage
+        """
+        if workers < 1:
+            raise ValueError("a stage needs at least one worker")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.received = 0
+        self.passed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'received': self.received,
+            'passed': self.passed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 3),
+            # time spent waiting for room in the next stage's queue
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'queued': self.inbox.qsize(),
+        }
+
+
+class Pipeline:
+    """
+    Runs stages concurrently, connected by bounded queues. Documents flow
+    through one at a time, so the next stage starts on the first document while
+    the previous one is still working. A full queue blocks the stage feeding it,
+    which slows everything upstream down to the pace of the slowest stage, and
+    memory stays bounded by the sum of the queue sizes.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("a pipeline needs at least one stage")
+        self.stages = stages
+        self.source_errors = 0
+
+    def _put(self, stage: Stage, item, blocked_in: Stage = None):
+        start = time.perf_counter()
+        stage.inbox.put(item)
+        if blocked_in is not None:
+            with blocked_in._lock:
+                blocked_in.blocked_seconds += time.perf_counter() - start
+
+    def _run_source(self, source: Iterable[Dict[str, Any]]):
+        try:
+            for doc in source:
+                self._put(self.stages[0], doc)
+        except Exception as e:
+            print(f'Error in pipeline source: {e}')
+            self.source_errors += 1
+
+    def _run_worker(self, index: int):
+        stage = self.stages[index]
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            doc = stage.inbox.get()
+            if doc is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                result = stage.func(doc)
+                error = False
+            except Exception as e:
+                print(f'Error in stage {stage.name} for {doc.get("url")}: {e}')
+                result = None
+                error = True
+            with stage._lock:
+                stage.received += 1
+                stage.busy_seconds += time.perf_counter() - start
+                if error:
+                    stage.errors += 1
+                elif result is None:
+                    stage.dropped += 1
+                else:
+                    stage.passed += 1
+            if result is not None and following is not None:
+                self._put(following, result, blocked_in=stage)
+
+    def run(self, sources: List[Iterable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Stream the documents of every source through all stages.
+
+        Args:
+            sources (List[Iterable]): Iterables of documents, each drained by its own thread
+
+        Returns:
+            dict: Elapsed seconds and statistics of every stage
+        """
+        start = time.perf_counter()
+        feeders = [threading.Thread(target=self._run_source, args=(source,), daemon=True)
+                   for source in sources]
+        workers = [[threading.Thread(target=self._run_worker, args=(index,), daemon=True)
+                    for _ in range(stage.workers)] for index, stage in enumerate(self.stages)]
+        for thread in feeders + [thread for threads in workers for thread in threads]:
+            thread.start()
+
+        # shut down front to back: a stage is told to stop once everything
+        # feeding it has finished, so no document is left in a queue
+        for thread in feeders:
+            thread.join()
+        for stage, threads in zip(self.stages, workers):
+            for _ in threads:
+                stage.inbox.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        return {
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+            'source_errors': self.source_errors,
+            'stages': {stage.name: stage.stats() for stage in self.stages},
+        }
+
+
+def fed_speech_source(years: List[int], engine: FetchEngine, workers: int = 8) -> Iterator[Dict[str, Any]]:
+    """Federal Reserve speeches as corpus records, streamed as their pages are parsed"""
+    scraper = FedScraper(years, engine=engine)
+    for year, url, date, title, text in scraper.iter_speech_texts(workers=workers):
+        if date and text:
+            yield {'bank': 'fed', 'date': date, 'title': title, 'url': url, 'source_type': 'speech', 'text': text}
+
+
+def ecb_speech_source(years: List[int], engine: FetchEngine, workers: int = 8) -> Iterator[Dict[str, Any]]:
+    """ECB speeches as corpus records, streamed as their pages are parsed"""
+    scraper = ECB_Scraper(years, engine=engine)
+    links = scraper.get_speech_links() or {}
+    for title, url, date, text in scraper.iter_speech_texts(links, num_workers=workers):
+        yield {'bank': 'ecb', 'date': date, 'title': title, 'url': url, 'source_type': 'speech', 'text': text}
+
+
+def clean_stage(min_chars: int = 30, workers: int = 1,
+                unicode: str = 'fold') -> Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Split a document into sentences with the C++ cleaner. The sentences go to
+    the sentences column and text stays the raw text, so the store and the
+    dedup index hold the same kind of text as collect_fed.py and
+    collect_ecb.py write. Documents without sentences are dropped.
+    The cleaner releases the GIL and has one pool thread per stage worker, so
+    the stage's workers clean in parallel. Sentences with curly quotes, dashes,
+    accents or "€" are folded to ASCII instead of dropped, see unicode in
+    text_cleaner_cpp/README_CYTHON.md.
+    """
+    if not CYTHON_AVAILABLE:
+        raise RuntimeError("speech_clean_wrapper is not built, run: cd text_cleaner_cpp && ./build_cython.sh")
+    cleaner = PyBatchCleaner(min_chars, workers, unicode=unicode)
+
+    def clean(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        sentences = cleaner.clean([doc['text']])[0]
+        if not sentences:
+            return None
+        return {**doc, 'sentences': sentences}
+    return clean
+
+
+def dedup_stage(dedup: Deduplicator) -> Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Drop documents already stored or linked to a canonical record, see pipeline/dedup.py"""
+    def dedupe(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if dedup.canonical(doc['url']) is not None:
+            return None
+        if dedup.add(doc['url'], doc['text'], doc.get('date'), doc.get('title'), doc.get('bank')).kind != 'unique':
+            return None
+        return doc
+    return dedupe
+
+
+def store_stage(writer) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Append documents to a CorpusWriter, which is not thread-safe so the stage needs one worker"""
+    def store(doc: Dict[str, Any]) -> Dict[str, Any]:
+        writer.write(doc)
+        return doc
+    return store
+
+
+def run(years: List[int], sources: List[str] = ('fed', 'ecb'), scrape_workers: int = 8,
+        clean_workers: int = 2, queue_size: int = 64, min_chars: int = 30,
+        cache_dir: str = str(data_dir / 'http_cache'), corpus_dir: str = str(data_dir / 'corpus'),
+        dedup_index: str = str(data_dir / 'dedup_index.json'), unicode: str = 'fold') -> Dict[str, Any]:
+    """
+    Scrape, clean, dedupe and store speeches in one streaming run.
+
+    Args:
+        years (List[int]): Years to collect
+        sources (List[str]): 'fed' and/or 'ecb'
+        scrape_workers (int): Pages fetched concurrently per source
+        clean_workers (int): Threads of the cleaning stage
+        queue_size (int): Documents buffered in front of every stage
+        min_chars (int): Shortest sentence kept by the cleaner
+        cache_dir (str): Directory of the on-disk HTTP cache
+        corpus_dir (str): Directory of the corpus store
+        dedup_index (str): JSON file of the duplicate index, loaded and saved
+        unicode (str): 'fold', 'keep' or 'drop' sentences with non-ASCII characters
+
+    Returns:
+        dict: Statistics of the run, see Pipeline.run
+    """
+    source_funcs = {'fed': fed_speech_source, 'ecb': ecb_speech_source}
+    engine = FetchEngine(max_in_flight=scrape_workers * len(sources), cache=HTTPCache(cache_dir))
+    dedup = Deduplicator.load(dedup_index) if os.path.exists(dedup_index) else Deduplicator()
+    store = CorpusStore(corpus_dir)
+
+    with store.writer(prefix='pipeline') as writer:
+        pipeline = Pipeline([
+            Stage('clean', clean_stage(min_chars, clean_workers, unicode), clean_workers, queue_size),
+            Stage('dedupe', dedup_stage(dedup), 1, queue_size),
+            Stage('store', store_stage(writer), 1, queue_size),
+        ])
+        stats = pipeline.run([source_funcs[name](years, engine, scrape_workers) for name in sources])
+
+    dedup.save(dedup_index)
+    engine.close()
+    stats['documents_written'] = writer.num_rows
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming scrape -> clean -> dedupe -> store pipeline')
+    parser.add_argument('--years', type=int, nargs='+', required=True, help='Years to collect')
+    parser.add_argument('--sources', nargs='+', default=['fed', 'ecb'], choices=['fed', 'ecb'])
+    parser.add_argument('--scrape-workers', type=int, default=8, help='Pages fetched concurrently per source')
+    parser.add_argument('--clean-workers', type=int, default=2, help='Threads of the cleaning stage')
+    parser.add_argument('--queue-size', type=int, default=64, help='Documents buffered in front of every stage')
+    parser.add_argument('--min-chars', type=int, default=30, help='Shortest sentence kept by the cleaner')
+    parser.add_argument('--corpus-dir', default=str(data_dir / 'corpus'))
+    parser.add_argument('--dedup-index', default=str(data_dir / 'dedup_index.json'))
+    parser.add_argument('--unicode', default='fold', choices=['fold', 'keep', 'drop'],
+                        help='Fold, keep or drop sentences with non-ASCII characters')
+    args = parser.parse_args()
+
+    stats = run(args.years, args.sources, args.scrape_workers, args.clean_workers, args.queue_size,
+                args.min_chars, corpus_dir=args.corpus_dir, dedup_index=args.dedup_index,
+                unicode=args.unicode)
+    print(f"Wrote {stats['documents_written']} documents in {stats['elapsed_seconds']}s")
+    for name, values in stats['stages'].items():
+        print(f"  {name}: {values}")
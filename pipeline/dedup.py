@@ -0,0 +1,310 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from data_collection.corpus_store import normalize_date
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase a text and split it into alphanumeric tokens"""
+    return _TOKEN.findall(text.lower())
+
+
+def content_hash(text: str) -> str:
+    """
+    Exact fingerprint of a text, insensitive to case, punctuation and whitespace.
+
+    Returns:
+        str: sha256 hex digest of the normalized tokens
+    """
+    return hashlib.sha256(' '.join(normalize_text(text)).encode('utf-8')).hexdigest()
+
+
+class DedupResult(NamedTuple):
+    canonical_id: str       # id of the canonical record, the document's own id if unique
+    kind: str               # 'unique', 'exact' or 'near'
+    similarity: float       # estimated Jaccard similarity to the canonical record
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. Two signatures agree in a fraction
+    of positions that estimates the Jaccard similarity of the shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[str]:
+        tokens = normalize_text(text)
+        size = self.shingle_size
+        if len(tokens) <= size:
+            return {' '.join(tokens)} if tokens else set()
+        return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Returns:
+            np.ndarray: num_perm uint64 values, all max for an empty text
+        """
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # (a * h + b) mod p per permutation, the products wrap in uint64 as in datasketch
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=0)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+
+class Deduplicator:
+    """
+    Links republished documents to one canonical record. Every document is
+    fingerprinted with an exact content hash and a MinHash signature of its
+    shingles; an LSH index over signature bands finds near-duplicate candidates
+    without comparing against every document. Documents seen first become
+    canonical. Before a document's text is available (e.g. a BIS PDF that has
+    not been downloaded) it can be matched on date and title alone with
+    match_metadata, so duplicates skip downloading, parsing and embedding.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, title_threshold: float = 0.8, min_title_words: int = 3,
+                 seed: int = 1):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity from which texts are near-duplicates
+            num_perm (int): Length of the MinHash signatures
+            bands (int): Number of LSH bands, num_perm must be divisible by it
+            shingle_size (int): Words per shingle
+            title_threshold (float): Jaccard similarity of the title words from which same-day
+                documents of the same bank match, a "Speaker: " prefix as BIS titles have is ignored
+            min_title_words (int): Fewer title words than this never match, "Opening remarks"
+                says nothing about which speech it is
+            seed (int): Seed of the MinHash permutations, must be the same to reuse an index
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.title_threshold = title_threshold
+        self.min_title_words = min_title_words
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.seed = seed
+
+        self.records: Dict[str, Dict] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+        self._by_date: Dict[str, List[str]] = defaultdict(list)
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _title_words(self, title: Optional[str]) -> List[Set[str]]:
+        """Word sets of a title with and without a "Speaker: " prefix, the ones too short to match left out"""
+        variants = [title or '']
+        if ':' in variants[0]:
+            variants.append(variants[0].split(':', 1)[1])
+        words = [set(normalize_text(variant)) for variant in variants]
+        return [variant for variant in words if len(variant) >= self.min_title_words]
+
+    def _title_similarity(self, words: List[Set[str]], other: List[Set[str]]) -> float:
+        """Best Jaccard similarity between the word sets of two titles"""
+        return max((len(a & b) / len(a | b) for a in words for b in other), default=0.0)
+
+    @staticmethod
+    def _date_key(date) -> Optional[str]:
+        """ISO form of the date formats of the different sources"""
+        day = normalize_date(date)
+        return day.isoformat() if day else None
+
+    def add(self, doc_id: str, text: str, date: str = None, title: str = None,
+            bank: str = None) -> DedupResult:
+        """
+        Fingerprint a document and link it to its canonical record.
+
+        Args:
+            doc_id (str): Unique id of the document, e.g. its URL
+            text (str): Cleaned text of the document
+            date (str): Optional publication date for metadata matching
+            title (str): Optional title for metadata matching
+            bank (str): Bank of the document, metadata only matches documents of the same bank
+
+        Returns:
+            DedupResult: The canonical record of the document
+        """
+        digest = content_hash(text)
+        signature = self.hasher.signature(text)
+        date = self._date_key(date)
+
+        with self._lock:
+            if doc_id in self.records:
+                record = self.records[doc_id]
+                return DedupResult(record['canonical'], record['kind'], record['similarity'])
+
+            result = DedupResult(doc_id, 'unique', 1.0)
+            if digest in self._by_hash:
+                result = DedupResult(self._by_hash[digest], 'exact', 1.0)
+            else:
+                best = None
+                for key in self._band_keys(signature):
+                    for candidate in self._buckets.get(key, ()):
+                        similarity = MinHasher.similarity(signature, self._signatures[candidate])
+                        if similarity >= self.threshold and (best is None or similarity > best[1]):
+                            best = (candidate, similarity)
+                if best is not None:
+                    result = DedupResult(best[0], 'near', best[1])
+
+            self.records[doc_id] = {
+                'hash': digest,
+                'canonical': result.canonical_id,
+                'kind': result.kind,
+                'similarity': result.similarity,
+                'date': date,
+                'title': title,
+                'bank': bank,
+            }
+            # only canonical records are indexed, duplicates point at them
+            if result.kind == 'unique':
+                self._index(doc_id, digest, signature, date)
+            return result
+
+    def _index(self, doc_id: str, digest: str, signature: np.ndarray, date: Optional[str]):
+        self._by_hash[digest] = doc_id
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].append(doc_id)
+        if date:
+            self._by_date[date].append(doc_id)
+
+    def match_metadata(self, date: str, title: str, bank: str) -> Optional[str]:
+        """
+        Find a canonical record of the same bank published the same day with a similar title.
+
+        Args:
+            date (str): Publication date
+            title (str): Title, a "Speaker: " prefix is ignored
+            bank (str): Bank of the document, nothing matches if it is not known
+
+        Returns:
+            str: Id of the best matching canonical record, None if there is none
+        """
+        words = self._title_words(title)
+        date = self._date_key(date)
+        if not date or not words or not bank:
+            return None
+        best = None
+        with self._lock:
+            for candidate in self._by_date.get(date, ()):
+                record = self.records[candidate]
+                if record.get('bank') != bank:
+                    continue
+                similarity = self._title_similarity(words, self._title_words(record['title']))
+                if similarity >= self.title_threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+        return best[0] if best else None
+
+    def link(self, doc_id: str, canonical_id: str, date: str = None, title: str = None,
+             bank: str = None):
+        """Record a document as a duplicate found without its text, e.g. by match_metadata"""
+        date = self._date_key(date)
+        with self._lock:
+            self.records[doc_id] = {
+                'hash': None,
+                'canonical': canonical_id,
+                'kind': 'metadata',
+                'similarity': None,
+                'date': date,
+                'title': title,
+                'bank': bank,
+            }
+
+    def canonical(self, doc_id: str) -> Optional[str]:
+        """Get the canonical id of a document, None if it has not been seen"""
+        record = self.records.get(doc_id)
+        return record['canonical'] if record else None
+
+    def is_duplicate(self, doc_id: str) -> bool:
+        record = self.records.get(doc_id)
+        return record is not None and record['canonical'] != doc_id
+
+    def filter_unique(self, texts: Dict[str, str]) -> Dict[str, str]:
+        """
+        Keep only the documents that are their own canonical record.
+
+        Args:
+            texts (dict): doc_id -> text, documents not seen yet are added first
+
+        Returns:
+            dict: doc_id -> text of the unique documents
+        """
+        unique = {}
+        for doc_id, text in texts.items():
+            if doc_id not in self.records:
+                self.add(doc_id, text)
+            if not self.is_duplicate(doc_id):
+                unique[doc_id] = text
+        return unique
+
+    def save(self, file_name: str):
+        """Persist the index as JSON so later runs keep the same canonical records"""
+        with self._lock:
+            data = {
+                'config': {
+                    'threshold': self.threshold,
+                    'num_perm': self.hasher.num_perm,
+                    'bands': self.bands,
+                    'shingle_size': self.hasher.shingle_size,
+                    'title_threshold': self.title_threshold,
+                    'min_title_words': self.min_title_words,
+                    'seed': self.seed,
+                },
+                # a copy, documents added while the JSON is written must not change the dict
+                'records': dict(self.records),
+                'signatures': {doc_id: signature.tolist() for doc_id, signature in self._signatures.items()},
+            }
+        # written under a temporary name and renamed, so a crash mid-dump keeps the previous index
+        tmp_path = file_name + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_name)
+
+    @classmethod
+    def load(cls, file_name: str) -> 'Deduplicator':
+        """Load an index written by save"""
+        with open(file_name, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        dedup = cls(**data['config'])
+        dedup.records = data['records']
+        for doc_id, signature in data['signatures'].items():
+            record = dedup.records[doc_id]
+            dedup._index(doc_id, record['hash'], np.array(signature, dtype=np.uint64), record['date'])
+        return dedup
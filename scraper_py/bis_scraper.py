@@ -4,18 +4,66 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re as re 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any 
+from typing import List, Dict, Any, Iterator 
 from tqdm import tqdm 
 import time 
+import json
+import hashlib
+import threading
+from scraper_py.fetch import FetchEngine
+from scraper_py.http_cache import HTTPCache
+
+# deduplication, date filters and archiving need the pipeline and data_collection
+# packages, without them ScrapeBIS only downloads
+try:
+    from pipeline.dedup import Deduplicator
+    from data_collection.corpus_store import normalize_date
+    from data_collection.raw_archive import RawArchive
+    COLLECTION_AVAILABLE = True
+except ImportError:
+    COLLECTION_AVAILABLE = False
+
+# ijson parses the catalogue while it downloads, without it the whole file is loaded
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
 
 json_address = 'https://www.bis.org/api/document_lists/cbspeeches.json'
 
 class ScrapeBIS: 
-    def __init__(self, workers=4, dir="bis_data", use_codes={22, 24}):
+    def __init__(self, workers=4, dir="bis_data", use_codes={22, 24}, engine: FetchEngine = None,
+                 cache_dir: str = None, chunk_size: int = 64 * 1024, verify_hash: bool = False,
+                 dedup: 'Deduplicator' = None, start_date=None, end_date=None, streaming: bool = True,
+                 archive: 'RawArchive' = None, keep_files: bool = True, bank_codes: Dict[int, str] = None):
+        """
+        Args:
+            workers (int): Number of concurrent PDF downloads
+            dir (str): Directory under data/ the PDFs are saved to
+            use_codes (set): BIS institution codes of the documents to keep
+            engine (FetchEngine): Shared fetch engine, a new one is created if None
+            cache_dir (str): Directory of the on-disk HTTP cache for a newly created engine
+            chunk_size (int): Bytes held in memory at a time while downloading
+            verify_hash (bool): Check the sha256 of completed downloads before skipping them
+            dedup (Deduplicator): Index of collected documents, BIS copies of them are skipped
+            start_date: First publication date to keep, anything normalize_date accepts
+            end_date: Last publication date to keep
+            streaming (bool): Parse the catalogue incrementally with ijson and start
+                downloading while it is still being parsed
+            archive (RawArchive): Archive every downloaded PDF is added to, archived PDFs are skipped
+            keep_files (bool): Keep the loose PDF files next to the archive
+            bank_codes (dict): BIS institution code -> bank of the corpus, e.g. 'fed'. dedup only
+                links documents to ones of the same bank, so without a code's bank they are downloaded
+        """
+        if (start_date or end_date) and not COLLECTION_AVAILABLE:
+            raise RuntimeError("date filters need data_collection.corpus_store on the path")
         self.json_link = json_address
         self.use_codes = use_codes
         self.base_link = 'https://www.bis.org/' 
         self.num_workers = workers 
+        cache = HTTPCache(cache_dir) if cache_dir else None
+        self.engine = engine or FetchEngine(max_in_flight=workers, cache=cache)
         
         # Set up directory
         curr_dir = os.getcwd()
@@ -25,44 +73,150 @@ class ScrapeBIS:
         # Create directory if it doesn't exist
         os.makedirs(self.dir, exist_ok=True)
         print(f"Download directory: {self.dir}")
+
+        # Manifest of completed downloads, one JSON record per line
+        self.chunk_size = chunk_size
+        self.verify_hash = verify_hash
+        self.manifest_path = os.path.join(self.dir, 'manifest.jsonl')
+        self.manifest = self.__load_manifest()
+        self._manifest_lock = threading.Lock()
+
+        # documents already collected from the Fed and ECB sites, BIS copies of
+        # them are linked to the originals instead of being downloaded again
+        self.dedup = dedup
+        self.bank_codes = bank_codes or {}
+        self.num_duplicates = 0
+
+        self.start_date = normalize_date(start_date) if start_date else None
+        self.end_date = normalize_date(end_date) if end_date else None
+        self.streaming = streaming and IJSON_AVAILABLE
+
+        # PDFs in the archive are not downloaded again, without keep_files the
+        # archive replaces the directory of loose files
+        self.archive = archive
+        self.keep_files = keep_files or archive is None
+
+    def __load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest of completed downloads keyed by file name"""
+        manifest = {}
+        if not os.path.exists(self.manifest_path):
+            return manifest
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a torn last line from an interrupted run
+                    continue
+                manifest[record['file_name']] = record
+        return manifest
+
+    def __record_download(self, record: Dict[str, Any]):
+        """Append a completed download to the manifest"""
+        with self._manifest_lock:
+            self.manifest[record['file_name']] = record
+            with open(self.manifest_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+
+    def __is_complete(self, file_name: str, file_path: str) -> bool:
+        """Check a downloaded file against its manifest size and hash"""
+        record = self.manifest.get(file_name)
+        if record is None or not os.path.exists(file_path):
+            return False
+        if os.path.getsize(file_path) != record['size_bytes']:
+            return False
+        if self.verify_hash:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(self.chunk_size), b''):
+                    digest.update(chunk)
+            return digest.hexdigest() == record['sha256']
+        return True
         
     
+    def __match(self, path: str, info: Any) -> Dict[str, Any]:
+        """Turn a catalogue entry into a document, None if it is filtered out"""
+        # Check if info is not None and has required fields
+        if info is None or not isinstance(info, dict):
+            return None
+        # Check if this document has the institutions we want
+        institutions = info.get('institutions', [])
+        if not self.use_codes.intersection(institutions):
+            return None
+        date = info.get("publication_start_date", "no_date")
+        if self.start_date or self.end_date:
+            day = normalize_date(date)
+            if day is None or (self.start_date and day < self.start_date) or \
+                    (self.end_date and day > self.end_date):
+                return None
+        banks = [self.bank_codes[code] for code in institutions if code in self.bank_codes]
+        doc = {
+            'title': info.get('short_title', 'Untitled'),
+            "date": date,
+            "url": self.base_link + path + '.pdf',
+            "inst_ids": institutions,
+            "bank": banks[0] if banks else None,
+            "path": path
+        }
+        if self.__is_duplicate(doc):
+            return None
+        return doc
+
+    def iter_links(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the matching documents of the catalogue. With ijson the catalogue
+        is parsed entry by entry while it downloads (or from the HTTP cache), so
+        memory does not grow with its size and documents are yielded as soon as
+        they are parsed. Without it the whole catalogue is loaded first.
+
+        Yields:
+            dict: title, date, url, inst_ids, bank and path of every matching document
+        """
+        if not self.streaming:
+            data = self.engine.get(json_address).json()
+            # The data is nested under "list" key
+            if 'list' not in data:
+                print("Error: 'list' key not found in JSON response")
+                return
+            entries = data['list'].items()
+            for path, info in entries:
+                doc = self.__match(path, info)
+                if doc is not None:
+                    yield doc
+            return
+
+        # read ahead into a local spool, so the connection is drained at network
+        # speed even while the download threads hold up parsing
+        with self.engine.open_stream(json_address, read_ahead=True) as stream:
+            # the entries are nested under the "list" key
+            for path, info in ijson.kvitems(stream, 'list'):
+                doc = self.__match(path, info)
+                if doc is not None:
+                    yield doc
+
     def collect_links(self):
-        req = requests.get(json_address)
-        data = req.json()
-        
-        # The data is nested under "list" key
-        if 'list' not in data:
-            print("Error: 'list' key not found in JSON response")
-            return []
-            
-        list_data = data['list']
-        total_docs = []
-        
-        for path, info in list_data.items():
-            # Check if info is not None and has required fields
-            if info is not None and isinstance(info, dict):
-                # Check if this document has the institutions we want
-                institutions = info.get('institutions', [])
-                if self.use_codes.intersection(institutions):
-                    total_docs.append({
-                        'title': info.get('short_title', 'Untitled'),
-                        "date": info.get("publication_start_date", "no_date"),
-                        "url": self.base_link + path + '.pdf',
-                        "inst_ids": institutions,
-                        "path": path
-                    })
-        
+        total_docs = list(self.iter_links())
         print(f"Found {len(total_docs)} documents matching institution codes {self.use_codes}")
+        if self.num_duplicates:
+            print(f"Skipped {self.num_duplicates} documents already collected from another source")
         return total_docs
+
+    def __is_duplicate(self, doc: Dict[str, Any]) -> bool:
+        """Link a catalogue entry to an already collected document with the same date and title"""
+        if self.dedup is None:
+            return False
+        canonical = self.dedup.match_metadata(doc['date'], doc['title'], doc['bank'])
+        if canonical is None or canonical == doc['url']:
+            return False
+        self.dedup.link(doc['url'], canonical, doc['date'], doc['title'], doc['bank'])
+        self.num_duplicates += 1
+        return True
     
     def __pdf_download_helper(self, doc: Dict[str, Any]) -> Dict[str, Any]:
-        """Downloading a single pdf given a doc that includes the link"""
+        """Downloading a single pdf given a doc that includes the link.
+        Complete files are skipped, partial ones are resumed, and the body is
+        streamed to disk one chunk at a time."""
         try: 
-            time.sleep(0.2)
-            req = requests.get(doc['url'], timeout=10)
-            req.raise_for_status()
-
             title = doc['title'] or 'none'
             date = doc['date'] or 'no_date'
             
@@ -70,15 +224,48 @@ class ScrapeBIS:
             safe_title = safe_title[:100] 
             file_name = f'{safe_title}-{date}.pdf'
             file_path = os.path.join(self.dir, file_name)
-            
-            with open(file_path, 'wb') as file: 
-                file.write(req.content)
+
+            if self.archive is not None and doc['url'] in self.archive:
+                return {
+                    **doc,
+                    'file_name': file_name,
+                    'file_path': file_path if os.path.exists(file_path) else '',
+                    'size_bytes': self.archive.record(doc['url'])['size'],
+                    'status': 'skipped'
+                }
+
+            if self.__is_complete(file_name, file_path):
+                return {
+                    **doc,
+                    'file_name': file_name,
+                    'file_path': file_path,
+                    'size_bytes': self.manifest[file_name]['size_bytes'],
+                    'status': 'skipped'
+                }
+
+            size, sha256 = self.engine.download(doc['url'], file_path, self.chunk_size)
+            self.__record_download({
+                'file_name': file_name,
+                'url': doc['url'],
+                'title': doc['title'],
+                'date': doc['date'],
+                'bank': doc['bank'],
+                'size_bytes': size,
+                'sha256': sha256
+            })
+            if self.archive is not None:
+                self.archive.put_file(doc['url'], file_path, 'application/pdf',
+                                      {'title': doc['title'], 'date': doc['date'], 'bank': doc['bank'],
+                                       'file_name': file_name}, sha256)
+                if not self.keep_files:
+                    os.remove(file_path)
+                    file_path = ''
             
             return {
                 **doc,
                 'file_name': file_name,
                 'file_path': file_path,
-                'size_bytes': len(req.content),
+                'size_bytes': size,
                 'status': 'success'
             }
         except Exception as e: 
@@ -91,38 +278,31 @@ class ScrapeBIS:
             }
 
     def download_pdfs(self):
-        """Download all PDFs using threading"""
-        links = self.collect_links()
-        if not links:
-            print("No documents found to download!")
-            return []
-            
-        print(f'Found {len(links)} files to download')
+        """Download all PDFs using threading. Documents are handed to the download
+        threads as the catalogue is parsed, with at most workers downloads in flight."""
         result = []
-        
-        with ThreadPoolExecutor(max_workers=self.num_workers) as pool: 
-            future_doc = {
-                pool.submit(self.__pdf_download_helper, doc): doc for doc in links 
-            }
-            
-            with tqdm(total=len(links), desc='Download PDFs') as progress: 
-                for future in as_completed(future_doc):
-                    curr_result = future.result()
-                    result.append(curr_result)
-                    progress.update(1)
-                    
-                    num_success = sum(1 for r in result if r['status'] == 'success')
-                    progress.set_description(f'Downloaded: {num_success}/{len(result)}')
-        
+        with tqdm(desc='Download PDFs') as progress:
+            for doc, curr_result in self.engine.imap(self.__pdf_download_helper, self.iter_links(),
+                                                     self.num_workers):
+                result.append(curr_result)
+                progress.update(1)
+                
+                num_success = sum(1 for r in result if r['status'] in ('success', 'skipped'))
+                progress.set_description(f'Downloaded: {num_success}/{len(result)}')
+
+        if not result:
+            print("No documents found to download!")
         return result
                 
                     
 if __name__ == "__main__":
-    scraper = ScrapeBIS(workers=4)
+    # the PDFs are also kept in the raw archive next to data/bis_data
+    archive = RawArchive(os.path.join(os.path.dirname(os.getcwd()), 'data', 'raw_archive')) if COLLECTION_AVAILABLE else None
+    scraper = ScrapeBIS(workers=4, archive=archive)
     results = scraper.download_pdfs()
     
     # Print summary
-    successful = sum(1 for r in results if r['status'] == 'success')
+    successful = sum(1 for r in results if r['status'] in ('success', 'skipped'))
     print(f"\nDownloaded {successful}/{len(results)} PDFs successfully")
 
     
@@ -5,22 +5,49 @@ from urllib.parse import urljoin
 import re as re 
 import threading 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from typing import Iterator, List, Tuple
 from tqdm import tqdm
-from selenium import webdriver
-from selenium.webdriver import Chrome 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
+from scraper_py.fetch import FetchEngine
+from scraper_py.http_cache import HTTPCache
+from scraper_py.extract import parse_ecb_section
+
+# Selenium is only needed for the browser fallback of the speech listing
+try:
+    from selenium import webdriver
+    from selenium.webdriver import Chrome 
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
 SPEECH_URL = "https://www.ecb.europa.eu/press/pubbydate/html/index.en.html?name_of_publication=Speech"
 BULLETIN_URL = 'https://www.ecb.europa.eu/press/economic-bulletin/articles/html/index.en.html'
+# Plain per-year HTML fragments behind the lazy-loaded listing pages
+SPEECH_INCLUDE_URL = 'https://www.ecb.europa.eu/press/key/date/{}/html/index_include.en.html'
+BULLETIN_INCLUDE_URL = 'https://www.ecb.europa.eu/press/economic-bulletin/articles/{}/html/index_include.en.html'
 
 class ECB_Scraper : 
-    def __init__(self, years: List[int], scroll_num=None):
+    def __init__(self, years: List[int], scroll_num=None, engine: FetchEngine = None, cache_dir: str = None,
+                 listing_mode: str = 'fragments', archive: 'RawArchive' = None):
+        """
+        Args:
+            years (List[int]): Years to list speeches for
+            scroll_num (int): Number of scrolls for the Selenium listing, None scrolls to the end
+            engine (FetchEngine): Shared fetch engine, a new one is created if None
+            cache_dir (str): Directory of the on-disk HTTP cache for a newly created engine
+            listing_mode (str): 'fragments' fetches the per-year index_include pages and only
+                falls back to Selenium if they yield nothing, 'selenium' always uses the browser
+            archive (RawArchive): Archive the raw HTML of every speech and article page is kept in
+        """
+        if listing_mode not in ('fragments', 'selenium'):
+            raise ValueError("listing_mode must be 'fragments' or 'selenium'")
         self.base_url = "https://www.ecb.europa.eu"
         self.speech_url = SPEECH_URL
         self.years = years
+        self.listing_mode = listing_mode
         self.driver = None 
         self.curr_page = 0 
         self.scroll_num = scroll_num 
@@ -30,8 +57,14 @@ class ECB_Scraper :
             'Accept-Language': 'en-US,en;q=0.5',
             'Connection': 'keep-alive',
         }
+        cache = HTTPCache(cache_dir) if cache_dir else None
+        self.engine = engine or FetchEngine(headers=self.headers, cache=cache)
+        self.archive = archive
 
     def __get_speech_page(self, scroll_num = None, link = None):
+        if not SELENIUM_AVAILABLE:
+            print('selenium is not installed, cannot load the listing page in a browser')
+            return None
         if not self.driver: 
             self.driver = Chrome()
         url = self.speech_url
@@ -82,7 +115,35 @@ class ECB_Scraper :
         finally:
             self.driver.quit()
 
+    def __parse_listing(self, page: str) -> dict:
+        """Extract title -> url pairs from a listing page or fragment"""
+        links = {}
+        soup = BeautifulSoup(page, 'lxml')
+        for container in soup.select("div.title"):
+            anchor = container.select_one("a[href]")
+            if anchor is None:
+                continue
+            links[container.text.strip()] = urljoin(self.base_url, anchor["href"])
+        return links
+
+    def __get_listing_links(self, url_template: str, years: List[int]) -> dict:
+        """Fetch the per-year listing fragments concurrently and merge their links"""
+        urls = [url_template.format(year) for year in years]
+        links = {}
+        for url, req in self.engine.fetch_many(urls).items():
+            if req is None or req.status_code != 200:
+                print(f'no listing fragment found for {url}')
+                continue
+            links.update(self.__parse_listing(req.text))
+        return links
+
     def get_speech_links(self ):
+        if self.listing_mode == 'fragments':
+            speeches = self.__get_listing_links(SPEECH_INCLUDE_URL, self.years)
+            if speeches:
+                return speeches
+            print('listing fragments returned no speeches, falling back to selenium')
+
         # getting the page source 
         page = self.__get_speech_page(self.scroll_num)
         print(page)
@@ -100,6 +161,35 @@ class ECB_Scraper :
             speeches[title] = urljoin(self.base_url, href) 
         return speeches 
 
+    def __link_date(self, link: str) -> str:
+        """Extract the year of a speech or bulletin article from its URL"""
+        date_match = re.search(r'/date/(\d{4})/', link) or re.search(r'/articles/(\d{4})/', link)
+        return date_match.group(1)
+
+    def __link_day(self, link: str) -> str:
+        """Most precise date encoded in a speech (sp240110) or bulletin (ebart202401) URL"""
+        speech_match = re.search(r'\.sp(\d{2})(\d{2})(\d{2})', link)
+        if speech_match:
+            return '20{}-{}-{}'.format(*speech_match.groups())
+        article_match = re.search(r'\.ebart(\d{4})(\d{2})', link)
+        if article_match:
+            return '{}-{}'.format(*article_match.groups())
+        return self.__link_date(link)
+
+    def __get_page(self, link: str):
+        """Fetch a speech or article page, keeping its raw HTML in the archive"""
+        req = self.engine.get(link)
+        if self.archive is not None and req.status_code == 200:
+            self.archive.put(link, req.content, 'text/html')
+        return req
+
+    def __fetch_body(self, link: str) -> str:
+        """Fetch the raw page of a speech for the process parse tier"""
+        req = self.__get_page(link)
+        if req.status_code != 200:
+            raise ValueError(f'status code {req.status_code}')
+        return req.text
+
     def thread_parse(self, link: str) -> tuple:
         """Parse a single speech page."""
         # Skip PDFs
@@ -107,53 +197,71 @@ class ECB_Scraper :
             return None, None
             
         try:
-            req = requests.get(link, headers=self.headers)
+            req = self.__get_page(link)
             if req.status_code != 200:
                 print(f'Failed to get page for {link}: status code {req.status_code}')
                 return None, None
                 
-            soup = BeautifulSoup(req.text, 'lxml')
-            
-            # Extract date from URL
-            date_match = re.search(r'/date/(\d{4})/', link)
-            if not date_match:
-                # Find the main content
-                date_match = re.search(r'/articles/(\d{4})/', link)
-                date = date_match.group(1)
-                print(date)
-                content = ""
-                
-                # Try different content selectors
-                section = soup.select('div.section > p')
-                print(section)
-                
-            
-                for text in section:
-                    content += text.get_text(strip=True)
-                return  date, content
-            else: 
-                
-                date = date_match.group(1)
-                
-                # Find the main content
-                content = ""
-                
-                # Try different content selectors
-                section = soup.select('div.section > p')
-                print(section)
-                
-            
-                for text in section:
-                    content += text.get_text(strip=True)
-                return date, content
+            date = self.__link_date(link)
+
+            # only the div.section paragraphs are read, see scraper_py/extract.py
+            with self.engine.metrics.time_parse(link):
+                content = parse_ecb_section(req.text)
+            return date, content
             
         except Exception as e:
             print(f'Error parsing {link}: {str(e)}')
             return None, None
 
-    def get_speech_text(self, links: dict, num_workers: int = 4) -> dict:
-        """Get text content from speech links using multiple threads."""
+    def __fetch_record(self, link: str) -> str:
+        """Fetch and parse a single page, raising on errors for iter_speech_texts"""
+        page = self.__fetch_body(link)
+        with self.engine.metrics.time_parse(link):
+            return parse_ecb_section(page)
+
+    def iter_speech_texts(self, links: dict, num_workers: int = 4, parse_workers: int = 0,
+                          queue_size: int = None) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        Stream the text of speech or bulletin links as their pages are parsed,
+        with at most num_workers pages in flight.
+
+        Args:
+            links (dict): title -> url, as returned by get_speech_links
+            num_workers (int): Upper bound of pages fetched concurrently
+            parse_workers (int): Number of parse processes, 0 parses in the download threads
+            queue_size (int): Pages buffered between the tiers, defaults to 2 * parse_workers
+
+        Yields:
+            tuple: (title, url, date, text) of every page with text, the date is
+            as precise as the URL allows
+        """
+        titles = {url: title for title, url in links.items() if not url.endswith('.pdf')}
+        if parse_workers:
+            parsed = self.engine.imap_parse(self.__fetch_body, parse_ecb_section, list(titles),
+                                            parse_workers, num_workers, queue_size)
+        else:
+            parsed = self.engine.imap(self.__fetch_record, list(titles), num_workers)
+        for url, content in parsed:
+            if isinstance(content, Exception):
+                print(f'Error parsing {url}: {str(content)}')
+                continue
+            if content:
+                yield titles[url], url, self.__link_day(url), content
+
+    def get_speech_text(self, links: dict, num_workers: int = 4, parse_workers: int = 0,
+                        queue_size: int = None) -> dict:
+        """Get text content from speech links using multiple threads.
+        num_workers is an upper bound, the engine's per-host rate limiter adapts
+        the actual concurrency below it. With parse_workers > 0 the threads only
+        download pages and a pool of parse_workers processes parses them, with at
+        most queue_size pages buffered in between."""
         results = {}
+
+        if parse_workers:
+            parsed = self.iter_speech_texts(links, num_workers, parse_workers, queue_size)
+            for title, url, date, content in tqdm(parsed, desc="Scraper Results"):
+                results.setdefault(self.__link_date(url), []).append(content)
+            return results
         
         with ThreadPoolExecutor(max_workers=num_workers) as executor:
             futures = []
@@ -171,36 +279,7 @@ class ECB_Scraper :
         return results
     
     def get_econ_bulletin_links(self, years: List[int]): 
-        link_types = 'https://www.ecb.europa.eu/press/economic-bulletin/articles/{}/html/index_include.en.html'
-        all_links = []
-        for year in years : 
-            link = link_types.format(year)
-            all_links.append(link)
-            print(link)
-        
-        links ={}
-        
-        for url in all_links :
-            req = requests.get(url, headers=self.headers)
-        
-            soup = BeautifulSoup(req.text, 'lxml')
-            link_elements = soup.select("div.title")
-            print(link_elements[0])
-
-            
-            
-            for container in link_elements : 
-                try:    
-                    title = container.text.strip()
-                    link = container.select_one("a")["href"]
-                  
-                    links[title] = urljoin(self.base_url, link)
-                    print(urljoin(self.base_url, link))
-
-                except Exception as e: 
-                    print(f'Could not find link for speech')
-                    continue
-        return links 
+        return self.__get_listing_links(BULLETIN_INCLUDE_URL, years)
     
     def get_buletin_texts(self, links): 
         return self.get_speech_text(links)
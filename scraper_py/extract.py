@@ -0,0 +1,101 @@
+from lxml import etree, html
+from typing import Optional, Tuple, Union
+
+# Compiled selectors for the few nodes the scrapers read. BeautifulSoup's
+# class_= lookups match the exact class attribute, the article__time and
+# section lookups match one class among several.
+_FED_CONTENT = etree.XPath("(//*[@class='col-xs-12 col-sm-8 col-md-8'])[1]")
+_FED_DATE = etree.XPath("(//p[contains(concat(' ', normalize-space(@class), ' '), ' article__time ')])[1]")
+_FED_TITLE = etree.XPath("(//h3[contains(concat(' ', normalize-space(@class), ' '), ' title ')])[1]")
+_PARAGRAPHS = etree.XPath(".//p")
+_ECB_SECTION_PARAGRAPHS = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' section ')]/p")
+
+
+def _parse(page: Union[bytes, str]):
+    """Parse a page into an lxml tree, None if the page is empty or unparsable"""
+    if not page:
+        return None
+    try:
+        return html.fromstring(page)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _stripped_text(element) -> str:
+    """Same result as BeautifulSoup's get_text(strip=True)"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def parse_fed_speech_record(page: Union[bytes, str]) -> Optional[Tuple[str, str, str]]:
+    """
+    Extract the date, title and text of a Federal Reserve speech from its page.
+
+    Args:
+        page (bytes): Raw HTML of the speech page
+
+    Returns:
+        tuple: (date, title, concatenated paragraphs), None if the page has no
+        date or content container. The title is an empty string if the page has none
+    """
+    tree = _parse(page)
+    if tree is None:
+        return None
+    content = _FED_CONTENT(tree)
+    date = _FED_DATE(tree)
+    if not content or not date:
+        return None
+    title = _FED_TITLE(tree)
+    # the title is matched against BIS catalogue titles, so whitespace between its inline tags is kept
+    title = ' '.join(title[0].text_content().split()) if title else ''
+    paras = [_stripped_text(para) for para in _PARAGRAPHS(content[0])]
+    return _stripped_text(date[0]), title, ''.join(paras)
+
+
+def parse_fed_speech_parts(page: Union[bytes, str]) -> Optional[Tuple[str, str]]:
+    """
+    Extract the date and text of a Federal Reserve speech from its page.
+
+    Args:
+        page (bytes): Raw HTML of the speech page
+
+    Returns:
+        tuple: (date, concatenated paragraphs), None if the page has no date or
+        content container
+    """
+    record = parse_fed_speech_record(page)
+    if record is None:
+        return None
+    return record[0], record[2]
+
+
+def parse_fed_speech(page: Union[bytes, str]) -> str:
+    """
+    Extract a Federal Reserve speech from its page.
+
+    Args:
+        page (bytes): Raw HTML of the speech page
+
+    Returns:
+        str: Date line followed by the concatenated paragraphs, empty string if the
+        page has no date or content container
+    """
+    parts = parse_fed_speech_parts(page)
+    if parts is None:
+        return ""
+    return parts[0] + "\n" + parts[1]
+
+
+def parse_ecb_section(page: Union[bytes, str]) -> str:
+    """
+    Extract the text of an ECB speech or bulletin article from its page.
+
+    Args:
+        page (bytes): Raw HTML of the page
+
+    Returns:
+        str: Concatenated paragraphs of the div.section containers
+    """
+    tree = _parse(page)
+    if tree is None:
+        return ""
+    return ''.join(_stripped_text(para) for para in _ECB_SECTION_PARAGRAPHS(tree))
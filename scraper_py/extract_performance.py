@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Performance comparison: full BeautifulSoup parsing vs targeted lxml XPath
+extraction of Fed and ECB speech pages, measured on saved sample pages.
+
+Save sample pages once, then benchmark them offline:
+
+    python extract_performance.py --save 50 --pages sample_pages
+    python extract_performance.py --pages sample_pages
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from scraper_py.extract import parse_fed_speech, parse_ecb_section
+
+
+def soup_fed_speech(page: str) -> str:
+    """The original FedScraper.thread_parse extraction"""
+    try:
+        soup = BeautifulSoup(page, 'lxml')
+        text_tag = soup.find(class_='col-xs-12 col-sm-8 col-md-8')
+        date_tag = soup.find('p', class_='article__time')
+        date = date_tag.get_text(strip=True)
+        text = text_tag.find_all('p')
+        speech: str = date + "\n"
+        for para in text:
+            speech += para.get_text(strip=True)
+        return speech
+    except AttributeError:
+        return ""
+
+
+def soup_ecb_section(page: str) -> str:
+    """The original ECB_Scraper.thread_parse extraction"""
+    soup = BeautifulSoup(page, 'lxml')
+    content = ""
+    for text in soup.select('div.section > p'):
+        content += text.get_text(strip=True)
+    return content
+
+
+IMPLEMENTATIONS = {
+    'fed': (soup_fed_speech, parse_fed_speech),
+    'ecb': (soup_ecb_section, parse_ecb_section),
+}
+
+
+def save_sample_pages(directory: str, count: int, year: int):
+    """Download count Fed and ECB speech pages of a year into directory"""
+    from scraper_py.fed_scraper import FedScraper
+    from scraper_py.ecb_scraper import ECB_Scraper
+
+    os.makedirs(directory, exist_ok=True)
+    fed = FedScraper([year])
+    fed_links = fed.get_speech_links().get(year, [])[:count]
+    ecb = ECB_Scraper([year])
+    ecb_links = [link for link in ecb.get_speech_links().values()
+                 if not link.endswith('.pdf')][:count]
+
+    for source, engine, links in (('fed', fed.engine, fed_links), ('ecb', ecb.engine, ecb_links)):
+        for i, (link, req) in enumerate(engine.fetch_many(links).items()):
+            if req is None or req.status_code != 200:
+                continue
+            with open(os.path.join(directory, f'{source}_{i:04d}.html'), 'w', encoding='utf-8') as file:
+                file.write(req.text)
+    print(f'Saved {len(fed_links)} Fed and {len(ecb_links)} ECB pages to {directory}')
+
+
+def load_sample_pages(directory: str) -> Dict[str, List[str]]:
+    """Load saved pages grouped by source prefix"""
+    pages = {source: [] for source in IMPLEMENTATIONS}
+    for file in sorted(os.listdir(directory)):
+        source = file.split('_', 1)[0]
+        if source in pages and file.endswith('.html'):
+            with open(os.path.join(directory, file), 'r', encoding='utf-8') as handle:
+                pages[source].append(handle.read())
+    return pages
+
+
+def benchmark(func: Callable[[str], str], pages: List[str], num_runs: int) -> Dict:
+    """Time func over all pages num_runs times"""
+    times = []
+    for _ in range(num_runs):
+        start_time = time.perf_counter()
+        for page in pages:
+            func(page)
+        times.append(time.perf_counter() - start_time)
+    best = min(times)
+    return {
+        'avg_time': statistics.mean(times),
+        'min_time': best,
+        'pages_per_sec': len(pages) / best if best else float('inf'),
+    }
+
+
+def run_performance_test(directory: str, num_runs: int):
+    print("=" * 60)
+    print("PERFORMANCE COMPARISON: BeautifulSoup vs lxml XPath extraction")
+    print("=" * 60)
+
+    pages = load_sample_pages(directory)
+    for source, (before, after) in IMPLEMENTATIONS.items():
+        sample = pages[source]
+        if not sample:
+            print(f"\nNo {source} pages found in {directory}")
+            continue
+
+        mismatches = sum(1 for page in sample if before(page) != after(page))
+        before_results = benchmark(before, sample, num_runs)
+        after_results = benchmark(after, sample, num_runs)
+        speedup = after_results['pages_per_sec'] / before_results['pages_per_sec']
+
+        print(f"\n{source.upper()} ({len(sample)} pages, {num_runs} runs)")
+        print("-" * 40)
+        print(f"  BeautifulSoup: {before_results['pages_per_sec']:.1f} pages/s")
+        print(f"  lxml XPath:    {after_results['pages_per_sec']:.1f} pages/s")
+        print(f"  SPEEDUP: {speedup:.2f}x")
+        if mismatches:
+            print(f"  ❌ {mismatches} pages extracted differently")
+        else:
+            print("  ✅ Identical output on every page")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default='sample_pages', help='directory of saved fed_*.html/ecb_*.html pages')
+    parser.add_argument('--save', type=int, default=0, help='download this many pages per source first')
+    parser.add_argument('--year', type=int, default=2024, help='year of the downloaded pages')
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per implementation')
+    args = parser.parse_args()
+
+    if args.save:
+        save_sample_pages(args.pages, args.save, args.year)
+    run_performance_test(args.pages, args.runs)
@@ -5,13 +5,18 @@ from urllib.parse import urljoin
 import re as re 
 import threading 
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from typing import Iterator, List, Set, Tuple, Union
 from tqdm import tqdm
+from scraper_py.fetch import FetchEngine
+from scraper_py.http_cache import HTTPCache
+from scraper_py.link_index import LinkIndex
+from scraper_py.extract import parse_fed_speech, parse_fed_speech_record
 
 # Base URLs for Federal Reserve website
 BASE_URL = "https://www.federalreserve.gov"
 SPEECH_URL = "https://www.federalreserve.gov/newsevents/speeches.htm"
 MPR_URL = 'https://www.federalreserve.gov/monetarypolicy/publications/mpr_default.htm'
+YEAR_SPEECHES_URL = "https://www.federalreserve.gov/newsevents/speech/{}-speeches.htm"
 
 class FedScraper:
     """
@@ -21,16 +26,28 @@ class FedScraper:
     txt file.
     """
 
-    def __init__(self, years:List[int]):
+    def __init__(self, years:List[int], engine: FetchEngine = None, max_in_flight: int = 8,
+                 cache_dir: str = None, link_index: Union[str, LinkIndex] = None,
+                 archive: 'RawArchive' = None):
         """
         Initialize the scraper with specific years to scrape.
         
         Args:
             years (List[int]): List of years to scrape speeches for
+            engine (FetchEngine): Shared fetch engine, a new one is created if None
+            max_in_flight (int): Concurrent request limit for a newly created engine
+            cache_dir (str): Directory of the on-disk HTTP cache for a newly created engine
+            link_index (str): JSON file of the persisted year -> speech links index,
+                or a LinkIndex; None keeps the index in memory for this scraper only
+            archive (RawArchive): Archive the raw HTML of every speech and report page is kept in
         """
         self.base_url = BASE_URL
         self.speech_url = SPEECH_URL
         self.years = years 
+        cache = HTTPCache(cache_dir) if cache_dir else None
+        self.engine = engine or FetchEngine(max_in_flight=max_in_flight, cache=cache)
+        self.link_index = link_index if isinstance(link_index, LinkIndex) else LinkIndex(link_index)
+        self.archive = archive
     
     def get_link(self):
         """
@@ -39,7 +56,7 @@ class FedScraper:
         Returns:
             List[str]: List of URLs for yearly speech pages
         """
-        req = requests.get(self.speech_url) 
+        req = self.engine.get(self.speech_url) 
         soup = BeautifulSoup(req.text, 'lxml')
         year_links = [
             urljoin(BASE_URL, a["href"])
@@ -49,6 +66,21 @@ class FedScraper:
         final_links = [urljoin(BASE_URL, link) for link in year_links]
         return final_links
     
+    def __parse_year_page(self, page: str) -> List[str]:
+        """Extract the speech links of a year's listing page in listing order"""
+        soup = BeautifulSoup(page, 'lxml')
+        # Find all speech event elements
+        hdr = soup.find_all(class_='col-xs-9 col-md-10 eventlist__event')
+        sublink = []
+
+        # Extract individual speech links
+        for el in hdr:
+            link_tag = el.find('a', href=True)
+            if link_tag is None:
+                continue
+            sublink.append(urljoin(BASE_URL, link_tag['href']))
+        return sublink
+
     def get_speech_links(self):
         """
         Gets all individual speech links for each year.
@@ -57,28 +89,28 @@ class FedScraper:
             dict: Dictionary with years as keys and lists of speech URLs as values
         """
         master_links = {}
-        for link in self.get_link(): 
-            req = requests.get(link)
-            soup = BeautifulSoup(req.text, 'lxml')
-
+        # fetch every year index page concurrently over the pooled session
+        pages = self.engine.fetch_many(self.get_link())
+        for link, req in pages.items(): 
+            if req is None:
+                continue
             # Extract year from the URL
             year = int(re.search(r"(\d{4})-speeches", link).group(1))
-            # Find all speech event elements
-            hdr = soup.find_all(class_='col-xs-9 col-md-10 eventlist__event')
-            if not hdr:
+            sublink = self.__parse_year_page(req.text)
+            self.link_index.update(year, sublink)
+            if not sublink:
                 continue 
-            sublink = []
-
-            # Extract individual speech links
-            for el in hdr:
-                link_tag = el.find('a', href=True)
-                link = link_tag['href']
-                url = urljoin(BASE_URL, link)
-                sublink.append(url)
-                
             master_links[year] = sublink
+        self.link_index.save()
         return master_links
     
+    def __get_page(self, link: str):
+        """Fetch a speech or report page, keeping its raw HTML in the archive"""
+        req = self.engine.get(link)
+        if self.archive is not None and req.status_code == 200:
+            self.archive.put(link, req.content, 'text/html')
+        return req
+
     def thread_parse(self, link: str) -> str:
         """
         Parse a single speech page to extract its content.
@@ -89,66 +121,126 @@ class FedScraper:
         Returns:
             str: Formatted speech text with date, or empty string if parsing fails
         """
-        try:
-            req = requests.get(link)
-            soup = BeautifulSoup(req.text, 'lxml')
-            # Find main content and date
-            text_tag = soup.find(class_='col-xs-12 col-sm-8 col-md-8')
-            date_tag = soup.find('p', class_='article__time')
-            date = date_tag.get_text(strip=True)
-            print(date)
-            text = text_tag.find_all('p')
-            speech: str = date + "\n"
-            for para in text:
-                speech += para.get_text(strip=True)
-            return speech  
-            
-        except AttributeError:
-            return ""
+        req = self.__get_page(link)
+        # only the date node and content container are read, see scraper_py/extract.py
+        with self.engine.metrics.time_parse(link):
+            return parse_fed_speech(req.text)
+
+    def __refresh_link_index(self):
+        """Fetch the listing pages of the requested years the link index is missing or may be outdated for"""
+        stale = {YEAR_SPEECHES_URL.format(year): year for year in self.years
+                 if self.link_index.needs_refresh(year)}
+        if not stale:
+            return
+        for link, req in self.engine.fetch_many(list(stale)).items():
+            year = stale[link]
+            if req is None:
+                # left out of the index so the next run tries again
+                print(f'Could not fetch the speech listing of {year}')
+            elif req.status_code == 404:
+                self.link_index.update(year, [])
+            elif req.status_code == 200:
+                self.link_index.update(year, self.__parse_year_page(req.text))
+            else:
+                print(f'Could not fetch the speech listing of {year}: status code {req.status_code}')
+        self.link_index.save()
 
-    def get_speech_texts(self, workers: int):
+    def __speech_links_for_years(self) -> dict:
         """
-        Function that returns the text of speeches by year and saves them 
-        to a text file. 
-       
-        Args : 
-            years: List of years as integers for whom we want to scrape speeches for 
-            file_name : the name of the txt file that will store the text of the speeches 
-            workers : number of threads active 
+        Get the speech links of the requested years from the link index, only
+        fetching the listing pages of the current year and of years not indexed yet.
+
         Returns:
-            int : The number of files that were parsed. 0 if there was an error
+            dict: Years as keys and lists of speech URLs as values, years without
+            speeches are left out
         """
-        master_dict = self.get_speech_links()
+        self.__refresh_link_index()
         shortlist = {}
-        count = 0 
         # Filter links for requested years
         for val in self.years: 
-            links = master_dict[val]
+            links = self.link_index.links(val)
             if not links: 
                 print(f'Could not find links for year {val}')
-                return 0
             else: 
                 shortlist[val] = links 
+        return shortlist
+
+    def __fetch_record(self, job: Tuple[int, str]) -> Tuple[str, str, str]:
+        """Fetch and parse one (year, url) job into (date, title, text)"""
+        req = self.__get_page(job[1])
+        with self.engine.metrics.time_parse(job[1]):
+            return parse_fed_speech_record(req.text) or ("", "", "")
+
+    def __fetch_body(self, job: Tuple[int, str]) -> str:
+        """Fetch the raw page of one (year, url) job"""
+        return self.__get_page(job[1]).text
+
+    def iter_speech_texts(self, workers: int, parse_workers: int = 0, queue_size: int = None,
+                          skip_urls: Set[str] = None) -> Iterator[Tuple[int, str, str, str, str]]:
+        """
+        Stream the speeches of all requested years. The links of every year go
+        into one work queue with at most `workers` pages in flight, and records
+        are yielded as soon as their page has been parsed, so there is no idle
+        gap between years and nothing is held beyond the in-flight window.
+
+        With parse_workers > 0 the download threads only fetch raw pages and a
+        pool of parse_workers processes parses them, connected by a buffer of
+        queue_size pages, so parsing scales with cores.
+
+        Args:
+            workers (int): Upper bound of speech pages fetched concurrently
+            parse_workers (int): Number of parse processes, 0 parses in the download threads
+            queue_size (int): Pages buffered between the tiers, defaults to 2 * parse_workers
+            skip_urls (Set[str]): Speeches not to fetch, e.g. those done before a resume
+
+        Yields:
+            tuple: (year, url, date, title, text), date, title and text are empty
+            strings if the page could not be fetched or parsed
+        """
+        shortlist = self.__speech_links_for_years()
+        if not shortlist:
+            return
+        skip_urls = skip_urls or set()
+        jobs = ((year, link) for year, links in shortlist.items() for link in links if link not in skip_urls)
+        if parse_workers:
+            results = self.engine.imap_parse(self.__fetch_body, parse_fed_speech_record, jobs,
+                                             parse_workers, workers, queue_size, url_of=lambda job: job[1])
+        else:
+            results = self.engine.imap(self.__fetch_record, jobs, workers)
+
+        for (year, link), result in results:
+            if isinstance(result, Exception):
+                print(f'Error with link: {link}: {result}')
+                result = None
+            result = result or ("", "", "")
+            yield year, link, result[0], result[1], result[2]
+
+    def get_speech_texts(self, workers: int, parse_workers: int = 0):
+        """
+        Function that returns the text of speeches by year and saves them 
+        to a text file. 
+       
+        Args : 
+            years: List of years as integers for whom we want to scrape speeches for 
+            file_name : the name of the txt file that will store the text of the speeches 
+            workers : upper bound of speech pages fetched concurrently, the engine's 
+                      per-host rate limiter adapts the actual concurrency below it 
+            parse_workers : number of parse processes, 0 parses in the download threads 
+        Returns:
+            int : The number of files that were parsed. 0 if there was an error
+        """
+        shortlist = self.__speech_links_for_years()
+        if not shortlist:
+            return 0
         
-        # Process speeches in parallel
-        master_results = {}
-        for year, links in shortlist.items():
-            result = [None] * len(links)
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                futures = {executor.submit(self.thread_parse, link):i 
-                          for i, link in enumerate(links)}
-
-                for future in tqdm(as_completed(futures), 
-                                 total=len(futures), 
-                                 desc="Scraper Results"):
-                    index = futures[future]
-                    try:
-                        result[index] = future.result()
-                    except Exception as e:
-                        print(f'Error with link: {links[index]}: {e}')
-                        result[index] = "" 
-            
-            master_results[year] = result
+        # Keep the link order of every year
+        master_results = {year: [None] * len(links) for year, links in shortlist.items()}
+        positions = {(year, link): i for year, links in shortlist.items() 
+                     for i, link in enumerate(links)}
+        total = len(positions)
+
+        for year, link, date, _, text in tqdm(self.iter_speech_texts(workers, parse_workers), total=total, desc="Scraper Results"):
+            master_results[year][positions[(year, link)]] = date + "\n" + text if date else ""
         return master_results
     
     def __write_helper(self, file_name, speeches):
@@ -189,7 +281,7 @@ class FedScraper:
         """
         mpr_report = []
         testimony_links = []
-        request = requests.get(MPR_URL)
+        request = self.engine.get(MPR_URL)
         soup = BeautifulSoup(request.text, 'lxml')
         
         # Find all links and categorize them
@@ -202,90 +294,101 @@ class FedScraper:
         
         return mpr_report, testimony_links
 
-    def get_policy_texts(self):
+    def __policy_task(self, item):
         """
-        Extract text from Monetary Policy Reports and testimonies.
-        
+        Fetch and parse a single page of the policy report crawl.
+
+        Args:
+            item (tuple): (kind, url) with kind either 'testimony' or 'report'
+
+        Returns:
+            tuple: (result, new items). For a testimony the result is (date, text).
+            For a report page it is (section URLs, (date, text)), where the
+            section URLs from its navigation are also returned as new items.
+            Either (date, text) is None if nothing was found on the page.
+        """
+        kind, link = item
+        request = self.__get_page(link)
+        with self.engine.metrics.time_parse(link):
+            return self.__parse_policy_page(kind, link, request.text)
+
+    def __parse_policy_page(self, kind: str, link: str, page: str):
+        """Parse a testimony or report page, see __policy_task for the result"""
+        soup = BeautifulSoup(page, 'lxml')
+
+        if kind == 'testimony':
+            # Find date - using select_one for more reliable selection
+            date_tag = soup.select_one('p.article__time')
+            if not date_tag:
+                print(f"No date found for {link}")
+                return None, []
+            date = date_tag.get_text(strip=True)
+
+            # Find content - using select for more reliable selection
+            content_div = soup.select_one('div.col-xs-12.col-sm-8.col-md-8')
+            if not content_div:
+                print(f"No content found for {link}")
+                return None, []
+            paras = content_div.select('p')
+            testimony = '\n'.join(p.get_text(strip=True) for p in paras)
+            return (date, testimony) if testimony else None, []
+
+        # Find navigation links
+        sections = []
+        nav_div = soup.select_one('div.t4_nav.list-group.sticky#t4_nav')
+        if nav_div:
+            sections = [urljoin(BASE_URL, url['href']) for url in nav_div.select('a[href]')]
+
+        # Report section pages carry the text of the report
+        section = None
+        expression = re.fullmatch(r"https://www\.federalreserve\.gov/monetarypolicy/(\d{4})-(\d{2})-mpr-[\w\-]+\.htm", link)
+        content_div = soup.select_one('div.col-xs-12.col-md-9') if expression else None
+        if content_div:
+            date = f'{expression.group(1)}-{expression.group(2)}'
+            text = '\n'.join(p.get_text(strip=True) for p in content_div.select('p'))
+            if text:
+                section = (date, text)
+        return (sections, section), [('report', url) for url in sections]
+
+    def get_policy_texts(self, workers: int = 8):
+        """
+        Extract text from Monetary Policy Reports and testimonies. Testimony,
+        report and report section pages go through one concurrent work queue
+        that fetches every distinct URL exactly once, even though the same
+        section pages are linked from many reports.
+
+        Args:
+            workers (int): Upper bound of pages fetched concurrently
+
         Returns:
             tuple: (Dictionary of testimonies by date, Dictionary of MPR texts by date)
         """
         mpr_links, testimony_links = self.get_policy_report_links()
+        seeds = [('testimony', link) for link in testimony_links] + [('report', link) for link in mpr_links]
         all_testimony = {}
-        mpr_texts = {}
-        
-        # Process testimonies
-        for link in testimony_links:
-            try:
-                request = requests.get(link)
-                soup = BeautifulSoup(request.text, 'lxml')
-                
-                # Find date - using select_one for more reliable selection
-                date_tag = soup.select_one('p.article__time')
-                if not date_tag:
-                    print(f"No date found for {link}")
-                    continue
-                    
-                date = date_tag.get_text(strip=True)
-                print(f"Processing testimony from {date}")
-                
-                # Find content - using select for more reliable selection
-                content_div = soup.select_one('div.col-xs-12.col-sm-8.col-md-8')
-                if not content_div:
-                    print(f"No content found for {link}")
-                    continue
-                    
-                # Get all paragraphs from the content
-                paras = content_div.select('p')
-                testimony = '\n'.join(p.get_text(strip=True) for p in paras)
-                
-                if testimony:
+        section_order = {}
+        section_texts = {}
+
+        for (kind, link), result in self.engine.crawl(self.__policy_task, seeds, workers):
+            if isinstance(result, Exception):
+                print(f"Error processing {kind} {link}: {str(result)}")
+            elif kind == 'testimony':
+                if result:
+                    date, testimony = result
+                    print(f"Processing testimony from {date}")
                     all_testimony[date] = testimony
-                
-            except Exception as e:
-                print(f"Error processing testimony {link}: {str(e)}")
-                continue
-        
-        # Process MPR reports
-        for link in mpr_links:
-            try:
-                request = requests.get(link)
-                soup = BeautifulSoup(request.text, 'lxml')
-                
-                # Find navigation links
-                nav_div = soup.select_one('div.t4_nav.list-group.sticky#t4_nav')
-                if nav_div:
-                    links = nav_div.select('a[href]')
-                    
-                    for url in links:
-                        href = url['href']
-                        new_url = urljoin(BASE_URL, href)
-                        req = requests.get(new_url)
-                        sub_soup = BeautifulSoup(req.text, 'lxml')
-                        
-                        expression = re.fullmatch(r"https://www\.federalreserve\.gov/monetarypolicy/(\d{4})-(\d{2})-mpr-[\w\-]+\.htm", new_url)
-                        if not expression : 
-                            print(f'error : {new_url}')
-                        if expression : 
-                            year = expression.group(1)
-                            month = expression.group(2)
-                            date = f'{year}-{month}'
-                        
-                            content_div = sub_soup.select_one('div.col-xs-12.col-md-9')
-                            if not content_div:
-                                continue
-                                
-                            paras = content_div.select('p')
-                            text = '\n'.join(p.get_text(strip=True) for p in paras)
-                            print(text)
-                            
-                            if text:
-                                mpr_texts[date] = text
-                        
-            except Exception as e:
-                print(f"Error processing MPR {link}: {str(e)}")
-                continue
-            
-        return all_testimony, mpr_texts
-            
+            else:
+                sections, section = result
+                # remember the navigation order so sections are joined as in the report
+                for url in sections:
+                    section_order.setdefault(url, len(section_order))
+                if section:
+                    section_texts[link] = section
+
+        # Join the sections of each report in navigation order
+        mpr_texts = {}
+        for link in sorted(section_texts, key=lambda url: section_order.get(url, len(section_order))):
+            date, text = section_texts[link]
+            mpr_texts[date] = mpr_texts[date] + '\n' + text if date in mpr_texts else text
 
-            
\ No newline at end of file
+        return all_testimony, mpr_texts
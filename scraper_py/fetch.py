@@ -0,0 +1,577 @@
+import os
+import re
+import time
+import hashlib
+import queue
+import tempfile
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from scraper_py.http_cache import HTTPCache
+from scraper_py.rate_limit import HostRateLimiter, THROTTLE_STATUSES, parse_retry_after
+from scraper_py.metrics import Metrics
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+
+
+def _timed_parse(parse: Callable[[Any], Any], body: Any) -> Tuple[Any, float]:
+    """Run parse in a worker process and return (result, seconds spent)"""
+    start = time.perf_counter()
+    return parse(body), time.perf_counter() - start
+
+
+class _StreamReader:
+    """
+    Binary file-like view of a streamed response body, for incremental parsers.
+    Bytes read are counted in the metrics and, when a cache path is given,
+    copied to it; the copy is committed to the cache once the body has been
+    read to the end.
+    """
+
+    def __init__(self, engine: 'FetchEngine', url: str, req: requests.Response, tmp_path: str = None):
+        self.engine = engine
+        self.url = url
+        self.req = req
+        self.tmp_path = tmp_path
+        self._copy = open(tmp_path, 'wb') if tmp_path else None
+        self._complete = False
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.req.raw.read(None if size is None or size < 0 else size, decode_content=True)
+        if chunk:
+            self.engine.metrics.record_bytes(self.url, len(chunk))
+            if self._copy is not None:
+                self._copy.write(chunk)
+        elif size != 0 and not self._complete:
+            # an empty read of a non-zero size is the end of the body
+            self._complete = True
+            if self._copy is not None:
+                self._copy.close()
+                self._copy = None
+                self.engine.cache.store_file(self.url, self.tmp_path, self.req.headers)
+        return chunk
+
+    def close(self):
+        self.req.close()
+        if self._copy is not None:
+            # the body was not read to the end, nothing is cached
+            self._copy.close()
+            self._copy = None
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ReadAhead:
+    """
+    Binary file-like view of a stream that a background thread drains into a
+    temporary file as fast as the network delivers it. Reads are served from
+    that file, so a consumer that stalls (e.g. while downloads provide
+    backpressure) never leaves the connection idle long enough to be dropped.
+    """
+
+    def __init__(self, stream, chunk_size: int = 64 * 1024):
+        self._stream = stream
+        self._spool = tempfile.TemporaryFile()
+        self._cond = threading.Condition()
+        self._written = 0
+        self._position = 0
+        self._eof = False
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, args=(chunk_size,), daemon=True)
+        self._thread.start()
+
+    def _drain(self, chunk_size: int):
+        try:
+            while not self._closed:
+                chunk = self._stream.read(chunk_size)
+                if not chunk:
+                    break
+                with self._cond:
+                    if self._closed:
+                        break
+                    self._spool.seek(self._written)
+                    self._spool.write(chunk)
+                    self._written += len(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            # a read of everything waits for the end of the body
+            while not self._eof and (size is None or size < 0 or self._position >= self._written):
+                self._cond.wait()
+            if self._position >= self._written:
+                if self._error is not None:
+                    raise self._error
+                return b''
+            available = self._written - self._position
+            self._spool.seek(self._position)
+            chunk = self._spool.read(available if size is None or size < 0 else min(size, available))
+            self._position += len(chunk)
+            return chunk
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+        # unblocks a drain thread waiting on the network
+        self._stream.close()
+        self._thread.join()
+        self._spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FetchEngine:
+    """
+    Shared HTTP fetch engine for the scrapers. Keeps one pooled keep-alive
+    requests.Session so repeated requests to the same host reuse their TCP/TLS
+    connection, and fetches batches of URLs concurrently on a thread pool with
+    a bounded number of requests in flight. When given an HTTPCache, GET
+    requests are answered from disk while fresh and revalidated with a
+    conditional GET once stale. Every network request passes through a
+    per-host HostRateLimiter, and throttled or failed requests are retried.
+    Requests, cache hits and parse times are recorded in engine.metrics.
+    """
+
+    def __init__(self, max_in_flight: int = 8, timeout: float = 30, headers: Dict[str, str] = None,
+                 cache: HTTPCache = None, limiter: HostRateLimiter = None, max_retries: int = 3,
+                 metrics: Metrics = None):
+        """
+        Initialize the engine and its connection pool.
+
+        Args:
+            max_in_flight (int): Maximum number of concurrent requests
+            timeout (float): Timeout in seconds for a single request
+            headers (dict): Headers sent with every request, defaults to DEFAULT_HEADERS
+            cache (HTTPCache): Optional on-disk response cache
+            limiter (HostRateLimiter): Per-host limiter, a new one capped at max_in_flight if None
+            max_retries (int): Retries of a request after a throttling status or connection error
+            metrics (Metrics): Metrics to record into, a new one if None
+        """
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter or HostRateLimiter(max_concurrency=max_in_flight)
+        self.max_retries = max_retries
+        self.metrics = metrics or Metrics()
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+        # one pool per host, sized so every in-flight request keeps its connection
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Fetch a single URL over the pooled session, going through the cache
+        when one is configured. Responses served from disk have from_cache set.
+
+        Args:
+            url (str): URL to fetch
+            **kwargs: Extra keyword arguments passed to requests.Session.get
+
+        Returns:
+            requests.Response: The response of the request
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        # streamed and custom-header requests bypass the cache
+        if self.cache is None or kwargs.get('stream') or kwargs.get('headers'):
+            return self._request(url, **kwargs)
+
+        record = self.cache.lookup(url)
+        if record is not None:
+            if self.cache.is_fresh(url, record):
+                self.metrics.record_cache_hit(url, 'fresh')
+                return self._cached_response(url, record)
+            kwargs['headers'] = self.cache.conditional_headers(record)
+
+        req = self._request(url, **kwargs)
+        if req.status_code == 304 and record is not None:
+            record = self.cache.refresh(url, record, req.headers)
+            self.metrics.record_cache_hit(url, 'revalidated')
+            return self._cached_response(url, record)
+        if req.status_code == 200:
+            self.cache.store(url, req.content, req.headers)
+        req.from_cache = False
+        return req
+
+    def _request(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a GET through the rate limiter, retrying throttling statuses and
+        connection errors up to max_retries times.
+        """
+        for attempt in range(self.max_retries + 1):
+            host = self.limiter.acquire(url)
+            start = time.monotonic()
+            try:
+                req = self.session.get(url, **kwargs)
+            except requests.RequestException:
+                latency = time.monotonic() - start
+                self.limiter.release(host, None, latency)
+                self.metrics.record_request(url, None, latency, retry=attempt > 0)
+                if attempt == self.max_retries:
+                    raise
+                continue
+
+            latency = time.monotonic() - start
+            retry_after = parse_retry_after(req.headers.get('Retry-After'))
+            self.limiter.release(host, req.status_code, latency, retry_after)
+            # streamed bodies are counted by the caller as they are read
+            num_bytes = 0 if kwargs.get('stream') else len(req.content)
+            self.metrics.record_request(url, req.status_code, latency, num_bytes, retry=attempt > 0)
+            if req.status_code not in THROTTLE_STATUSES or attempt == self.max_retries:
+                return req
+            req.close()
+
+    def _cached_response(self, url: str, record: Dict) -> requests.Response:
+        """Build a 200 response from a cached record."""
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp._content = self.cache.read_body(url)
+        if record.get('content_type'):
+            resp.headers['Content-Type'] = record['content_type']
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.from_cache = True
+        return resp
+
+    def download(self, url: str, file_path: str, chunk_size: int = 64 * 1024) -> Tuple[int, str]:
+        """
+        Stream a URL to disk in chunks. The body is written to file_path + '.part'
+        and atomically renamed once complete. If a partial file is left over from
+        an interrupted run, the download resumes from its end with a Range request.
+
+        Args:
+            url (str): URL to download
+            file_path (str): Final path of the file
+            chunk_size (int): Number of bytes held in memory at a time
+
+        Returns:
+            tuple: (size in bytes, sha256 hex digest) of the complete file
+        """
+        part_path = file_path + '.part'
+        digest = hashlib.sha256()
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with self.get(url, stream=True, headers=headers) as req:
+            if req.status_code == 416 and offset:
+                # "bytes */<size>" tells whether the part already holds the whole body
+                total = re.fullmatch(r'bytes \*/(\d+)', req.headers.get('Content-Range', '').strip())
+                if total is not None and int(total.group(1)) == offset:
+                    return self.__complete_part(part_path, file_path, chunk_size)
+                # the partial file does not match the remote body, start over once
+                os.remove(part_path)
+                return self.download(url, file_path, chunk_size)
+            req.raise_for_status()
+
+            if offset and req.status_code == 206:
+                # seed the hash with the bytes already on disk
+                with open(part_path, 'rb') as part:
+                    for chunk in iter(lambda: part.read(chunk_size), b''):
+                        digest.update(chunk)
+                mode = 'ab'
+            else:
+                offset = 0
+                mode = 'wb'
+
+            size = offset
+            with open(part_path, mode) as file:
+                for chunk in req.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        file.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+
+        self.metrics.record_bytes(url, size - offset)
+        os.replace(part_path, file_path)
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def __complete_part(part_path: str, file_path: str, chunk_size: int) -> Tuple[int, str]:
+        """Promote a partial file that already holds the whole body, see download"""
+        digest = hashlib.sha256()
+        size = 0
+        with open(part_path, 'rb') as part:
+            for chunk in iter(lambda: part.read(chunk_size), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(part_path, file_path)
+        return size, digest.hexdigest()
+
+    def open_stream(self, url: str, read_ahead: bool = False):
+        """
+        Open a URL as a binary file-like object, so large bodies can be parsed
+        incrementally while they download. With a cache, a fresh entry is read
+        from disk, a stale one is revalidated and read from disk on a 304, and
+        a new body is copied to the cache as it is read.
+
+        Args:
+            url (str): URL to open
+            read_ahead (bool): Drain the body into a local spool on a background
+                thread, for consumers that may pause for long between reads
+
+        Returns:
+            A binary file-like object with read() and close(), usable as a context manager
+        """
+        if self.cache is not None:
+            record = self.cache.lookup(url)
+            headers = {}
+            if record is not None:
+                if self.cache.is_fresh(url, record):
+                    self.metrics.record_cache_hit(url, 'fresh')
+                    return open(self.cache.body_path(url), 'rb')
+                headers = self.cache.conditional_headers(record)
+            req = self._request(url, stream=True, headers=headers, timeout=self.timeout)
+            if req.status_code == 304 and record is not None:
+                req.close()
+                self.cache.refresh(url, record, req.headers)
+                self.metrics.record_cache_hit(url, 'revalidated')
+                return open(self.cache.body_path(url), 'rb')
+            req.raise_for_status()
+            stream = _StreamReader(self, url, req, self.cache.tmp_body_path(url))
+        else:
+            req = self._request(url, stream=True, timeout=self.timeout)
+            req.raise_for_status()
+            stream = _StreamReader(self, url, req)
+        return _ReadAhead(stream) if read_ahead else stream
+
+    def get_text(self, url: str) -> str:
+        """
+        Fetch a URL and return its decoded body.
+
+        Returns:
+            str: Body of the response, empty string if the status is not 200
+        """
+        req = self.get(url)
+        if req.status_code != 200:
+            print(f'Failed to get page for {url}: status code {req.status_code}')
+            return ""
+        return req.text
+
+    def imap(self, func: Callable[[Any], Any], items: Iterable[Any],
+             max_in_flight: int = None) -> Iterator[Tuple[Any, Any]]:
+        """
+        Apply func to every item on the thread pool and yield (item, result)
+        pairs as they complete. At most max_in_flight calls are pending at any
+        time, so items can be a lazy iterator of any length.
+
+        Args:
+            func (Callable): Function called with a single item
+            items (Iterable): Items to process
+            max_in_flight (int): Concurrency limit, defaults to the engine limit
+
+        Yields:
+            tuple: (item, result), result is the raised exception if func failed
+        """
+        limit = max_in_flight or self.max_in_flight
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=limit) as executor:
+            pending = {}
+            try:
+                for item in items:
+                    pending[executor.submit(func, item)] = item
+                    if len(pending) >= limit:
+                        break
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = e
+                        yield item, result
+
+                    # top the pool back up from the remaining items
+                    for item in items:
+                        pending[executor.submit(func, item)] = item
+                        if len(pending) >= limit:
+                            break
+            finally:
+                # the consumer stopped early, calls that have not started are dropped
+                for future in pending:
+                    future.cancel()
+
+    def imap_parse(self, fetch: Callable[[Any], Any], parse: Callable[[Any], Any], items: Iterable[Any],
+                   parse_workers: int, max_in_flight: int = None, queue_size: int = None,
+                   url_of: Callable[[Any], str] = None) -> Iterator[Tuple[Any, Any]]:
+        """
+        Two-tier version of imap for CPU-bound parsing. A thread tier runs fetch
+        (network I/O) with at most max_in_flight calls pending, and a
+        ProcessPoolExecutor tier runs parse on the fetched bodies so parsing
+        scales with cores instead of being serialized by the GIL. At most
+        queue_size bodies are waiting for or being parsed; when that buffer is
+        full the thread tier stops submitting fetches.
+
+        Args:
+            fetch (Callable): Function called with an item in a thread, returns the raw body
+            parse (Callable): Picklable module-level function called with a body in a worker process
+            items (Iterable): Items to process
+            parse_workers (int): Number of parse processes
+            max_in_flight (int): Concurrency limit of the fetch tier, defaults to the engine limit
+            queue_size (int): Size of the buffer between the tiers, defaults to 2 * parse_workers
+            url_of (Callable): Maps an item to its URL for the parse time metrics, items are URLs if None
+
+        Yields:
+            tuple: (item, result), result is the raised exception if fetch or parse failed
+        """
+        slots = threading.BoundedSemaphore(queue_size or 2 * parse_workers)
+        results = queue.Queue()
+        done = object()
+        # set when the consumer stops iterating, so the feeder stops fetching
+        stop = threading.Event()
+
+        def feed(pool):
+            submitted = 0
+            fetched = self.imap(fetch, items, max_in_flight)
+            try:
+                for item, body in fetched:
+                    if stop.is_set():
+                        return
+                    submitted += 1
+                    if isinstance(body, Exception):
+                        results.put((item, body))
+                        continue
+                    # wait for room in the buffer, giving up once the consumer is gone
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    future = pool.submit(_timed_parse, parse, body)
+                    future.add_done_callback(lambda f, item=item: results.put((item, f)))
+            except Exception as e:
+                results.put((None, e))
+                submitted += 1
+            finally:
+                fetched.close()
+                results.put((done, submitted))
+
+        pool = ProcessPoolExecutor(max_workers=parse_workers)
+        feeder = threading.Thread(target=feed, args=(pool,), daemon=True)
+        feeder.start()
+        finished = False
+        try:
+            received, total = 0, None
+            while total is None or received < total:
+                item, result = results.get()
+                if item is done:
+                    total = result
+                    continue
+                received += 1
+                if not isinstance(result, Exception):
+                    slots.release()
+                    try:
+                        result, seconds = result.result()
+                    except Exception as e:
+                        result = e
+                    else:
+                        self.metrics.record_parse(url_of(item) if url_of else item, seconds)
+                yield item, result
+            finished = True
+        finally:
+            stop.set()
+            # on an early exit queued parses are cancelled; the feeder returns
+            # on its own once its current fetch completes, without being waited for
+            pool.shutdown(wait=True, cancel_futures=not finished)
+            if finished:
+                feeder.join()
+
+    def crawl(self, func: Callable[[Any], Tuple[Any, Iterable[Any]]], seeds: Iterable[Any],
+              max_in_flight: int = None) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run a concurrent work queue in which processing an item can discover new
+        items. Items are memoized for the whole run, so each distinct item is
+        processed exactly once no matter how often it is discovered.
+
+        Args:
+            func (Callable): Function called with an item, returns (result, new items)
+            seeds (Iterable): Initial items
+            max_in_flight (int): Concurrency limit, defaults to the engine limit
+
+        Yields:
+            tuple: (item, result), result is the raised exception if func failed
+        """
+        limit = max_in_flight or self.max_in_flight
+        seen = set()
+        queue = deque()
+
+        def push(item):
+            if item not in seen:
+                seen.add(item)
+                queue.append(item)
+
+        for item in seeds:
+            push(item)
+
+        with ThreadPoolExecutor(max_workers=limit) as executor:
+            pending = {}
+            while queue or pending:
+                while queue and len(pending) < limit:
+                    item = queue.popleft()
+                    pending[executor.submit(func, item)] = item
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        result, new_items = future.result()
+                    except Exception as e:
+                        result, new_items = e, ()
+                    for new_item in new_items:
+                        push(new_item)
+                    yield item, result
+
+    def fetch_many(self, urls: List[str], max_in_flight: int = None) -> Dict[str, Optional[requests.Response]]:
+        """
+        Fetch many URLs concurrently.
+
+        Args:
+            urls (List[str]): URLs to fetch, duplicates are fetched once
+            max_in_flight (int): Concurrency limit, defaults to the engine limit
+
+        Returns:
+            dict: URL to response, None for URLs whose request raised
+        """
+        responses = {}
+        for url, result in self.imap(self.get, dict.fromkeys(urls), max_in_flight):
+            if isinstance(result, Exception):
+                print(f'Error with link: {url}: {result}')
+                result = None
+            responses[url] = result
+        return responses
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# (url regex, ttl in seconds). A ttl of None means the entry never expires,
+# 0 means the entry is revalidated with a conditional GET on every use.
+DEFAULT_TTL_RULES = [
+    # listing and index pages change whenever something is published
+    (r"https://www\.federalreserve\.gov/newsevents/speeches\.htm", 6 * 3600),
+    (r"https://www\.federalreserve\.gov/newsevents/speech/\d{4}-speeches\.htm", 6 * 3600),
+    (r"https://www\.federalreserve\.gov/monetarypolicy/publications/mpr_default\.htm", 24 * 3600),
+    (r"https://www\.ecb\.europa\.eu/.*index(_include)?\.en\.html.*", 6 * 3600),
+    (r"https://www\.bis\.org/api/document_lists/.*\.json", 6 * 3600),
+    # individual speeches, testimonies, reports and PDFs never change
+    (r"https://www\.federalreserve\.gov/newsevents/(speech|testimony)/.+\.htm", None),
+    (r"https://www\.federalreserve\.gov/monetarypolicy/\d{4}-\d{2}-mpr-.+\.htm", None),
+    (r"https://www\.ecb\.europa\.eu/press/.+\.en\.html", None),
+    (r"https://www\.bis\.org/.+\.pdf", None),
+]
+
+
+class HTTPCache:
+    """
+    Persistent on-disk HTTP response cache shared by the scrapers. Every entry
+    is keyed by URL and stores the response body next to a small JSON record of
+    its ETag/Last-Modified validators. Entries are considered fresh for the ttl
+    of the first matching rule; stale entries are revalidated with
+    If-None-Match/If-Modified-Since and served from disk on a 304.
+    """
+
+    def __init__(self, directory: str, ttl_rules: List[Tuple[str, Optional[float]]] = None,
+                 default_ttl: Optional[float] = 0):
+        """
+        Initialize the cache in the given directory.
+
+        Args:
+            directory (str): Directory that stores the cached responses
+            ttl_rules (List[Tuple[str, float]]): (url regex, ttl seconds) pairs, first match wins
+            default_ttl (float): ttl for URLs that match no rule
+        """
+        self.dir = directory
+        self.ttl_rules = [(re.compile(pattern), ttl)
+                          for pattern, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)]
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.dir, self._key(url) + '.json')
+
+    def body_path(self, url: str) -> str:
+        """Path of the cached body for a URL."""
+        return os.path.join(self.dir, self._key(url) + '.body')
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """
+        Get the ttl that applies to a URL.
+
+        Returns:
+            float: ttl in seconds, None if the entry never expires
+        """
+        for pattern, ttl in self.ttl_rules:
+            if pattern.fullmatch(url):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        Get the cached record for a URL.
+
+        Returns:
+            dict: The cached record, None if the URL is not cached
+        """
+        meta_path = self._meta_path(url)
+        if not os.path.exists(meta_path) or not os.path.exists(self.body_path(url)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, url: str, record: Dict) -> bool:
+        """Check whether a cached record can be used without revalidation."""
+        ttl = self.ttl_for(url)
+        if ttl is None:
+            return True
+        return time.time() - record['stored_at'] < ttl
+
+    def conditional_headers(self, record: Dict) -> Dict[str, str]:
+        """Build the If-None-Match/If-Modified-Since headers for a record."""
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def read_body(self, url: str) -> bytes:
+        """Read the cached body of a URL."""
+        with open(self.body_path(url), 'rb') as file:
+            return file.read()
+
+    def _write_meta(self, url: str, record: Dict):
+        meta_path = self._meta_path(url)
+        tmp_path = f'{meta_path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(record, file)
+        os.replace(tmp_path, meta_path)
+
+    def store(self, url: str, body: bytes, headers: Dict[str, str]) -> Dict:
+        """
+        Store a 200 response body and its validators.
+
+        Args:
+            url (str): Requested URL
+            body (bytes): Response body
+            headers (dict): Response headers
+
+        Returns:
+            dict: The stored record
+        """
+        tmp_path = self.tmp_body_path(url)
+        with open(tmp_path, 'wb') as file:
+            file.write(body)
+        return self.store_file(url, tmp_path, headers)
+
+    def tmp_body_path(self, url: str) -> str:
+        """Temporary path a body can be written to before store_file commits it."""
+        return f'{self.body_path(url)}.{threading.get_ident()}.tmp'
+
+    def store_file(self, url: str, tmp_path: str, headers: Dict[str, str]) -> Dict:
+        """
+        Store a 200 response whose body was streamed to tmp_path, without
+        holding the body in memory.
+
+        Returns:
+            dict: The stored record
+        """
+        record = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+            'size_bytes': os.path.getsize(tmp_path),
+            'stored_at': time.time(),
+        }
+        with self._lock:
+            os.replace(tmp_path, self.body_path(url))
+            self._write_meta(url, record)
+        return record
+
+    def refresh(self, url: str, record: Dict, headers: Dict[str, str]) -> Dict:
+        """
+        Mark a record as revalidated after a 304 response.
+
+        Returns:
+            dict: The updated record
+        """
+        record = dict(record)
+        record['stored_at'] = time.time()
+        # a 304 may carry updated validators
+        if headers.get('ETag'):
+            record['etag'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            record['last_modified'] = headers['Last-Modified']
+        with self._lock:
+            self._write_meta(url, record)
+        return record
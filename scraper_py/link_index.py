@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import datetime
+import threading
+from typing import Dict, List, Optional
+
+
+class LinkIndex:
+    """
+    Persisted map of year -> speech URLs, in listing order, with the time each
+    URL was first seen. A year's listing page only needs to be fetched when
+    the year is missing from the index or was last fetched before the year
+    ended, as it could still get new speeches then; every other lookup is
+    served from disk.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): JSON file of the index, None keeps it in memory only
+        """
+        self.path = path
+        self._years: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self._years = json.load(file)
+
+    def needs_refresh(self, year: int) -> bool:
+        """Whether the listing page of a year has to be fetched"""
+        entry = self._years.get(str(year))
+        if entry is None:
+            return True
+        # a listing fetched in, say, November misses the speeches of December
+        year_end = datetime.datetime(year + 1, 1, 1).timestamp()
+        return entry.get('fetched', 0) < year_end
+
+    def links(self, year: int) -> Optional[List[str]]:
+        """Speech URLs of a year in listing order, None if the year was never fetched"""
+        entry = self._years.get(str(year))
+        if entry is None:
+            return None
+        return [url for url, first_seen in entry['links']]
+
+    def first_seen(self, url: str) -> Optional[float]:
+        """Unix time a URL was first listed, None if it is not indexed"""
+        for entry in self._years.values():
+            for link, first_seen in entry['links']:
+                if link == url:
+                    return first_seen
+        return None
+
+    def update(self, year: int, links: List[str]):
+        """
+        Replace the links of a year with a fresh listing, keeping the first-seen
+        time of links already indexed. An empty list records a year without
+        speeches so it is not fetched again.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._years.get(str(year), {'links': []})
+            seen = {url: first_seen for url, first_seen in entry['links']}
+            self._years[str(year)] = {
+                'links': [[url, seen.get(url, now)] for url in links],
+                'fetched': now,
+            }
+
+    def save(self):
+        """Write the index atomically, nothing happens for an in-memory index"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._years, file)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,234 @@
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import Counter
+from urllib.parse import urlparse
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds of the latency and parse time histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# (class name, url regex), first match wins
+DEFAULT_URL_CLASSES = [
+    ('fed_index', r"https://www\.federalreserve\.gov/(newsevents/speeches\.htm|newsevents/speech/\d{4}-speeches\.htm|monetarypolicy/publications/mpr_default\.htm)"),
+    ('fed_speech', r"https://www\.federalreserve\.gov/newsevents/speech/.+"),
+    ('fed_testimony', r"https://www\.federalreserve\.gov/newsevents/testimony/.+"),
+    ('fed_report', r"https://www\.federalreserve\.gov/monetarypolicy/.+"),
+    ('ecb_listing', r"https://www\.ecb\.europa\.eu/.*index(_include)?\.en\.html.*"),
+    ('ecb_bulletin', r"https://www\.ecb\.europa\.eu/press/economic-bulletin/.+"),
+    ('ecb_speech', r"https://www\.ecb\.europa\.eu/press/.+"),
+    ('bis_catalogue', r"https://www\.bis\.org/api/document_lists/.+"),
+    ('bis_pdf', r"https://www\.bis\.org/.+\.pdf"),
+]
+
+
+class _Histogram:
+    """Cumulative histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class _Series:
+    """All measurements of one (host, url class) pair."""
+
+    def __init__(self):
+        self.requests = 0
+        self.status = Counter()
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.cache_hits = Counter()
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.parse = _Histogram(PARSE_BUCKETS)
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'status': {str(status): count for status, count in self.status.items()},
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'errors': self.errors,
+            'cache_hits': dict(self.cache_hits),
+            'latency_seconds': self.latency.to_dict(),
+            'parse_seconds': self.parse.to_dict(),
+        }
+
+
+class Metrics:
+    """
+    Request-level metrics of a scraping run, kept per host and per URL class:
+    request counts, status codes, bytes, latency histograms, retries, cache
+    hits and parse time. FetchEngine records into it automatically; the
+    scrapers add parse times. Read it with snapshot() or dump it at the end of
+    a run with to_json() or to_prometheus().
+    """
+
+    def __init__(self, url_classes: List[Tuple[str, str]] = None):
+        """
+        Args:
+            url_classes (List[Tuple[str, str]]): (class name, url regex) pairs, first match wins
+        """
+        self.url_classes = [(name, re.compile(pattern))
+                            for name, pattern in (DEFAULT_URL_CLASSES if url_classes is None else url_classes)]
+        self.started = time.time()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def classify(self, url: str) -> str:
+        """Get the URL class of a URL, 'other' if no class matches"""
+        for name, pattern in self.url_classes:
+            if pattern.fullmatch(url):
+                return name
+        return 'other'
+
+    def _get(self, url: str) -> _Series:
+        key = (urlparse(url).netloc, self.classify(url))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    def record_request(self, url: str, status: Optional[int], latency: float, num_bytes: int = 0,
+                       retry: bool = False):
+        """
+        Record one network request.
+
+        Args:
+            url (str): Requested URL
+            status (int): HTTP status, None if the request raised
+            latency (float): Seconds the request took
+            num_bytes (int): Size of the body read
+            retry (bool): Whether the request was a retry of an earlier attempt
+        """
+        with self._lock:
+            series = self._get(url)
+            series.requests += 1
+            series.latency.observe(latency)
+            series.bytes += num_bytes
+            if status is None:
+                series.errors += 1
+            else:
+                series.status[status] += 1
+            if retry:
+                series.retries += 1
+
+    def record_bytes(self, url: str, num_bytes: int):
+        """Add bytes of a streamed body read after the request was recorded"""
+        with self._lock:
+            self._get(url).bytes += num_bytes
+
+    def record_cache_hit(self, url: str, kind: str):
+        """
+        Record a response served from the HTTP cache.
+
+        Args:
+            url (str): Requested URL
+            kind (str): 'fresh' if served without a request, 'revalidated' after a 304
+        """
+        with self._lock:
+            self._get(url).cache_hits[kind] += 1
+
+    def record_parse(self, url: str, seconds: float):
+        """Record the time spent parsing the page of a URL"""
+        with self._lock:
+            self._get(url).parse.observe(seconds)
+
+    @contextmanager
+    def time_parse(self, url: str):
+        """Context manager recording the time spent parsing the page of a URL"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_parse(url, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        """
+        Get all metrics as a plain dict.
+
+        Returns:
+            dict: {'started', 'elapsed_seconds', 'series': [{'host', 'url_class', ...}]}
+        """
+        with self._lock:
+            series = [{'host': host, 'url_class': url_class, **values.to_dict()}
+                      for (host, url_class), values in sorted(self._series.items())]
+        return {
+            'started': self.started,
+            'elapsed_seconds': time.time() - self.started,
+            'series': series,
+        }
+
+    def to_json(self, file_name: str):
+        """Write the snapshot as JSON"""
+        with open(file_name, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+    def to_prometheus(self, file_name: str):
+        """Write the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name: str, kind: str, text: str):
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def labels(series: Dict, **extra) -> str:
+            pairs = {'host': series['host'], 'url_class': series['url_class'], **extra}
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs.items()) + '}'
+
+        def histogram(name: str, key: str, text: str):
+            header(name, 'histogram', text)
+            for series in snapshot['series']:
+                values = series[key]
+                for bound, count in values['buckets'].items():
+                    lines.append(f'{name}_bucket{labels(series, le=bound)} {count}')
+                lines.append(f'{name}_bucket{labels(series, le="+Inf")} {values["count"]}')
+                lines.append(f'{name}_sum{labels(series)} {values["sum"]}')
+                lines.append(f'{name}_count{labels(series)} {values["count"]}')
+
+        header('scraper_requests_total', 'counter', 'Network requests sent')
+        for series in snapshot['series']:
+            lines.append(f'scraper_requests_total{labels(series)} {series["requests"]}')
+        header('scraper_responses_total', 'counter', 'Responses by HTTP status')
+        for series in snapshot['series']:
+            for status, count in series['status'].items():
+                lines.append(f'scraper_responses_total{labels(series, status=status)} {count}')
+        header('scraper_request_errors_total', 'counter', 'Requests that raised before a response')
+        for series in snapshot['series']:
+            lines.append(f'scraper_request_errors_total{labels(series)} {series["errors"]}')
+        header('scraper_response_bytes_total', 'counter', 'Body bytes received')
+        for series in snapshot['series']:
+            lines.append(f'scraper_response_bytes_total{labels(series)} {series["bytes"]}')
+        header('scraper_retries_total', 'counter', 'Retried requests')
+        for series in snapshot['series']:
+            lines.append(f'scraper_retries_total{labels(series)} {series["retries"]}')
+        header('scraper_cache_hits_total', 'counter', 'Responses served from the HTTP cache')
+        for series in snapshot['series']:
+            for kind, count in series['cache_hits'].items():
+                lines.append(f'scraper_cache_hits_total{labels(series, kind=kind)} {count}')
+        histogram('scraper_request_latency_seconds', 'latency_seconds', 'Request latency')
+        histogram('scraper_parse_seconds', 'parse_seconds', 'Page parse time')
+
+        with open(file_name, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
@@ -0,0 +1,167 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from typing import Dict, Optional
+
+# Statuses that mean the host is overloaded or throttling us
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    """Token bucket and concurrency window of a single host."""
+
+    def __init__(self, rate: float, burst: float, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.limit = concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.latency = None
+        self.baseline = None
+        self.successes = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    """
+    Per-host token-bucket rate limiter with an adaptive concurrency window,
+    shared by every request of a FetchEngine. Each host starts at the initial
+    rate and concurrency. Throttling responses (429/5xx) or connection errors
+    halve both, and a Retry-After header blocks the host until it has passed.
+    Latency rising above latency_factor times its best observed value shrinks
+    the window by one. A full window of healthy responses grows the window
+    by one and the rate by a quarter, up to the configured maximums.
+    """
+
+    def __init__(self, rate: float = 5.0, concurrency: int = 2, min_rate: float = 0.2,
+                 max_rate: float = 50.0, min_concurrency: int = 1, max_concurrency: int = 16,
+                 latency_factor: float = 2.0):
+        """
+        Args:
+            rate (float): Initial requests per second per host
+            concurrency (int): Initial number of concurrent requests per host
+            min_rate (float): Lowest rate the limiter backs off to
+            max_rate (float): Highest rate the limiter ramps up to
+            min_concurrency (int): Smallest concurrency window
+            max_concurrency (int): Largest concurrency window
+            latency_factor (float): Latency growth over the baseline treated as congestion
+        """
+        self.initial_rate = rate
+        self.initial_concurrency = min(max(concurrency, min_concurrency), max_concurrency)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_factor = latency_factor
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.initial_rate, max(1.0, self.initial_rate), self.initial_concurrency)
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, url: str) -> str:
+        """
+        Block until the host of url has both a free concurrency slot and a token.
+
+        Returns:
+            str: The host, to be passed to release once the request finished
+        """
+        host = urlparse(url).netloc
+        with self._cond:
+            while True:
+                state = self._state(host)
+                now = time.monotonic()
+                state.refill(now)
+                if now < state.blocked_until:
+                    timeout = state.blocked_until - now
+                elif state.in_flight >= state.limit:
+                    timeout = None
+                elif state.tokens < 1:
+                    timeout = (1 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return host
+                self._cond.wait(timeout)
+
+    def release(self, host: str, status: Optional[int], latency: float, retry_after: float = None):
+        """
+        Return a slot and adapt the host limits to the outcome of the request.
+
+        Args:
+            host (str): Host returned by acquire
+            status (int): HTTP status, None if the request failed to connect
+            latency (float): Seconds until the response headers arrived
+            retry_after (float): Parsed Retry-After of the response, if any
+        """
+        with self._cond:
+            state = self._state(host)
+            state.in_flight -= 1
+            now = time.monotonic()
+
+            if status is None or status in THROTTLE_STATUSES:
+                state.limit = max(self.min_concurrency, state.limit // 2)
+                state.rate = max(self.min_rate, state.rate / 2)
+                state.successes = 0
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, now + retry_after)
+            else:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                # the baseline creeps up so a lasting latency shift is eventually accepted
+                state.baseline = state.latency if state.baseline is None else min(state.baseline * 1.05, state.latency)
+                if state.latency > self.latency_factor * state.baseline:
+                    state.limit = max(self.min_concurrency, state.limit - 1)
+                    state.successes = 0
+                else:
+                    state.successes += 1
+                    if state.successes >= state.limit:
+                        state.limit = min(self.max_concurrency, state.limit + 1)
+                        state.rate = min(self.max_rate, state.rate * 1.25)
+                        state.successes = 0
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the current limits of every host seen so far.
+
+        Returns:
+            dict: host -> {'rate', 'concurrency', 'in_flight', 'latency'}
+        """
+        with self._cond:
+            return {
+                host: {
+                    'rate': state.rate,
+                    'concurrency': state.limit,
+                    'in_flight': state.in_flight,
+                    'latency': state.latency,
+                }
+                for host, state in self._hosts.items()
+            }
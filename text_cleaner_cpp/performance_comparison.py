@@ -3,6 +3,8 @@
 Performance comparison: C++ Cython vs Pure Python text processing
 """
 
+import os
+import sys
 import time
 import random
 import string
@@ -11,7 +13,7 @@ import statistics
 
 # Import your Cython wrapper
 try:
-    from speech_clean_wrapper import PyCleanText
+    from speech_clean_wrapper import PyCleanText, PyBatchCleaner
     CYTHON_AVAILABLE = True
 except ImportError:
     print("Warning: Cython wrapper not available. Install with: python3 setup_cython.py build_ext --inplace")
@@ -232,6 +234,118 @@ def run_performance_test():
     else:
         print("Cython implementation not available for comparison")
 
+# Speech-like sentences with the abbreviations and decimals the legacy splitter breaks up
+SPEECH_SENTENCES = [
+    "Mr. Powell said the U.S. economy grew 2.5 percent last year.",
+    "Inflation, as measured by the PCE price index, was 3.2 percent in Jan. 2024.",
+    "The Committee decided to maintain the target range for the federal funds rate!",
+    "Will the labor market continue to rebalance in the coming months?",
+    "Dr. Lagarde noted that euro area growth, i.e. real GDP, stagnated.",
+    "See Fig. 3 for the path of the policy rate since 2022.",
+]
+
+
+def load_speech_text(corpus_dir: str = '../data/corpus', max_chars: int = 5_000_000) -> str:
+    """Text of stored speeches from the corpus store, or generated speech-like text without one"""
+    try:
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+        from data_collection.corpus_store import CorpusStore
+        texts = []
+        size = 0
+        for batch in CorpusStore(corpus_dir).iter_batches(columns=['text'], source_type='speech'):
+            for text in batch.column('text').to_pylist():
+                texts.append(text or '')
+                size += len(texts[-1])
+                if size >= max_chars:
+                    return '\n'.join(texts)
+        if texts:
+            return '\n'.join(texts)
+    except Exception as e:
+        print(f"No stored speeches ({e}), using generated speech text")
+    random.seed(0)
+    return ' '.join(random.choice(SPEECH_SENTENCES) for _ in range(20000))
+
+
+def benchmark_engines(text: str, num_runs: int = 5) -> Dict:
+    """Throughput of the legacy splitter against the single pass tokenizer on one text"""
+    results = {}
+    for engine in ('legacy', 'tokenizer'):
+        cleaner = PyBatchCleaner(min_chars=30, num_threads=1, engine=engine)
+        times = []
+        for _ in range(num_runs):
+            start_time = time.perf_counter()
+            count = cleaner.count([text])[0]
+            times.append(time.perf_counter() - start_time)
+        results[engine] = {
+            'min_time': min(times),
+            'mb_per_second': len(text.encode('utf-8')) / min(times) / 1e6,
+            'sentences': count,
+        }
+    return results
+
+
+def run_engine_test():
+    """Compare the sentence engines on speech text"""
+    print("\n" + "=" * 60)
+    print("SENTENCE ENGINES: legacy splitter vs single pass tokenizer")
+    print("=" * 60)
+    if not CYTHON_AVAILABLE:
+        print("Cython implementation not available for comparison")
+        return
+
+    text = load_speech_text()
+    print(f"Speech text: {len(text)} characters")
+    results = benchmark_engines(text)
+    print(f"{'Engine':<12} {'Time (s)':<12} {'MB/s':<10} {'Sentences':<10}")
+    print("-" * 60)
+    for engine, result in results.items():
+        print(f"{engine:<12} {result['min_time']:<12.4f} {result['mb_per_second']:<10.1f} {result['sentences']:<10}")
+    speedup = results['legacy']['min_time'] / results['tokenizer']['min_time']
+    print(f"\n  Tokenizer throughput: {speedup:.2f}x the legacy splitter")
+
+    sample = "Mr. Powell said the U.S. economy grew 2.5 percent. Rates were unchanged."
+    for engine in ('legacy', 'tokenizer'):
+        print(f"  {engine}: {PyBatchCleaner(min_chars=1, num_threads=1, engine=engine).clean([sample])[0]}")
+
+def benchmark_unicode(text: str, num_runs: int = 5) -> Dict:
+    """Throughput of dropping against folding sentences with non-ASCII characters on one text"""
+    results = {}
+    for unicode in ('drop', 'fold', 'keep'):
+        cleaner = PyBatchCleaner(min_chars=30, num_threads=1, engine='tokenizer', unicode=unicode)
+        times = []
+        for _ in range(num_runs):
+            start_time = time.perf_counter()
+            count = cleaner.count([text])[0]
+            times.append(time.perf_counter() - start_time)
+        results[unicode] = {
+            'min_time': min(times),
+            'mb_per_second': len(text.encode('utf-8')) / min(times) / 1e6,
+            'sentences': count,
+        }
+    return results
+
+
+def run_unicode_test():
+    """Compare the unicode modes on plain ASCII text and on text with typographic characters"""
+    print("\n" + "=" * 60)
+    print("UNICODE: dropping vs folding non-ASCII sentences")
+    print("=" * 60)
+    if not CYTHON_AVAILABLE:
+        print("Cython implementation not available for comparison")
+        return
+
+    ascii_text = load_speech_text()
+    # every third sentence with curly quotes, dashes, accents or a euro sign, as in ECB speeches
+    typographic = ascii_text.replace("Dr. Lagarde noted", "Dr. Lagarde noted – in Brüssel –")
+    typographic = typographic.replace("The Committee decided", "“The Committee” decided")
+    typographic = typographic.replace("3.2 percent", "3.2 percent (€)")
+    for name, text in (('ASCII text', ascii_text), ('Typographic text', typographic)):
+        print(f"\n{name}: {len(text)} characters")
+        print(f"{'Mode':<12} {'Time (s)':<12} {'MB/s':<10} {'Sentences':<10}")
+        print("-" * 60)
+        for unicode, result in benchmark_unicode(text).items():
+            print(f"{unicode:<12} {result['min_time']:<12.4f} {result['mb_per_second']:<10.1f} {result['sentences']:<10}")
+
 def test_correctness():
     """Test that both implementations produce the same results"""
     print("\n" + "=" * 60)
@@ -274,6 +388,12 @@ if __name__ == "__main__":
     
     # Run performance comparison
     run_performance_test()
+
+    # Compare the sentence engines
+    run_engine_test()
+
+    # Compare the unicode modes
+    run_unicode_test()
     
     print("\n" + "=" * 60)
     print("Performance test completed!")
@@ -9,13 +9,13 @@ extensions = [
         sources=["speech_clean_wrapper.pyx", "speech_clean.cpp"],
         language="c++",
         extra_compile_args=[
-            "-std=c++11",
+            "-std=c++17",
             "-O3",
             "-Wall",
             "-Wextra"
         ],
         extra_link_args=[
-            "-std=c++11"
+            "-std=c++17"
         ],
         libraries=["pqxx", "pq"],  # PostgreSQL libraries
         include_dirs=[np.get_include()],  # NumPy headers if needed
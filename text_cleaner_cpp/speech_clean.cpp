@@ -10,12 +10,16 @@
 #include <sstream>
 #include <pqxx/pqxx>
 #include <ctime>
+#include <algorithm>
+#include <stdexcept>
 
 using namespace std;
 
 // Constructor implementation
-Clean_Text::Clean_Text(const std::string &raw_text, const std::string &file_name, int min_chars) 
-    : raw_text(raw_text), file_name(file_name), min_chars(min_chars), num_sentences(0) {
+Clean_Text::Clean_Text(const std::string &raw_text, const std::string &file_name, int min_chars, 
+                       Sentence_Engine engine, Unicode_Mode unicode) 
+    : raw_text(raw_text), file_name(file_name), min_chars(min_chars), num_sentences(0), engine(engine), 
+      unicode(unicode) {
     // Initialize date to current date
     time_t now = time(0);
     struct tm* ltm = localtime(&now);
@@ -57,20 +61,275 @@ std::vector<std::string> split_punctuation(const std::string& text){
     return results;  
 }
 
-void Clean_Text::process_text(){
-    std::vector<std::string> raw_text = split_punctuation(this->raw_text); 
+static bool is_ascii_text(const std::string& sentence){
+    for (char c : sentence){
+        if (! ::isascii(static_cast<unsigned char>(c))){
+            return false ;
+        }
+    }
+    return true ;
+}
 
-    for (std::string sentence : raw_text){
+static std::vector<std::string> clean_sentences_legacy(const std::string& raw_text, int min_chars){
+    std::vector<std::string> cleaned; 
+    for (std::string sentence : split_punctuation(raw_text)){
         // cleaning additional space before and after sentence 
         sentence.erase(0, sentence.find_first_not_of(" \t\n\r"));
         sentence.erase(sentence.find_last_not_of(" \t\n\r")+1);
         
-        if (is_ascii_only(sentence) && sentence.size() >= this->min_chars){
-            this->sentences.push_back(sentence);
-            this->cleaned_text += sentence ;
-            this->num_sentences++;
+        // whitespace after the last terminator leaves an empty sentence, which 
+        // min_chars = 0 would keep; the scanner never emits one 
+        if (!sentence.empty() && is_ascii_text(sentence) && sentence.size() >= static_cast<size_t>(min_chars)){
+            cleaned.push_back(std::move(sentence));
+        }
+    }
+    return cleaned; 
+}
+
+// Character classes of the single pass scanner, one table lookup per byte 
+enum : std::uint8_t {
+    CHAR_SPACE = 1, 
+    CHAR_TERMINAL = 2, 
+    CHAR_CLOSER = 4, 
+    CHAR_DIGIT = 8, 
+    CHAR_UPPER = 16, 
+    CHAR_LOWER = 32, 
+    CHAR_NON_ASCII = 64 
+};
+
+static std::array<std::uint8_t, 256> make_char_table(){
+    std::array<std::uint8_t, 256> table{}; 
+    for (int c = 0; c < 256; c++){
+        if (c >= 128) table[c] |= CHAR_NON_ASCII; 
+        if (c >= '0' && c <= '9') table[c] |= CHAR_DIGIT; 
+        if (c >= 'A' && c <= 'Z') table[c] |= CHAR_UPPER; 
+        if (c >= 'a' && c <= 'z') table[c] |= CHAR_LOWER; 
+    }
+    for (unsigned char c : {' ', '\t', '\n', '\r'}) table[c] |= CHAR_SPACE; 
+    for (unsigned char c : {'.', '!', '?'}) table[c] |= CHAR_TERMINAL; 
+    for (unsigned char c : {'"', '\'', ')', ']'}) table[c] |= CHAR_CLOSER; 
+    return table; 
+}
+
+static const std::array<std::uint8_t, 256> CHAR_TABLE = make_char_table(); 
+
+static inline std::uint8_t char_class(char c){
+    return CHAR_TABLE[static_cast<unsigned char>(c)]; 
+}
+
+// Length of the closing quote or bracket at text[pos], 0 if there is none. 
+// Curly closing quotes count as well so ’ and ” end a quoted sentence 
+static std::size_t closer_length(std::string_view text, std::size_t pos){
+    if (pos >= text.size()){
+        return 0; 
+    }
+    if (char_class(text[pos]) & CHAR_CLOSER){
+        return 1; 
+    }
+    if (pos + 2 < text.size() && text[pos] == '\xE2' && text[pos + 1] == '\x80' 
+        && (text[pos + 2] == '\x99' || text[pos + 2] == '\x9D')){
+        return 3; 
+    }
+    return 0; 
+}
+
+// Abbreviations that do not end a sentence before a capitalised word 
+// ("Mr. Powell", "e.g. The"), lower case and without the final '.', sorted 
+static const std::array<std::string_view, 17> ABBREVIATIONS = {
+    "approx", "cf", "dr", "e.g", "gov", "i.e", "jr", "mr", "mrs", "ms", "prof", "rep", "sen", 
+    "sr", "st", "viz", "vs" 
+}; 
+
+// Abbreviations that do not end a sentence before a number ("Jan. 5", "No. 3") 
+static const std::array<std::string_view, 18> NUMBER_ABBREVIATIONS = {
+    "apr", "aug", "dec", "feb", "fig", "jan", "jul", "jun", "mar", "no", "nos", "nov", "oct", 
+    "p", "pp", "sep", "sept", "vol" 
+}; 
+
+template <std::size_t N>
+static bool is_abbreviation(std::string_view token, const std::array<std::string_view, N>& table){
+    if (token.empty() || token.size() > 6){
+        return false; 
+    }
+    char lower[6]; 
+    for (std::size_t i = 0; i < token.size(); i++){
+        lower[i] = (char_class(token[i]) & CHAR_UPPER) ? token[i] - 'A' + 'a' : token[i]; 
+    }
+    return std::binary_search(table.begin(), table.end(), std::string_view(lower, token.size())); 
+}
+
+// Whether the punctuation at text[i, run_end), followed by closing quotes up 
+// to closed_end, ends a sentence 
+static bool is_boundary(std::string_view text, std::size_t i, std::size_t run_end, std::size_t closed_end){
+    // the next sentence has to be separated by space, "2.5", "U.S" and "Yahoo!Finance" go on 
+    if (closed_end < text.size() && !(char_class(text[closed_end]) & CHAR_SPACE)){
+        return false; 
+    }
+    // '!', '?' and runs such as "?!" or "..." end a sentence, as does the end of the text 
+    if (text[i] != '.' || run_end - i > 1 || closed_end == text.size()){
+        return true; 
+    }
+    std::size_t next = closed_end; 
+    while (next < text.size() && (char_class(text[next]) & CHAR_SPACE)){
+        next++; 
+    }
+    // a sentence does not continue in lower case 
+    if (next < text.size() && (char_class(text[next]) & CHAR_LOWER)){
+        return false; 
+    }
+    // a dot inside quotes ends the quoted sentence 
+    if (closed_end > run_end){
+        return true; 
+    }
+    std::size_t token_start = i; 
+    while (token_start > 0 && ((char_class(text[token_start - 1]) & (CHAR_UPPER | CHAR_LOWER)) || text[token_start - 1] == '.')){
+        token_start--; 
+    }
+    std::string_view token = text.substr(token_start, i - token_start); 
+    // a single capital is an initial, "Jerome H. Powell" 
+    if (token.size() == 1 && (char_class(token[0]) & CHAR_UPPER)){
+        return false; 
+    }
+    if (next < text.size() && (char_class(text[next]) & CHAR_DIGIT)){
+        return !is_abbreviation(token, NUMBER_ABBREVIATIONS); 
+    }
+    return !is_abbreviation(token, ABBREVIATIONS); 
+}
+
+// Scans text once and calls emit(start, end) for every kept sentence. The 
+// trimmed bounds and the ascii check are tracked during the scan, so no 
+// sentence is copied or read twice. With final = false the text is a prefix 
+// of a stream: the sentence still open at its end is not emitted, nor is one 
+// whose boundary depends on text that has not arrived yet. Returns how many 
+// bytes were consumed, the open sentence starts there 
+template <typename Emit>
+static std::size_t scan_sentences(std::string_view text, int min_chars, Sentence_Engine engine, Emit emit, 
+                                  bool final = true, Unicode_Mode unicode = Unicode_Mode::Drop){
+    const std::size_t size = text.size(); 
+    const std::size_t min_size = static_cast<std::size_t>(std::max(min_chars, 0)); 
+    std::size_t first = 0;         // first non-space byte of the sentence 
+    std::size_t last = 0;          // one past its last non-space byte 
+    bool started = false; 
+    bool ascii = true; 
+    std::string folded; 
+
+    // emit(start, end, folded) gets nullptr for an ASCII sentence, else its normalized form 
+    auto finish = [&](){
+        if (!started){
+            return; 
+        }
+        if (ascii){
+            if (last - first >= min_size){
+                emit(first, last, static_cast<const std::string*>(nullptr)); 
+            }
+        }
+        else if (unicode != Unicode_Mode::Drop){
+            folded.clear(); 
+            if (normalize_utf8(text.substr(first, last - first), unicode, folded) && folded.size() >= min_size){
+                emit(first, last, &folded); 
+            }
         }
+        started = false; 
+        ascii = true; 
+    }; 
 
+    std::size_t i = 0; 
+    while (i < size){
+        const std::uint8_t cls = char_class(text[i]); 
+        if (cls & CHAR_SPACE){
+            i++; 
+            continue; 
+        }
+        if (!started){
+            first = i; 
+            started = true; 
+        }
+        if (cls & CHAR_NON_ASCII){
+            ascii = false; 
+        }
+        if (!(cls & CHAR_TERMINAL)){
+            last = ++i; 
+            continue; 
+        }
+        if (engine == Sentence_Engine::Legacy){
+            last = ++i; 
+            finish(); 
+            continue; 
+        }
+        // take the whole run of punctuation and closing quotes, "?!" or ." 
+        std::size_t run_end = i + 1; 
+        while (run_end < size && (char_class(text[run_end]) & CHAR_TERMINAL)){
+            run_end++; 
+        }
+        std::size_t closed_end = run_end; 
+        for (std::size_t length; (length = closer_length(text, closed_end)) > 0; ){
+            closed_end += length; 
+            if (length > 1){
+                ascii = false; 
+            }
+        }
+        if (!final){
+            // the boundary looks ahead to the first character of the next word 
+            std::size_t next = closed_end; 
+            while (next < size && (char_class(text[next]) & CHAR_SPACE)){
+                next++; 
+            }
+            if (next == size){
+                return first; 
+            }
+        }
+        const bool boundary = is_boundary(text, i, run_end, closed_end); 
+        last = i = closed_end; 
+        if (boundary){
+            finish(); 
+        }
+    }
+    if (!final){
+        return started ? first : size; 
+    }
+    finish(); 
+    return size; 
+}
+
+std::vector<std::string_view> split_sentences(std::string_view text, int min_chars, Sentence_Engine engine){
+    std::vector<std::string_view> sentences; 
+    scan_sentences(text, min_chars, engine, [&](std::size_t start, std::size_t end, const std::string*){
+        sentences.push_back(text.substr(start, end - start)); 
+    }); 
+    return sentences; 
+}
+
+std::vector<std::string> clean_sentences(const std::string& raw_text, int min_chars, Sentence_Engine engine, 
+                                         Unicode_Mode unicode){
+    if (engine == Sentence_Engine::Legacy && unicode == Unicode_Mode::Drop){
+        return clean_sentences_legacy(raw_text, min_chars); 
+    }
+    std::vector<std::string> cleaned; 
+    scan_sentences(raw_text, min_chars, engine, [&](std::size_t start, std::size_t end, const std::string* folded){
+        if (folded != nullptr){
+            cleaned.push_back(*folded); 
+        }
+        else {
+            cleaned.emplace_back(raw_text, start, end - start); 
+        }
+    }, true, unicode); 
+    return cleaned; 
+}
+
+void sentence_spans(const char* text, std::size_t size, int min_chars, 
+                    std::vector<std::int64_t>& starts, std::vector<std::int64_t>& ends, 
+                    Sentence_Engine engine, Unicode_Mode unicode){
+    scan_sentences(std::string_view(text, size), min_chars, engine, [&](std::size_t start, std::size_t end, const std::string*){
+        starts.push_back(static_cast<std::int64_t>(start)); 
+        ends.push_back(static_cast<std::int64_t>(end)); 
+    }, true, unicode); 
+}
+
+void Clean_Text::process_text(){
+    for (std::string& sentence : clean_sentences(this->raw_text, this->min_chars, this->engine, this->unicode)){
+        this->cleaned_text += sentence ;
+        this->sentences.push_back(std::move(sentence));
+        this->num_sentences++;
     }
     std::cout << "Number of lines processed: "<< this->num_sentences << std::endl;
 }
@@ -142,8 +401,10 @@ void Clean_Text::add_to_db(const std::string& db_name,
                                " port=" + std::to_string(port);
         pqxx::connection connection(connect); 
         pqxx::work cursor(connection); 
+        // the table name is an identifier, quoted so no name can change the statements 
+        const std::string table_sql = cursor.quote_name(table_name); 
         // Creating table if it doesn't exist 
-        cursor.exec("CREATE TABLE IF NOT EXISTS " + table_name + R"(
+        cursor.exec("CREATE TABLE IF NOT EXISTS " + table_sql + R"(
             (
                 id SERIAL PRIMARY KEY,
                 date DATE, 
@@ -152,7 +413,7 @@ void Clean_Text::add_to_db(const std::string& db_name,
         )");
 
         cursor.exec_params(
-            "INSERT INTO " + table_name + " (date, text) VALUES ($1, $2)",
+            "INSERT INTO " + table_sql + " (date, text) VALUES ($1, $2)",
                             this->date, this->cleaned_text);
                     
         }
@@ -162,3 +423,354 @@ void Clean_Text::add_to_db(const std::string& db_name,
     }
     std::cout << "Added number of sentences "<< this->num_sentences <<" to the database table " << table_name << std::endl;
     }
+
+static std::string connection_string(const std::string& db_name, 
+  const std::string& user, 
+  const std::string& password, 
+  const std::string& host, 
+  const int port){
+    return "dbname=" + db_name +
+           " user=" + user +
+           " password=" + password +
+           " host=" + host +
+           " port=" + std::to_string(port);
+}
+
+struct Bulk_Writer::Impl{
+    pqxx::connection connection; 
+    std::unique_ptr<pqxx::work> cursor; 
+
+    explicit Impl(const std::string& connect) : connection(connect) {}
+
+    pqxx::work& work(){
+        if (!this->cursor){
+            this->cursor.reset(new pqxx::work(this->connection)); 
+        }
+        return *this->cursor; 
+    }
+};
+
+// sentence rows are inserted in statements of at most this many rows 
+static const size_t SENTENCE_ROWS_PER_INSERT = 1000; 
+
+Bulk_Writer::Bulk_Writer(const std::string& db_name, 
+  const std::string& user, 
+  const std::string& password, 
+  const std::string& host, 
+  const int port, 
+  const std::string& table_name, 
+  int batch_size, 
+  int commit_interval, 
+  bool store_sentences)
+    : impl(new Impl(connection_string(db_name, user, password, host, port))), 
+      table_name(table_name), 
+      batch_size(batch_size > 0 ? batch_size : 1), 
+      commit_interval(commit_interval > 0 ? commit_interval : 1), 
+      store_sentences(store_sentences) {
+    this->pending.reserve(this->batch_size); 
+    create_tables(); 
+}
+
+Bulk_Writer::~Bulk_Writer(){
+    try {
+        commit(); 
+    }
+    catch (std::exception& e){
+        std::cerr << "Could not commit remaining documents: " << e.what() << std::endl; 
+    }
+}
+
+void Bulk_Writer::create_tables(){
+    pqxx::work& cursor = this->impl->work(); 
+    // the names are identifiers, quoted so no table name can change the statements 
+    this->table_sql = cursor.quote_name(this->table_name); 
+    this->sentences_sql = cursor.quote_name(this->table_name + "_sentences"); 
+    cursor.exec("CREATE TABLE IF NOT EXISTS " + this->table_sql + R"(
+        (
+            id SERIAL PRIMARY KEY,
+            date DATE, 
+            text TEXT
+        )
+    )");
+    if (this->store_sentences){
+        cursor.exec("CREATE TABLE IF NOT EXISTS " + this->sentences_sql + " (" 
+                    "id SERIAL PRIMARY KEY, "
+                    "document_id INTEGER REFERENCES " + this->table_sql + " (id), "
+                    "position INTEGER, "
+                    "sentence TEXT)"); 
+    }
+    this->impl->cursor->commit(); 
+    this->impl->cursor.reset(); 
+}
+
+void Bulk_Writer::add(const Clean_Text& doc, const std::string& date){
+    Pending_Doc pending_doc; 
+    pending_doc.date = date.empty() ? doc.date : date; 
+    pending_doc.text = doc.cleaned_text; 
+    if (this->store_sentences){
+        pending_doc.sentences = doc.sentences; 
+    }
+    this->pending.push_back(std::move(pending_doc)); 
+    if (static_cast<int>(this->pending.size()) >= this->batch_size){
+        flush(); 
+    }
+}
+
+void Bulk_Writer::add_sentences(const std::string& date, const std::vector<std::string>& sentences){
+    Pending_Doc pending_doc; 
+    pending_doc.date = date; 
+    for (const std::string& sentence : sentences){
+        pending_doc.text += sentence; 
+    }
+    if (this->store_sentences){
+        pending_doc.sentences = sentences; 
+    }
+    this->pending.push_back(std::move(pending_doc)); 
+    if (static_cast<int>(this->pending.size()) >= this->batch_size){
+        flush(); 
+    }
+}
+
+void Bulk_Writer::flush(){
+    if (this->pending.empty()){
+        return; 
+    }
+    pqxx::work& cursor = this->impl->work(); 
+
+    // reserve the ids up front so the sentence rows can reference their document 
+    std::vector<long long> ids; 
+    ids.reserve(this->pending.size()); 
+    pqxx::result reserved = cursor.exec(
+        "SELECT nextval(pg_get_serial_sequence(" + cursor.quote(this->table_sql) + ", 'id')) "
+        "FROM generate_series(1, " + std::to_string(this->pending.size()) + ")"); 
+    for (size_t i = 0; i < reserved.size(); i++){
+        ids.push_back(reserved[i][0].as<long long>()); 
+    }
+
+    std::string query = "INSERT INTO " + this->table_sql + " (id, date, text) VALUES "; 
+    for (size_t i = 0; i < this->pending.size(); i++){
+        if (i > 0){
+            query += ", "; 
+        }
+        query += "(" + std::to_string(ids[i]) + ", " + cursor.quote(this->pending[i].date) + ", " 
+                 + cursor.quote(this->pending[i].text) + ")"; 
+    }
+    cursor.exec(query); 
+
+    if (this->store_sentences){
+        insert_sentences(ids); 
+    }
+
+    this->documents_written += this->pending.size(); 
+    this->uncommitted += this->pending.size(); 
+    this->pending.clear(); 
+
+    if (this->uncommitted >= this->commit_interval){
+        commit(); 
+    }
+}
+
+void Bulk_Writer::insert_sentences(const std::vector<long long>& ids){
+    pqxx::work& cursor = this->impl->work(); 
+    const std::string prefix = "INSERT INTO " + this->sentences_sql + " (document_id, position, sentence) VALUES "; 
+    std::string query = prefix; 
+    size_t rows = 0; 
+
+    for (size_t i = 0; i < this->pending.size(); i++){
+        const std::vector<std::string>& sentences = this->pending[i].sentences; 
+        for (size_t position = 0; position < sentences.size(); position++){
+            if (rows > 0){
+                query += ", "; 
+            }
+            query += "(" + std::to_string(ids[i]) + ", " + std::to_string(position) + ", " 
+                     + cursor.quote(sentences[position]) + ")"; 
+            rows++; 
+            if (rows == SENTENCE_ROWS_PER_INSERT){
+                cursor.exec(query); 
+                this->sentences_written += rows; 
+                query = prefix; 
+                rows = 0; 
+            }
+        }
+    }
+    if (rows > 0){
+        cursor.exec(query); 
+        this->sentences_written += rows; 
+    }
+}
+
+void Bulk_Writer::commit(){
+    flush(); 
+    if (this->impl->cursor){
+        this->impl->cursor->commit(); 
+        this->impl->cursor.reset(); 
+    }
+    this->uncommitted = 0; 
+}
+
+long Bulk_Writer::get_documents_written() const{
+    return this->documents_written; 
+}
+
+long Bulk_Writer::get_sentences_written() const{
+    return this->sentences_written; 
+}
+
+
+// Batch cleaning on a thread pool 
+
+Batch_Cleaner::Batch_Cleaner(int min_chars, int num_threads, Sentence_Engine engine, Unicode_Mode unicode) 
+    : min_chars(min_chars), engine(engine), unicode(unicode){
+    if (num_threads <= 0){
+        num_threads = std::max(1u, std::thread::hardware_concurrency()); 
+    }
+    for (int i = 0; i < num_threads; i++){
+        this->workers.emplace_back(&Batch_Cleaner::run_worker, this); 
+    }
+}
+
+Batch_Cleaner::~Batch_Cleaner(){
+    {
+        std::lock_guard<std::mutex> lock(this->tasks_mutex); 
+        this->stopping = true; 
+    }
+    this->tasks_ready.notify_all(); 
+    for (std::thread& worker : this->workers){
+        worker.join(); 
+    }
+}
+
+void Batch_Cleaner::run_worker(){
+    while (true){
+        std::function<void()> task; 
+        {
+            std::unique_lock<std::mutex> lock(this->tasks_mutex); 
+            this->tasks_ready.wait(lock, [this]{ return this->stopping || !this->tasks.empty(); }); 
+            if (this->tasks.empty()){
+                return; 
+            }
+            task = std::move(this->tasks.front()); 
+            this->tasks.pop(); 
+        }
+        task(); 
+    }
+}
+
+std::vector<std::vector<std::string>> Batch_Cleaner::clean(const std::vector<std::string>& texts){
+    std::vector<std::vector<std::string>> results(texts.size()); 
+    if (texts.empty()){
+        return results; 
+    }
+
+    // every worker takes the next uncleaned document until none is left, so 
+    // long and short documents balance out between the threads 
+    std::size_t next = 0; 
+    int running = static_cast<int>(std::min(this->workers.size(), texts.size())); 
+    std::mutex done_mutex; 
+    std::condition_variable done; 
+
+    auto task = [&](){
+        while (true){
+            std::size_t i; 
+            {
+                std::lock_guard<std::mutex> lock(done_mutex); 
+                if (next >= texts.size()){
+                    break; 
+                }
+                i = next++; 
+            }
+            results[i] = clean_sentences(texts[i], this->min_chars, this->engine, this->unicode); 
+        }
+        std::lock_guard<std::mutex> lock(done_mutex); 
+        if (--running == 0){
+            done.notify_one(); 
+        }
+    }; 
+
+    int num_tasks = running; 
+    {
+        std::lock_guard<std::mutex> lock(this->tasks_mutex); 
+        for (int i = 0; i < num_tasks; i++){
+            this->tasks.push(task); 
+        }
+    }
+    this->tasks_ready.notify_all(); 
+
+    std::unique_lock<std::mutex> lock(done_mutex); 
+    done.wait(lock, [&]{ return running == 0; }); 
+    return results; 
+}
+
+int Batch_Cleaner::get_num_threads() const{
+    return static_cast<int>(this->workers.size()); 
+}
+
+
+// Chunk fed streaming cleaner 
+
+Stream_Cleaner::Stream_Cleaner(int min_chars, Sentence_Engine engine, std::size_t max_pending, Unicode_Mode unicode) 
+    : min_chars(min_chars), engine(engine), max_pending(max_pending > 0 ? max_pending : 1), unicode(unicode){}
+
+void Stream_Cleaner::scan(bool final){
+    std::string_view text(this->pending); 
+    auto emit = [this](std::string_view sentence, const std::string* folded){
+        if (folded != nullptr){
+            this->ready.push_back(*folded); 
+        }
+        else {
+            this->ready.emplace_back(sentence); 
+        }
+    }; 
+    std::size_t consumed = scan_sentences(text, this->min_chars, this->engine, 
+        [&](std::size_t start, std::size_t end, const std::string* folded){
+            emit(text.substr(start, end - start), folded); 
+        }, final, this->unicode); 
+    if (!final && this->pending.size() - consumed > this->max_pending){
+        // a sentence without an end in sight, close it rather than buffer without bound 
+        std::string_view open = text.substr(consumed); 
+        scan_sentences(open, this->min_chars, this->engine, [&](std::size_t start, std::size_t end, const std::string* folded){
+            emit(open.substr(start, end - start), folded); 
+        }, true, this->unicode); 
+        consumed = this->pending.size(); 
+    }
+    this->pending.erase(0, consumed); 
+}
+
+std::size_t Stream_Cleaner::feed(const char* chunk, std::size_t size){
+    if (this->closed){
+        throw std::logic_error("feed() after close()"); 
+    }
+    this->pending.append(chunk, size); 
+    scan(false); 
+    return this->ready.size(); 
+}
+
+std::size_t Stream_Cleaner::close(){
+    if (!this->closed){
+        scan(true); 
+        this->closed = true; 
+    }
+    return this->ready.size(); 
+}
+
+bool Stream_Cleaner::next(std::string& sentence){
+    if (this->ready.empty()){
+        return false; 
+    }
+    sentence = std::move(this->ready.front()); 
+    this->ready.pop_front(); 
+    this->sentences_out++; 
+    return true; 
+}
+
+std::size_t Stream_Cleaner::get_ready_count() const{
+    return this->ready.size(); 
+}
+
+std::size_t Stream_Cleaner::get_pending_size() const{
+    return this->pending.size(); 
+}
+
+long Stream_Cleaner::get_sentence_count() const{
+    return this->sentences_out; 
+}
@@ -2,7 +2,46 @@
 #define CLEAN_TEXT 
 
 #include <string>
+#include <string_view>
 #include <vector> 
+#include <memory>
+#include <thread>
+#include <mutex>
+#include <condition_variable>
+#include <functional>
+#include <queue>
+#include <deque>
+#include <cstdint>
+#include "text_normalize.hpp"
+
+class Bulk_Writer;
+
+// How raw text is split into sentences. Legacy splits after every '.', '!' 
+// and '?', so "U.S.", "Mr." and "2.5" break sentences apart. Tokenizer scans 
+// the text once and only ends a sentence where the punctuation is not part of 
+// a decimal, an initial or a known abbreviation 
+enum class Sentence_Engine { Legacy = 0, Tokenizer = 1 }; 
+
+// Splits raw text into the trimmed, ascii-only sentences of at least min_chars 
+// characters that Clean_Text keeps. Sentences with non-ASCII characters are 
+// dropped or normalized as unicode says, see text_normalize.hpp. Touches no 
+// shared state and prints nothing, so it is safe to call from many threads at once 
+std::vector<std::string> clean_sentences(const std::string& raw_text, int min_chars, 
+                                         Sentence_Engine engine = Sentence_Engine::Legacy, 
+                                         Unicode_Mode unicode = Unicode_Mode::Drop);
+
+// Same sentences as clean_sentences as views into text, nothing is copied, so 
+// non-ASCII sentences are always dropped 
+std::vector<std::string_view> split_sentences(std::string_view text, int min_chars, 
+                                              Sentence_Engine engine = Sentence_Engine::Legacy);
+
+// Same sentences as clean_sentences, returned as [start, end) byte offsets into 
+// text instead of copies, so no sentence is allocated. The ranges of kept 
+// non-ASCII sentences are not normalized, normalize_utf8 does that on demand 
+void sentence_spans(const char* text, std::size_t size, int min_chars, 
+                    std::vector<std::int64_t>& starts, std::vector<std::int64_t>& ends, 
+                    Sentence_Engine engine = Sentence_Engine::Legacy, 
+                    Unicode_Mode unicode = Unicode_Mode::Drop);
 
 class Clean_Text{
 
@@ -18,12 +57,16 @@ class Clean_Text{
    int min_chars; 
    int num_sentences = 0; 
    std::string date ; 
+   Sentence_Engine engine; 
+   Unicode_Mode unicode; 
 
    bool is_ascii_only(const std::string& sentence);
 
    public : 
    // Constructor for class 
-   Clean_Text(const std::string &raw_text , const std::string &file_name, int min_chars);
+   Clean_Text(const std::string &raw_text , const std::string &file_name, int min_chars, 
+              Sentence_Engine engine = Sentence_Engine::Legacy, 
+              Unicode_Mode unicode = Unicode_Mode::Drop);
    /* note 
    raw_text is the parsed text from the python scraper that will be cleaned and processed
    file_name is the file that will be created and will store the text 
@@ -60,6 +103,151 @@ class Clean_Text{
   // This will print the count of sentences to the console 
   int get_sentence_count() const ;
 
+  // The bulk writer reads the date, cleaned text and sentences directly 
+  friend class Bulk_Writer;
+
+};
+
+/*
+Streams many cleaned documents into postgres over one open connection. 
+Documents are buffered and written with multi-row inserts every batch_size 
+documents, the transaction is committed every commit_interval documents, and 
+each sentence can also be stored as its own row in <table_name>_sentences. 
+*/
+class Bulk_Writer{
+
+   private : 
+
+   struct Impl; 
+   std::unique_ptr<Impl> impl; 
+
+   struct Pending_Doc{
+      std::string date; 
+      std::string text; 
+      std::vector<std::string> sentences; 
+   };
+
+   std::string table_name; 
+   // quoted identifiers of the document and sentence tables, set by create_tables 
+   std::string table_sql; 
+   std::string sentences_sql; 
+   int batch_size; 
+   int commit_interval; 
+   bool store_sentences; 
+   std::vector<Pending_Doc> pending; 
+   int uncommitted = 0; 
+   long documents_written = 0; 
+   long sentences_written = 0; 
+
+   void create_tables(); 
+   void insert_sentences(const std::vector<long long>& ids); 
+
+   public : 
+   // Opens the connection and creates the tables once 
+   Bulk_Writer(const std::string& db_name, 
+   const std::string& user, 
+   const std::string& password, 
+   const std::string& host, 
+   const int port, 
+   const std::string& table_name = "speeches", 
+   int batch_size = 500, 
+   int commit_interval = 5000, 
+   bool store_sentences = true);
+
+   // Flushes and commits anything still buffered 
+   ~Bulk_Writer(); 
+
+   // Buffers a processed document, an empty date uses the date of the document 
+   void add(const Clean_Text& doc, const std::string& date = ""); 
+
+   // Buffers already cleaned sentences as one document 
+   void add_sentences(const std::string& date, const std::vector<std::string>& sentences); 
+
+   // Writes the buffered documents in the open transaction 
+   void flush(); 
+
+   // Flushes and commits the open transaction 
+   void commit(); 
+
+   long get_documents_written() const; 
+   long get_sentences_written() const; 
+};
+
+/*
+Cleans many documents at once on a pool of worker threads that lives as long 
+as the object. clean() splits the documents between the workers and blocks 
+until all of them are done, without printing anything. 
+*/
+class Batch_Cleaner{
+
+   private : 
+
+   int min_chars; 
+   Sentence_Engine engine; 
+   Unicode_Mode unicode; 
+   std::vector<std::thread> workers; 
+   std::queue<std::function<void()>> tasks; 
+   std::mutex tasks_mutex; 
+   std::condition_variable tasks_ready; 
+   bool stopping = false; 
+
+   void run_worker(); 
+
+   public : 
+   // num_threads <= 0 uses one thread per hardware core 
+   Batch_Cleaner(int min_chars, int num_threads = 0, Sentence_Engine engine = Sentence_Engine::Legacy, 
+                 Unicode_Mode unicode = Unicode_Mode::Drop); 
+
+   // Finishes queued work and joins the workers 
+   ~Batch_Cleaner(); 
+
+   // Sentences of every document, in the order of the documents 
+   std::vector<std::vector<std::string>> clean(const std::vector<std::string>& texts); 
+
+   int get_num_threads() const; 
+};
+
+/*
+Cleans a text that arrives in chunks, e.g. from a download or a page by page 
+PDF extraction. feed() appends a chunk and moves every sentence it finishes 
+to a ready queue, the unfinished sentence is carried over to the next chunk. 
+Memory is bounded by the chunk size plus the longest open sentence, which is 
+closed once it exceeds max_pending bytes. The sentences are the same as 
+clean_sentences gives for the whole text. 
+*/
+class Stream_Cleaner{
+
+   private : 
+
+   int min_chars; 
+   Sentence_Engine engine; 
+   std::size_t max_pending; 
+   Unicode_Mode unicode; 
+   std::string pending; 
+   std::deque<std::string> ready; 
+   bool closed = false; 
+   long sentences_out = 0; 
+
+   void scan(bool final); 
+
+   public : 
+   Stream_Cleaner(int min_chars, Sentence_Engine engine = Sentence_Engine::Legacy, 
+                  std::size_t max_pending = 1 << 20, Unicode_Mode unicode = Unicode_Mode::Drop); 
+
+   // Adds a chunk, returns the number of sentences ready to be taken 
+   std::size_t feed(const char* chunk, std::size_t size); 
+
+   // Ends the stream, the last sentence becomes ready 
+   std::size_t close(); 
+
+   // Takes the next ready sentence, false if none is ready 
+   bool next(std::string& sentence); 
+
+   std::size_t get_ready_count() const; 
+   std::size_t get_pending_size() const; 
+
+   // Sentences taken so far 
+   long get_sentence_count() const; 
 };
 
 #endif 
@@ -3,12 +3,32 @@
 
 from libcpp.string cimport string
 from libcpp.vector cimport vector
+from libcpp.string_view cimport string_view
 from libcpp cimport bool
+from libc.stdint cimport int64_t
+from libc.string cimport memcpy
+from cpython.buffer cimport PyBuffer_FillInfo
+
+import numpy as np
+
+cdef extern from "text_normalize.hpp":
+    enum class Unicode_Mode:
+        Drop
+        Fold
+        Keep
+
+    bool normalize_utf8(string_view text, Unicode_Mode mode, string& out)
+    bool is_ascii(string_view text)
 
 # Declare the C++ class
 cdef extern from "speech_clean.hpp":
+    enum class Sentence_Engine:
+        Legacy
+        Tokenizer
+
     cdef cppclass Clean_Text:
-        Clean_Text(const string& raw_text, const string& file_name, int min_chars)
+        Clean_Text(const string& raw_text, const string& file_name, int min_chars, Sentence_Engine engine,
+                   Unicode_Mode unicode)
         void process_text()
         int write_to_file()
         void add_to_db(const string& db_name, const string& user, const string& password, 
@@ -19,15 +39,79 @@ cdef extern from "speech_clean.hpp":
         void get_clean_text()
         int get_sentence_count()
 
+    cdef cppclass Bulk_Writer:
+        Bulk_Writer(const string& db_name, const string& user, const string& password,
+                    const string& host, int port, const string& table_name,
+                    int batch_size, int commit_interval, bool store_sentences) except +
+        void add(const Clean_Text& doc, const string& date) except +
+        void add_sentences(const string& date, const vector[string]& sentences) except +
+        void flush() except +
+        void commit() except +
+        long get_documents_written()
+        long get_sentences_written()
+
+    cdef cppclass Batch_Cleaner:
+        Batch_Cleaner(int min_chars, int num_threads, Sentence_Engine engine, Unicode_Mode unicode) except +
+        vector[vector[string]] clean(const vector[string]& texts) except + nogil
+        int get_num_threads()
+
+    cdef cppclass Stream_Cleaner:
+        Stream_Cleaner(int min_chars, Sentence_Engine engine, size_t max_pending, Unicode_Mode unicode) except +
+        size_t feed(const char* chunk, size_t size) except + nogil
+        size_t close() except + nogil
+        bool next(string& sentence)
+        size_t get_ready_count()
+        size_t get_pending_size()
+        long get_sentence_count()
+
+    void sentence_spans(const char* text, size_t size, int min_chars,
+                        vector[int64_t]& starts, vector[int64_t]& ends, Sentence_Engine engine,
+                        Unicode_Mode unicode) nogil
+
+
+# Sentence splitters selectable by name, see Sentence_Engine in speech_clean.hpp
+ENGINES = ('legacy', 'tokenizer')
+
+cdef Sentence_Engine _engine(str engine) except *:
+    if engine == 'legacy':
+        return Sentence_Engine.Legacy
+    if engine == 'tokenizer':
+        return Sentence_Engine.Tokenizer
+    raise ValueError(f"unknown sentence engine {engine!r}, expected one of {ENGINES}")
+
+
+# Treatment of sentences with non-ASCII characters, see Unicode_Mode in text_normalize.hpp
+UNICODE_MODES = ('drop', 'fold', 'keep')
+
+cdef Unicode_Mode _unicode(str unicode) except *:
+    if unicode == 'drop':
+        return Unicode_Mode.Drop
+    if unicode == 'fold':
+        return Unicode_Mode.Fold
+    if unicode == 'keep':
+        return Unicode_Mode.Keep
+    raise ValueError(f"unknown unicode mode {unicode!r}, expected one of {UNICODE_MODES}")
+
+
+def normalize_text(text, str unicode='fold'):
+    """Normalize a str or UTF-8 bytes text like the cleaner does, None if the mode drops it"""
+    cdef bytes data = text.encode('utf-8') if isinstance(text, str) else bytes(text)
+    cdef string out
+    if not normalize_utf8(string_view(<const char*>data, len(data)), _unicode(unicode), out):
+        return None
+    return out.decode('utf-8')
+
 # Python wrapper class
 cdef class PyCleanText:
     cdef Clean_Text* _clean_text
     
-    def __cinit__(self, str raw_text, str file_name, int min_chars):
+    def __cinit__(self, str raw_text, str file_name, int min_chars, str engine='legacy', str unicode='drop'):
         self._clean_text = new Clean_Text(
             raw_text.encode('utf-8'),
             file_name.encode('utf-8'),
-            min_chars
+            min_chars,
+            _engine(engine),
+            _unicode(unicode)
         )
     
     def __dealloc__(self):
@@ -72,4 +156,327 @@ cdef class PyCleanText:
     
     def get_sentence_count(self):
         """Get the number of sentences"""
-        return self._clean_text.get_sentence_count() 
\ No newline at end of file
+        return self._clean_text.get_sentence_count()
+
+
+# Python wrapper for bulk ingest into postgres
+cdef class PyBulkWriter:
+    """Streams many cleaned documents into postgres over one connection.
+
+    Documents are written with multi-row inserts every batch_size documents and
+    committed every commit_interval documents. With store_sentences every
+    sentence is also stored as a row of <table_name>_sentences. Use as a context
+    manager, or call close() to commit what is still buffered.
+    """
+    cdef Bulk_Writer* _writer
+
+    def __cinit__(self, str db_name, str user, str password, str host, int port,
+                  str table_name="speeches", int batch_size=500, int commit_interval=5000,
+                  bint store_sentences=True):
+        self._writer = new Bulk_Writer(
+            db_name.encode('utf-8'),
+            user.encode('utf-8'),
+            password.encode('utf-8'),
+            host.encode('utf-8'),
+            port,
+            table_name.encode('utf-8'),
+            batch_size,
+            commit_interval,
+            store_sentences
+        )
+
+    def __dealloc__(self):
+        if self._writer is not NULL:
+            del self._writer
+
+    cdef Bulk_Writer* _open(self) except NULL:
+        if self._writer is NULL:
+            raise ValueError("writer is closed")
+        return self._writer
+
+    def add(self, PyCleanText doc, str date=None):
+        """Buffer a processed document, date defaults to the document's date"""
+        self._open().add(doc._clean_text[0], (date or '').encode('utf-8'))
+
+    def add_sentences(self, str date, sentences):
+        """Buffer already cleaned sentences as one document"""
+        cdef vector[string] encoded
+        for sentence in sentences:
+            encoded.push_back(sentence.encode('utf-8'))
+        self._open().add_sentences(date.encode('utf-8'), encoded)
+
+    def add_many(self, docs):
+        """Buffer PyCleanText documents or (date, PyCleanText) pairs, returns the count"""
+        count = 0
+        for doc in docs:
+            if isinstance(doc, tuple):
+                self.add(doc[1], doc[0])
+            else:
+                self.add(doc)
+            count += 1
+        return count
+
+    def flush(self):
+        """Write the buffered documents in the open transaction"""
+        self._open().flush()
+
+    def commit(self):
+        """Flush and commit the open transaction"""
+        self._open().commit()
+
+    def close(self):
+        """Commit everything and close the connection"""
+        if self._writer is not NULL:
+            self._writer.commit()
+            del self._writer
+            self._writer = NULL
+
+    def get_documents_written(self):
+        """Get the number of documents written so far"""
+        return self._open().get_documents_written()
+
+    def get_sentences_written(self):
+        """Get the number of sentence rows written so far"""
+        return self._open().get_sentences_written()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+
+# Python wrapper for cleaning many documents in one call
+cdef class PyBatchCleaner:
+    """Cleans many documents at once on a C++ thread pool.
+
+    The documents are copied into C++ and cleaned with the GIL released, so
+    other Python threads keep running and one call scales with cores. Nothing
+    is printed. The pool lives as long as the object, so reuse one cleaner for
+    many batches.
+    """
+    cdef Batch_Cleaner* _cleaner
+
+    def __cinit__(self, int min_chars=30, int num_threads=0, str engine='legacy', str unicode='drop'):
+        self._cleaner = new Batch_Cleaner(min_chars, num_threads, _engine(engine), _unicode(unicode))
+
+    def __dealloc__(self):
+        if self._cleaner is not NULL:
+            del self._cleaner
+
+    cdef vector[vector[string]] _clean(self, documents) except *:
+        cdef vector[string] texts
+        cdef vector[vector[string]] results
+        for document in documents:
+            texts.push_back(document.encode('utf-8'))
+        with nogil:
+            results = self._cleaner.clean(texts)
+        return results
+
+    def clean(self, documents):
+        """Get the sentence list of every document, in the order of the documents"""
+        cdef vector[vector[string]] results = self._clean(documents)
+        return [[s.decode('utf-8') for s in sentences] for sentences in results]
+
+    def clean_with_counts(self, documents):
+        """Get (sentence lists, sentence counts) of the documents"""
+        sentences = self.clean(documents)
+        return sentences, [len(doc) for doc in sentences]
+
+    def count(self, documents):
+        """Get only the sentence count of every document, no Python strings are created"""
+        cdef vector[vector[string]] results = self._clean(documents)
+        return [<long>sentences.size() for sentences in results]
+
+    def iter_clean(self, documents, int batch_size=256):
+        """Clean an iterable of any length batch_size documents at a time, yielding one sentence list per document"""
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield from self.clean(batch)
+                batch = []
+        if batch:
+            yield from self.clean(batch)
+
+    def get_num_threads(self):
+        """Get the number of worker threads"""
+        return self._cleaner.get_num_threads()
+
+
+def clean_documents(documents, int min_chars=30, int num_threads=0, str engine='legacy', str unicode='drop'):
+    """Clean a batch of documents with a temporary PyBatchCleaner, returns (sentence lists, counts)"""
+    return PyBatchCleaner(min_chars, num_threads, engine, unicode).clean_with_counts(documents)
+
+
+cdef object _to_array(vector[int64_t]& values):
+    array = np.empty(values.size(), dtype=np.int64)
+    cdef int64_t[::1] view = array
+    if values.size():
+        memcpy(&view[0], values.data(), values.size() * sizeof(int64_t))
+    return array
+
+
+# Sentence boundaries without a Python string per sentence
+cdef class PySentenceSpans:
+    """Cleaned sentences of a text as offsets into one shared UTF-8 buffer.
+
+    The text is held once as UTF-8 bytes (a bytes argument is used as is,
+    without a copy), and the sentences are the byte ranges
+    [starts[i], ends[i]) of it, as NumPy int64 arrays. The object exposes the
+    buffer through the buffer protocol, so memoryview(spans)[s:e] and
+    np.frombuffer(spans, np.uint8) read it without copying. A sentence only
+    becomes a Python string when it is indexed or iterated. With unicode
+    'fold' or 'keep' a range can hold non-ASCII characters, which are
+    normalized when the sentence is decoded.
+    """
+    cdef bytes _data
+    cdef const char* _ptr
+    cdef Unicode_Mode _mode
+    cdef readonly object starts
+    cdef readonly object ends
+
+    def __cinit__(self, text, int min_chars=30, str engine='legacy', str unicode='drop'):
+        cdef vector[int64_t] starts
+        cdef vector[int64_t] ends
+        cdef size_t size
+        cdef Sentence_Engine sentence_engine = _engine(engine)
+        self._mode = _unicode(unicode)
+        self._data = text.encode('utf-8') if isinstance(text, str) else bytes(text)
+        self._ptr = self._data
+        size = len(self._data)
+        with nogil:
+            sentence_spans(self._ptr, size, min_chars, starts, ends, sentence_engine, self._mode)
+        self.starts = _to_array(starts)
+        self.ends = _to_array(ends)
+
+    def __getbuffer__(self, Py_buffer* buffer, int flags):
+        PyBuffer_FillInfo(buffer, self, <void*>self._ptr, len(self._data), 1, flags)
+
+    def __releasebuffer__(self, Py_buffer* buffer):
+        pass
+
+    @property
+    def data(self):
+        """The UTF-8 bytes the offsets point into"""
+        return self._data
+
+    @property
+    def lengths(self):
+        """Byte length of every sentence"""
+        return self.ends - self.starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        """Decode one sentence, or a list of sentences for a slice"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        cdef Py_ssize_t i = index
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("sentence index out of range")
+        cdef int64_t start = self.starts[i]
+        cdef int64_t end = self.ends[i]
+        cdef string_view sentence = string_view(self._ptr + start, end - start)
+        cdef string folded
+        if is_ascii(sentence):
+            return self._ptr[start:end].decode('ascii')
+        normalize_utf8(sentence, self._mode, folded)
+        return folded.decode('utf-8')
+
+    def __iter__(self):
+        cdef Py_ssize_t i
+        for i in range(len(self)):
+            yield self[i]
+
+    def sentence_bytes(self, Py_ssize_t index):
+        """Get a read-only memoryview of one sentence, no copy is made"""
+        return memoryview(self)[self.starts[index]:self.ends[index]]
+
+    def to_list(self):
+        """Decode all sentences, same as PyCleanText.get_sentences"""
+        return list(self)
+
+
+def clean_spans(text, int min_chars=30, str engine='legacy', str unicode='drop'):
+    """Get the cleaned sentences of a str or UTF-8 bytes text as a PySentenceSpans"""
+    return PySentenceSpans(text, min_chars, engine, unicode)
+
+
+# Python wrapper for cleaning a text that arrives in chunks
+cdef class PyStreamCleaner:
+    """Cleans a text fed in chunks, with memory bounded by the chunk size.
+
+    feed() takes the next str or UTF-8 bytes chunk. The sentence still open at
+    the end of a chunk is carried over, and iterating the cleaner yields the
+    sentences finished so far. close() ends the stream and makes the last
+    sentence ready. The sentences are the same as those of PyBatchCleaner for
+    the whole text, unless a sentence grows past max_pending bytes without an
+    end, which is then closed where it is.
+    """
+    cdef Stream_Cleaner* _cleaner
+
+    def __cinit__(self, int min_chars=30, str engine='legacy', size_t max_pending=1 << 20, str unicode='drop'):
+        self._cleaner = new Stream_Cleaner(min_chars, _engine(engine), max_pending, _unicode(unicode))
+
+    def __dealloc__(self):
+        if self._cleaner is not NULL:
+            del self._cleaner
+
+    def feed(self, chunk):
+        """Add a chunk, returns the number of sentences ready to be taken"""
+        cdef bytes data = chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+        cdef const char* ptr = data
+        cdef size_t size = len(data)
+        cdef size_t ready
+        with nogil:
+            ready = self._cleaner.feed(ptr, size)
+        return ready
+
+    def close(self):
+        """End the stream, returns the number of sentences ready to be taken"""
+        cdef size_t ready
+        with nogil:
+            ready = self._cleaner.close()
+        return ready
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        cdef string sentence
+        if not self._cleaner.next(sentence):
+            raise StopIteration
+        return sentence.decode('utf-8')
+
+    def get_ready_count(self):
+        """Get the number of sentences ready to be taken"""
+        return self._cleaner.get_ready_count()
+
+    def get_pending_size(self):
+        """Get the bytes buffered for the open sentence"""
+        return self._cleaner.get_pending_size()
+
+    def get_sentence_count(self):
+        """Get the number of sentences taken so far"""
+        return self._cleaner.get_sentence_count()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def clean_stream(chunks, int min_chars=30, str engine='legacy', str unicode='drop'):
+    """Clean an iterable of text chunks, yielding each sentence as soon as it is finished"""
+    cleaner = PyStreamCleaner(min_chars, engine, unicode=unicode)
+    for chunk in chunks:
+        cleaner.feed(chunk)
+        yield from cleaner
+    cleaner.close()
+    yield from cleaner
@@ -0,0 +1,174 @@
+#ifndef TEXT_NORMALIZE 
+#define TEXT_NORMALIZE 
+
+/*
+Table driven UTF-8 normalization shared by the sentence cleaner and the PDF 
+parser. Header only, so pdf_parser_cpp includes it straight from 
+text_cleaner_cpp. Curly quotes, dashes, ellipses and special spaces fold to 
+their ASCII forms, accented Latin letters lose their accents, and "€" becomes 
+"EUR". Pure ASCII text is never touched, callers only normalize a sentence 
+once their scan has seen a non-ASCII byte in it. 
+*/
+
+#include <string>
+#include <string_view>
+#include <cstdint>
+
+// What happens to a sentence with non-ASCII characters 
+enum class Unicode_Mode { 
+   Drop = 0,    // drop it, the behaviour before normalization existed 
+   Fold = 1,    // fold it to ASCII, drop it if a character has no ASCII form 
+   Keep = 2     // fold what has an ASCII form and keep the other characters as they are 
+}; 
+
+// ASCII forms of U+00A0 to U+017F (Latin-1 Supplement and Latin Extended-A), 
+// nullptr where there is none 
+inline constexpr const char* LATIN_FOLD[224] = {
+    " ", "!", "c", "GBP", nullptr, "JPY", "|", "S", 
+    "", "(c)", "a", "\"", "-", "", "(R)", "", 
+    nullptr, "+/-", "2", "3", "'", "u", nullptr, ".", 
+    "", "1", "o", "\"", "1/4", "1/2", "3/4", "?", 
+    "A", "A", "A", "A", "A", "A", "AE", "C", 
+    "E", "E", "E", "E", "I", "I", "I", "I", 
+    "D", "N", "O", "O", "O", "O", "O", "x", 
+    "O", "U", "U", "U", "U", "Y", "Th", "ss", 
+    "a", "a", "a", "a", "a", "a", "ae", "c", 
+    "e", "e", "e", "e", "i", "i", "i", "i", 
+    "d", "n", "o", "o", "o", "o", "o", "/", 
+    "o", "u", "u", "u", "u", "y", "th", "y", 
+    "A", "a", "A", "a", "A", "a", "C", "c", 
+    "C", "c", "C", "c", "C", "c", "D", "d", 
+    "D", "d", "E", "e", "E", "e", "E", "e", 
+    "E", "e", "E", "e", "G", "g", "G", "g", 
+    "G", "g", "G", "g", "H", "h", "H", "h", 
+    "I", "i", "I", "i", "I", "i", "I", "i", 
+    "I", "i", "IJ", "ij", "J", "j", "K", "k", 
+    "k", "L", "l", "L", "l", "L", "l", "L", 
+    "l", "L", "l", "N", "n", "N", "n", "N", 
+    "n", "'n", "N", "n", "O", "o", "O", "o", 
+    "O", "o", "OE", "oe", "R", "r", "R", "r", 
+    "R", "r", "S", "s", "S", "s", "S", "s", 
+    "S", "s", "T", "t", "T", "t", "T", "t", 
+    "U", "u", "U", "u", "U", "u", "U", "u", 
+    "U", "u", "U", "u", "W", "w", "Y", "y", 
+    "Y", "Z", "z", "Z", "z", "Z", "z", "s", 
+};
+
+// ASCII forms of U+2000 to U+205F (General Punctuation) 
+inline constexpr const char* PUNCTUATION_FOLD[96] = {
+    " ", " ", " ", " ", " ", " ", " ", " ", 
+    " ", " ", " ", "", "", "", "", "", 
+    "-", "-", "-", "-", "-", "-", nullptr, nullptr, 
+    "'", "'", "'", "'", "\"", "\"", "\"", "\"", 
+    nullptr, nullptr, "-", nullptr, ".", "..", "...", "-", 
+    " ", " ", "", "", "", "", "", " ", 
+    nullptr, nullptr, "'", "\"", nullptr, nullptr, nullptr, nullptr, 
+    nullptr, "'", "'", nullptr, nullptr, nullptr, nullptr, nullptr, 
+    nullptr, nullptr, nullptr, nullptr, "/", nullptr, nullptr, nullptr, 
+    nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, 
+    nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, 
+    nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, nullptr, " ", 
+};
+
+// ASCII form of a code point, nullptr if it has none. "" removes the 
+// character, e.g. a soft hyphen or a zero width space 
+inline const char* fold_code_point(std::uint32_t code_point){
+    if (code_point >= 0xA0 && code_point < 0x180){
+        return LATIN_FOLD[code_point - 0xA0]; 
+    }
+    if (code_point >= 0x2000 && code_point < 0x2060){
+        return PUNCTUATION_FOLD[code_point - 0x2000]; 
+    }
+    switch (code_point){
+        case 0x20AC: return "EUR"; 
+        case 0x2122: return "TM"; 
+        case 0x2212: return "-"; 
+        case 0xFEFF: return ""; 
+        default: return nullptr; 
+    }
+}
+
+// Decodes the UTF-8 sequence at text[pos], returns its length or 0 if it is invalid 
+inline std::size_t decode_utf8(std::string_view text, std::size_t pos, std::uint32_t& code_point){
+    const unsigned char lead = static_cast<unsigned char>(text[pos]); 
+    std::size_t length; 
+    if (lead < 0x80){
+        code_point = lead; 
+        return 1; 
+    }
+    else if ((lead & 0xE0) == 0xC0){
+        length = 2; 
+        code_point = lead & 0x1F; 
+    }
+    else if ((lead & 0xF0) == 0xE0){
+        length = 3; 
+        code_point = lead & 0x0F; 
+    }
+    else if ((lead & 0xF8) == 0xF0){
+        length = 4; 
+        code_point = lead & 0x07; 
+    }
+    else {
+        return 0; 
+    }
+    if (pos + length > text.size()){
+        return 0; 
+    }
+    for (std::size_t i = 1; i < length; i++){
+        const unsigned char next = static_cast<unsigned char>(text[pos + i]); 
+        if ((next & 0xC0) != 0x80){
+            return 0; 
+        }
+        code_point = (code_point << 6) | (next & 0x3F); 
+    }
+    return length; 
+}
+
+inline bool is_ascii(std::string_view text){
+    for (char c : text){
+        if (static_cast<unsigned char>(c) >= 0x80){
+            return false; 
+        }
+    }
+    return true; 
+}
+
+/*
+Appends the normalized form of text to out. Returns false if the mode drops 
+the text, out may then hold part of it. Invalid UTF-8 counts as a character 
+without an ASCII form, Keep mode leaves it out. 
+*/
+inline bool normalize_utf8(std::string_view text, Unicode_Mode mode, std::string& out){
+    std::size_t pos = 0; 
+    while (pos < text.size()){
+        // copy runs of ASCII at once 
+        std::size_t run = pos; 
+        while (run < text.size() && static_cast<unsigned char>(text[run]) < 0x80){
+            run++; 
+        }
+        out.append(text.data() + pos, run - pos); 
+        pos = run; 
+        if (pos == text.size()){
+            break; 
+        }
+        if (mode == Unicode_Mode::Drop){
+            return false; 
+        }
+        std::uint32_t code_point = 0; 
+        const std::size_t length = decode_utf8(text, pos, code_point); 
+        const char* folded = length ? fold_code_point(code_point) : nullptr; 
+        if (folded != nullptr){
+            out += folded; 
+        }
+        else if (mode == Unicode_Mode::Fold){
+            return false; 
+        }
+        else if (length){
+            out.append(text.data() + pos, length); 
+        }
+        pos += length ? length : 1; 
+    }
+    return true; 
+}
+
+#endif 